@@ -0,0 +1,40 @@
+"""Time and modularity of the community detection engines.
+
+Compares networkx louvain with the vectorised sparse louvain of the fast engine,
+both on the collapsed, weighted graph of growing exports. Run from the repository
+root:
+
+    python benchmarks/bench_communities.py
+"""
+
+import time
+
+import networkx as nx
+from synthetic import make_sram_org
+
+from surfiamviz.community import _fast_communities, collapse_multiedges
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+
+
+def main():
+    """Print time, number of communities and modularity of both engines."""
+    for n_collaborations, n_users in [(500, 12500), (2000, 50000)]:
+        graph = nodes_to_graph(get_nodes_from_dict(make_sram_org(n_collaborations=n_collaborations, n_users=n_users)))
+        simple = collapse_multiedges(graph)
+        engines = [
+            ("networkx louvain", lambda simple: nx.community.louvain_communities(simple, weight="weight", seed=429)),
+            ("sparse louvain", _fast_communities),
+        ]
+        for name, func in engines:
+            start = time.perf_counter()
+            communities = func(simple)
+            seconds = time.perf_counter() - start
+            modularity = nx.community.modularity(simple, communities, weight="weight")
+            print(
+                f"{simple.number_of_nodes():6d} nodes, {name:16s} {seconds:6.2f} s, "
+                f"{len(communities):4d} communities, modularity {modularity:.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Time and peak allocation of reading an export and extracting its nodes.
+
+Compares the json module with dictionary lookups (as before), orjson with records and
+the streaming decoder with records. Run from the repository root:
+
+    python benchmarks/bench_decode.py
+"""
+
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from reference import get_nodes_from_dict_lookups
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, get_nodes_from_records, read_json, read_organisation
+from surfiamviz.records import orjson
+
+
+def json_dicts(path):
+    """Decode with the json module and extract from the dictionaries."""
+    with open(path, "r", encoding="utf-8") as f:
+        return get_nodes_from_dict_lookups(json.load(f))
+
+
+def read_json_records(path):
+    """Decode with read_json and extract through the records, as the command line did."""
+    return get_nodes_from_dict(read_json(path))
+
+
+def records(path):
+    """Decode the file directly into records."""
+    return get_nodes_from_records(read_organisation(path))
+
+
+def streamed_records(path):
+    """Decode one collaboration at a time into records."""
+    return get_nodes_from_records(read_organisation(path, stream=True))
+
+
+def validated_streamed_records(path):
+    """Decode and validate one collaboration at a time, as the command line does with --input."""
+    problems = []
+    org = read_organisation(path, stream=True, problems=problems)
+    assert not problems
+    return get_nodes_from_records(org)
+
+
+def main():
+    """Print the best time of three runs and the peak allocation per decoding path for a large export."""
+    print(f"orjson {'installed' if orjson is not None else 'not installed, using json'}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "org.json"
+        path.write_text(json.dumps(make_sram_org(n_collaborations=5000, n_users=100000)), encoding="utf-8")
+        print(f"Export: {path.stat().st_size / 2**20:.1f} MiB")
+        expected = json_dicts(path)
+        for name, func in [
+            ("json + dict lookups", json_dicts),
+            ("read_json + records", read_json_records),
+            ("records", records),
+            ("streamed records", streamed_records),
+            ("validated streamed", validated_streamed_records),
+        ]:
+            seconds = float("inf")
+            for _ in range(3):
+                gc.collect()
+                start = time.perf_counter()
+                nodes = func(path)
+                seconds = min(seconds, time.perf_counter() - start)
+                assert nodes == expected
+                del nodes
+            gc.collect()
+            tracemalloc.start()
+            func(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:20s} {seconds:6.2f} s  {peak / 2**20:8.1f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Ingest throughput and query times of the SQLite graph store.
+
+For growing synthetic exports, prints the time and peak Python allocation of loading
+the export into a GraphStore, next to reading it into a networkx graph with read_json
+and nodes_to_graph, and the time of a neighbourhood and a subgraph query on the store.
+Run from the repository root:
+
+    python benchmarks/bench_graph_store.py
+"""
+
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph, read_json
+from surfiamviz.graph_store import GraphStore
+
+
+def timed(func):
+    """Return the result and time of func()."""
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def peak_mib(func) -> float:
+    """Return the peak allocation of func() in MiB, tracing makes func much slower."""
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def ingest(path: Path, db: Path) -> dict:
+    """Load the export into a new store."""
+    db.unlink(missing_ok=True)
+    with GraphStore(db) as store:
+        return store.ingest(path)
+
+
+def read_graph(path: Path):
+    """Read the export into a networkx graph."""
+    return nodes_to_graph(get_nodes_from_dict(read_json(path)))
+
+
+def main():
+    """Print ingest and query measurements per export size."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_collaborations, n_users in [(1000, 20000), (5000, 100000), (20000, 400000)]:
+            path = Path(tmpdir) / f"org_{n_collaborations}.json"
+            path.write_text(
+                json.dumps(make_sram_org(n_collaborations=n_collaborations, n_users=n_users)), encoding="utf-8"
+            )
+            db = Path(tmpdir) / f"org_{n_collaborations}.sqlite"
+            ingest_peak = peak_mib(lambda: ingest(path, db))
+            graph_peak = peak_mib(lambda: read_graph(path))
+            _, graph_seconds = timed(lambda: read_graph(path))
+            counts, ingest_seconds = timed(lambda: ingest(path, db))
+            rows = sum(counts.values())
+            with GraphStore(db) as store:
+                _, ego_seconds = timed(lambda: store.ego_network("Collaboration 7", hops=2))
+                _, sub_seconds = timed(
+                    lambda: store.subgraph(["BACKBONE"], ["UNIT", "COLLABORATION", "APPLICATION"])
+                )
+            print(
+                f"{n_collaborations:6d} collaborations, {counts['memberships']:8d} memberships: "
+                f"ingest {ingest_seconds:6.2f} s ({rows / ingest_seconds:9.0f} rows/s, {ingest_peak:6.1f} MiB peak, "
+                f"{db.stat().st_size / 2**20:6.1f} MiB on disk), networkx {graph_seconds:6.2f} s "
+                f"({graph_peak:7.1f} MiB peak); ego {ego_seconds * 1000:6.1f} ms, subgraph {sub_seconds * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Disk usage and query time of the history store for a series of daily exports.
+
+Run from the repository root:
+
+    python benchmarks/bench_history.py
+"""
+
+import copy
+import datetime
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import make_sram_org
+
+from surfiamviz.history import HistoryStore
+
+
+def daily_exports(n_days: int, seed: int = 7):
+    """Yield (date, export) for n_days, every day memberships and a collaboration change."""
+    rng = random.Random(seed)
+    org = make_sram_org(n_users=5000)
+    users = [m["user"] for coll in org["collaborations"] for m in coll["collaboration_memberships"]]
+    day = datetime.date(2024, 1, 1)
+    for i in range(n_days):
+        yield day.isoformat(), org
+        org = copy.deepcopy(org)
+        colls = org["collaborations"]
+        for _ in range(20):
+            coll = rng.choice(colls)
+            coll["collaboration_memberships"].append(
+                {"created_by": coll["created_by"], "role": "member", "status": "active", "user": rng.choice(users)}
+            )
+        for _ in range(10):
+            coll = rng.choice(colls)
+            if coll["collaboration_memberships"]:
+                coll["collaboration_memberships"].pop(rng.randrange(len(coll["collaboration_memberships"])))
+        colls.append(dict(copy.deepcopy(colls[0]), name=f"New collaboration {i}"))
+        day += datetime.timedelta(days=1)
+
+
+def main():
+    """Ingest 30 daily exports and time the three queries."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        store = HistoryStore(Path(tmpdir) / "store")
+        raw_size = 0
+        start = time.perf_counter()
+        for date, export in daily_exports(30):
+            raw_size += len(json.dumps(export).encode())
+            store.ingest(date, export)
+        print(f"ingest       {time.perf_counter() - start:6.2f} s for {len(store.dates)} exports")
+        print(f"disk usage   {store.disk_usage() / 2**20:6.2f} MiB store, {raw_size / 2**20:6.2f} MiB raw json")
+
+        for name, query in [
+            ("graph_at", lambda: store.graph_at("2024-01-20")),
+            ("growth", store.growth),
+            ("access", lambda: store.access_history("user1@sram.example.org", "Collaboration 1")),
+        ]:
+            start = time.perf_counter()
+            query()
+            print(f"{name:12s} {time.perf_counter() - start:6.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Peak allocation of the html export: gravis export_html versus the streaming writer.
+
+Run from the repository root:
+
+    python benchmarks/bench_html_export.py
+"""
+
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import gravis as gv
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.html_writer import export_html_streaming
+from surfiamviz.utils import VIS_OPTIONS
+
+
+def gravis_export(graph, path):
+    """Export as before, building the figure and the html string in memory."""
+    gv.vis(graph, **VIS_OPTIONS).export_html(path, overwrite=True)
+
+
+def streaming_export(graph, path):
+    """Export with the streaming writer."""
+    export_html_streaming(graph, path, overwrite=True, **VIS_OPTIONS)
+
+
+def main():
+    """Print time and peak allocation of both exports."""
+    graph = nodes_to_graph(get_nodes_from_dict(make_sram_org(n_users=11000)))
+    print(f"Graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, func in [("gravis", gravis_export), ("streaming", streaming_export)]:
+            path = Path(tmpdir) / f"{name}.html"
+            tracemalloc.start()
+            start = time.perf_counter()
+            func(graph, path)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = path.stat().st_size / 2**20
+            print(f"{name:10s} {seconds:6.2f} s  {peak / 2**20:8.2f} MiB peak  {size:7.2f} MiB file")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Time of the co-membership analytics on sparse incidence matrices.
+
+Compares the overlap of all collaboration pairs from the graph of nodes_to_graph
+(per-node loops over the neighbours of the users) with the sparse matrix product,
+for growing exports. Run from the repository root:
+
+    python benchmarks/bench_incidence.py
+"""
+
+import time
+from collections import Counter
+
+from synthetic import make_sram_org
+
+from surfiamviz.centrality import USER_NODE_TYPES
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.incidence import Incidence
+
+
+def graph_overlap(graph) -> Counter:
+    """Count the shared members of all collaboration pairs by looping over the users in the graph."""
+    overlap: Counter = Counter()
+    for node, attrs in graph.nodes(data=True):
+        if attrs.get("node_type") not in USER_NODE_TYPES:
+            continue
+        colls = sorted(
+            {nbr for nbr, keydict in graph.succ[node].items()
+             if any(edge.get("edge_type") == "MEMBERS" for edge in keydict.values())
+             and graph.nodes[nbr].get("node_type") == "COLLABORATION"}
+        )
+        for i, coll in enumerate(colls):
+            for other in colls[i + 1:]:
+                overlap[(coll, other)] += 1
+    return overlap
+
+
+def main():
+    """Print the time of the graph loops and of building the matrices and their summary."""
+    for n_collaborations, n_users in [(1000, 20000), (5000, 100000), (20000, 400000)]:
+        nodes = get_nodes_from_dict(make_sram_org(n_collaborations=n_collaborations, n_users=n_users))
+        start = time.perf_counter()
+        incidence = Incidence.from_nodes(nodes)
+        incidence.summary()
+        sparse_seconds = time.perf_counter() - start
+        graph = nodes_to_graph(nodes)
+        start = time.perf_counter()
+        graph_overlap(graph)
+        graph_seconds = time.perf_counter() - start
+        print(
+            f"{n_collaborations:6d} collaborations {incidence.memberships.nnz:8d} memberships: "
+            f"graph loops {graph_seconds:6.2f} s, sparse matrices and summary {sparse_seconds:6.2f} s"
+        )
+
+
+if __name__ == "__main__":
+    main()
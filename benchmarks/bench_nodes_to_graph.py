@@ -0,0 +1,66 @@
+"""Time and peak allocation of nodes_to_graph versus per element graph construction.
+
+The per element reference and nodes_to_graph are compared with the garbage
+collector paused in both, so the difference is that of the insertion alone. The
+reference with the collector running shows what pausing it gains. Run from the
+repository root:
+
+    python benchmarks/bench_nodes_to_graph.py
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.records import paused_gc
+
+# the per element reference is shared with the tests
+sys.path.append(str(Path(__file__).parent.parent / "tests"))
+from reference_graph import nodes_to_graph_per_element  # noqa: E402 pylint: disable=wrong-import-position
+
+
+def per_element(nodes):
+    """Build the graph element by element with the garbage collector paused."""
+    with paused_gc():
+        return nodes_to_graph_per_element(nodes)
+
+
+def _measure(func, nodes, repeat: int = 5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(nodes)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    graph = func(nodes)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del graph
+    return best, peak, peak - retained
+
+
+def main():
+    """Print timings and allocations of the construction paths."""
+    nodes = get_nodes_from_dict(make_sram_org(n_collaborations=2000, n_users=50000))
+    graph = nodes_to_graph(nodes)
+    print(f"Graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+    reference = nodes_to_graph_per_element(nodes)
+    assert list(graph.nodes(data=True)) == list(reference.nodes(data=True))
+    assert list(graph.edges(keys=True, data=True)) == list(reference.edges(keys=True, data=True))
+
+    paths = [
+        ("per element, gc running", nodes_to_graph_per_element),
+        ("per element, gc paused", per_element),
+        ("nodes_to_graph, gc paused", nodes_to_graph),
+    ]
+    for name, func in paths:
+        seconds, peak, transient = _measure(func, nodes)
+        print(f"{name:26s} {seconds:7.3f} s  {peak / 2**20:8.2f} MiB peak  {transient / 2**20:6.2f} MiB transient")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time, peak allocation and file size of the static svg and png export of a large graph.
+
+Run from the repository root:
+
+    python benchmarks/bench_static_export.py
+"""
+
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import networkx as nx
+
+from surfiamviz.static_writer import export_static
+
+
+def random_layout_graph(n_nodes: int, n_edges: int, seed: int = 3) -> nx.MultiDiGraph:
+    """Graph with random positions, three node colours and two edge colours."""
+    rng = random.Random(seed)
+    graph = nx.MultiDiGraph()
+    for node in range(n_nodes):
+        graph.add_node(
+            node, x=rng.uniform(0, 1000), y=rng.uniform(0, 1000), size=rng.uniform(5, 30),
+            color=("red", "gold", "lightblue")[node % 3],
+        )
+    for i in range(n_edges):
+        graph.add_edge(rng.randrange(n_nodes), rng.randrange(n_nodes), color=("darkblue", "gray")[i % 2])
+    return graph
+
+
+def main():
+    """Export a graph with 100000 edges as svg and png, with and without short edges."""
+    graph = random_layout_graph(20000, 100000)
+    print(f"Graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for image_format in ("svg", "png"):
+            for min_edge_length in (0.0, 200.0):
+                path = Path(tmpdir) / f"graph.{image_format}"
+                tracemalloc.start()
+                start = time.perf_counter()
+                export_static(graph, path, overwrite=True, min_edge_length=min_edge_length)
+                seconds = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                size = path.stat().st_size / 2**20
+                print(
+                    f"{image_format} min_edge_length={min_edge_length:4.0f} {seconds:6.2f} s  "
+                    f"{peak / 2**20:8.2f} MiB peak  {size:7.2f} MiB file"
+                )
+
+
+if __name__ == "__main__":
+    main()
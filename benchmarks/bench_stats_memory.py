@@ -0,0 +1,57 @@
+"""Peak allocation of the organisation statistics: stats_dict versus the streaming engine.
+
+Run from the repository root:
+
+    python benchmarks/bench_stats_memory.py
+"""
+
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, read_json, stats_dict
+from surfiamviz.stats import stats_from_json
+
+
+def nodes_stats(path):
+    """Statistics as before: load the json, build the nodes and run stats_dict."""
+    return json.loads(stats_dict(get_nodes_from_dict(read_json(path))))
+
+
+def exact_streaming_stats(path):
+    """Streaming statistics with exact user sets."""
+    return stats_from_json(path)
+
+
+def approximate_streaming_stats(path):
+    """Streaming statistics with HyperLogLog sketches past 1000 users."""
+    return stats_from_json(path, approximate=True, threshold=1000)
+
+
+def main():
+    """Print time, peak allocation and the user count of the three variants."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "org.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(make_sram_org(n_collaborations=1000, n_users=50000), f)
+        print(f"Export: {path.stat().st_size / 2**20:.1f} MiB")
+        for name, func in [
+            ("stats_dict", nodes_stats),
+            ("exact", exact_streaming_stats),
+            ("approximate", approximate_streaming_stats),
+        ]:
+            tracemalloc.start()
+            start = time.perf_counter()
+            stats = func(path)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:12s} {seconds:6.2f} s  {peak / 2**20:8.2f} MiB peak  {stats['users']} users")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Peak allocation of undirected degrees: graph.to_undirected() copies versus undirected_degree.
+
+Run from the repository root:
+
+    python benchmarks/bench_undirected_memory.py
+"""
+
+import tracemalloc
+
+from synthetic import make_sram_org
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.utils import undirected_degree
+
+
+def _peak(func, *args) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def copies(graph):
+    """Degree computation as done before: two full undirected copies."""
+    max_deg = max(deg for _, deg in graph.to_undirected().degree)
+    deg_centrality = dict(graph.to_undirected().degree)
+    return max_deg, deg_centrality
+
+
+def service(graph):
+    """Degree computation from in- and out-adjacency."""
+    deg_centrality = undirected_degree(graph)
+    return max(deg_centrality.values()), deg_centrality
+
+
+def main():
+    """Print peak allocations for both approaches."""
+    graph = nodes_to_graph(get_nodes_from_dict(make_sram_org(n_users=11000)))
+    print(f"Graph: {graph.number_of_nodes()} nodes, {graph.number_of_edges()} edges")
+    assert copies(graph) == service(graph)
+    peak_copies = _peak(copies, graph)
+    peak_service = _peak(service, graph)
+    print(f"to_undirected() copies: {peak_copies / 2**20:8.2f} MiB peak")
+    print(f"undirected_degree:      {peak_service / 2**20:8.2f} MiB peak")
+    print(f"Reduction:              {peak_copies / peak_service:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
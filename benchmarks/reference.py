@@ -0,0 +1,49 @@
+"""Reference implementations of functions that were optimised, used by the benchmarks."""
+
+from typing import Any
+
+
+def get_nodes_from_dict_lookups(sram_org_dict: dict) -> list:
+    """Extract the nodes list from the decoded json dictionaries, as before the records."""
+    nodes: list[Any] = []
+    org = {"node_name": sram_org_dict["name"]}
+    org["label"] = sram_org_dict["short_name"]
+    nodes.append(org)
+    units = sram_org_dict["units"]
+    nodes.append(units)
+
+    colls: list[dict[str, Any]] = []
+    users: dict[dict[str, Any]] = {}
+    for entry in sram_org_dict["collaborations"]:
+        if entry["created_by"] not in users:
+            users[entry["created_by"]] = {"admin_of": [], "create": []}
+        users[entry["created_by"]]["create"].append(entry["name"])
+
+        coll = {"node_name": entry["name"]}
+        coll["label"] = entry["name"]
+        coll["edges_from"] = entry["units"]
+        coll["services"] = []
+        for service in entry["services"]:
+            coll["services"].append(service["name"])
+        coll["groups"] = []
+        for group in entry["groups"]:
+            coll["groups"].append(group["name"])
+        coll["users"] = []
+        if "collaboration_memberships" in entry:
+            for u_entry in entry["collaboration_memberships"]:
+                coll["users"].append(u_entry["user"]["uid"])
+                if u_entry["user"]["uid"] not in users:
+                    users[u_entry["user"]["uid"]] = {"admin_of": [], "create": []}
+                if "label" not in users[u_entry["user"]["uid"]]:
+                    users[u_entry["user"]["uid"]]["label"] = u_entry["user"]["username"]
+                if "created_by" not in users[u_entry["user"]["uid"]]:
+                    users[u_entry["user"]["uid"]]["created_by"] = u_entry["created_by"]
+                if u_entry["role"] == "admin":
+                    users[u_entry["user"]["uid"]]["admin_of"].append(entry["name"])
+        else:
+            print(f"INFO: No user info, 'collaboration_memberships' not in {entry['name']}.")
+        colls.append(coll)
+
+    nodes.append(colls)
+    nodes.append(users)
+    return nodes
@@ -0,0 +1,56 @@
+"""Generate synthetic SRAM organisation exports for benchmarks."""
+
+import random
+
+
+def make_sram_org(
+    n_units: int = 20,
+    n_collaborations: int = 500,
+    n_users: int = 10000,
+    memberships_per_user: int = 4,
+    n_services: int = 30,
+    seed: int = 42,
+) -> dict:
+    """Return a dictionary shaped like the json export of an SRAM organisation.
+
+    Only the fields surfiamviz reads are filled with meaningful values, a few of the
+    unused fields (timestamps, policies) are kept to mimic the size of real exports.
+    """
+    rng = random.Random(seed)
+    units = [f"Unit {i}" for i in range(n_units)]
+    services = [f"Service {i}" for i in range(n_services)]
+    users = [{"uid": f"user{i}@sram.example.org", "username": f"user{i}", "created_at": 1726572022,
+              "email": f"user{i}@example.org"} for i in range(n_users)]
+    collaborations = [
+        {
+            "name": f"Collaboration {i}",
+            "created_by": users[rng.randrange(n_users)]["uid"],
+            "units": rng.sample(units, k=rng.randint(0, min(2, n_units))),
+            "services": [{"name": name, "accepted_user_policy": ""}
+                         for name in rng.sample(services, k=rng.randint(0, min(3, n_services)))],
+            "groups": [{"name": f"Group {j}", "created_at": 1731668223} for j in range(rng.randint(0, 3))],
+            "collaboration_memberships": [],
+            "accepted_user_policy": None,
+            "created_at": 1731667989,
+        }
+        for i in range(n_collaborations)
+    ]
+    for user in users:
+        for coll in rng.sample(collaborations, k=min(memberships_per_user, n_collaborations)):
+            coll["collaboration_memberships"].append(
+                {
+                    "created_by": users[rng.randrange(n_users)]["uid"],
+                    "role": "admin" if rng.random() < 0.05 else "member",
+                    "status": "active",
+                    "created_at": 1731667990,
+                    "user": user,
+                }
+            )
+    return {
+        "name": "Synthetic Organisation",
+        "short_name": "synthetic",
+        "units": units,
+        "collaborations": collaborations,
+        "accepted_user_policy": "",
+        "created_at": 1731666194,
+    }
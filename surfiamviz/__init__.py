@@ -1 +1,6 @@
 """SRAM visualisation modules."""
+
+try:
+    from surfiamviz._version import __version__
+except ImportError:  # _version.py is written by setuptools-scm when the package is installed
+    __version__ = "unknown"
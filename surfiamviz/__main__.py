@@ -9,29 +9,54 @@ import subprocess
 import sys
 from pathlib import Path
 
-import networkx as nx
 import requests
 
+from surfiamviz.centrality import CENTRALITY_METRICS
+from surfiamviz.cli_common import (
+    _add_image_arguments,
+    _ego_network_or_exit,
+    _exit_on_problems,
+    _is_image,
+    _parse_config,
+    _parse_output,
+    _render_output,
+)
+from surfiamviz.cli_history import query_history
+from surfiamviz.cli_simulate import simulate_scenarios
+from surfiamviz.cli_store import query_graph_store
+from surfiamviz.cli_watch import _add_watch_argument, _watch
+from surfiamviz.export import EXPORT_FORMATS, export_tables, resolve_format
 from surfiamviz.graph_from_config import (
-    add_graph_edges_from_config,
     import_example_graph,
     set_node_levels_from_config,
-    set_node_type,
 )
 from surfiamviz.graph_from_sram_json import (
+    compress_users,
     get_nodes_from_dict,
+    get_nodes_from_records,
     get_sram_org,
+    get_sram_org_partial,
     get_sram_url,
     nodes_to_graph,
     read_json,
+    read_organisation,
+    select_collaborations,
     stats_dict,
 )
+from surfiamviz.incidence import Incidence
+from surfiamviz.precompile import PLOT_TYPES, ExampleCache, build_example_graph
+from surfiamviz.render_server import serve
+from surfiamviz.stats import stats_from_dict, stats_from_json
 from surfiamviz.utils import (
     color_edges,
     color_nodes,
-    infer_coll_app_edges,
-    read_graph_config,
-    render_editable_network,
+)
+from surfiamviz.validate import (
+    SRAM_EDGE_TYPES,
+    SRAM_NODE_TYPES,
+    validate_config,
+    validate_example_graph,
+    validate_sram_dict,
 )
 
 try:  # Python < 3.10 (backport)
@@ -57,22 +82,59 @@ Available subcommands:
         Retrieve statistics from the export to json of an SRAM organisation.
     download
         Retrieve SRAM organisation json from SRAM.
+    store
+        Load an export into an SQLite graph store for organisations that do not fit in
+        memory, print statistics and render subgraphs or neighbourhoods from the store.
+    history
+        Keep a delta encoded history of daily exports of an organisation and query it:
+        ingest exports, show growth statistics, membership periods or the graph at a date.
+    export
+        Export the units, collaborations, users, memberships, roles, services and groups
+        of an SRAM organisation as tables (parquet, arrow or csv).
     list
         List all available graphs from the configuration file.
+    precompile
+        Render all graphs of an example file with all plot types once and cache them.
+        The graph subcommand and the webtool use the cached files.
+    server
+        Start a local render server. The webtool renders its graphs there when the
+        environment variable SURFIAMVIZ_RENDER_SERVER is set to the url of the server.
+    simulate
+        Apply hypothetical approvals, denials and memberships to an example graph and
+        print the changed collaboration-application edges and access of users.
+    validate
+        Check an SRAM organisation json, a configuration file and example graphs for
+        missing keys and broken references, reports all problems at once.
 
 Example usage:
 
     surfiamviz webtool
+    surfiamviz server --port 8765 --workers 4
 
     surfiamviz list -i example_graphs/sram_examples.toml
     surfiamviz graph -o test.html -c configs/sram_config.toml -i example_graphs/sram_examples.toml -g plain_graph -v
+    surfiamviz precompile -c configs/sram_config.toml -i example_graphs/sram_examples.toml
+    surfiamviz simulate -c configs/sram_config.toml -i example_graphs/sram_examples.toml -g app_graph_org_accepts \
+        -s "approve APP_ADMIN COLLABORATION_1" -s "deny ORG_ADMIN APPLICATION"
 
     surfiamviz organisation -i data/sram_test_org.json -o test.html -c configs/sram_config.toml
     surfiamviz organisation -o test.html -c configs/sram_config.toml --token <token> --server sram
+    surfiamviz organisation -o test.html -c configs/sram_config.toml --token <token> --server sram --units <unit>
+    surfiamviz organisation -i data/sram_test_org.json -o test.html -c configs/sram_config.toml --focus <uid> --hops 2
+    surfiamviz organisation -i data/sram_test_org.json -o overview.png -c configs/sram_config.toml --plot fast
+    surfiamviz organisation -i data/sram_test_org.json -o test.html -c configs/sram_config.toml --watch
 
     surfiamviz stats -i data/sram_test_org.json
     surfiamviz stats --token <token> --server sram
+    surfiamviz stats -i data/sram_test_org.json --approximate
+    surfiamviz stats -i data/sram_test_org.json --co-membership --top 20
     surfiamviz download --download <json_file> --server sram --token <token>
+    surfiamviz export -i data/sram_test_org.json -o tables --format csv
+    surfiamviz store --db org.sqlite ingest -i data/sram_test_org.json
+    surfiamviz store --db org.sqlite graph -o test.html -c configs/sram_config.toml --focus <uid> --hops 2
+    surfiamviz history ingest --store history -i exports/sram_org_2024-01-01.json exports/sram_org_2024-01-02.json
+    surfiamviz history access --store history --user <uid> --collaboration <name>
+    surfiamviz validate -i data/sram_test_org.json -c configs/sram_config.toml
 """
 
 
@@ -94,10 +156,24 @@ def main() -> None:
         get_stats_from_json()
     elif subcommand == "download":
         download_sram_org_json()
+    elif subcommand == "export":
+        export_sram_tables()
+    elif subcommand == "history":
+        query_history()
+    elif subcommand == "store":
+        query_graph_store()
     elif subcommand == "list":
         list_config_graphs()
+    elif subcommand == "precompile":
+        precompile_examples()
+    elif subcommand == "simulate":
+        simulate_scenarios()
+    elif subcommand == "validate":
+        validate_inputs()
     elif subcommand == "webtool":
         start_webtool()
+    elif subcommand == "server":
+        start_render_server()
     else:
         print(f"Invalid subcommand ({subcommand}). For help see surfiamviz --help")
         sys.exit(1)
@@ -110,6 +186,48 @@ def start_webtool():
     subprocess.run(["streamlit", "run", file_path.parent / "webtool.py"], check=False)
 
 
+def start_render_server():
+    """Start the render server."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz server",
+        description="Render graphs for several webtool sessions in a shared pool of processes.",
+    )
+    parser.add_argument("--host", help="Address to listen on.", type=str, default="127.0.0.1")
+    parser.add_argument("--port", help="Port to listen on.", type=int, default=8765)
+    parser.add_argument("--workers", help="Number of render processes.", type=int, default=2)
+    parser.add_argument(
+        "--cache-size", help="Number of rendered html files kept in memory.", type=int, default=32
+    )
+    parser.add_argument(
+        "--max-jobs",
+        help="Maximum number of different requests rendered or queued at once, more wait for a free job.",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--max-waiting",
+        help="Maximum number of requests waiting for a free job, more are rejected.",
+        type=int,
+        default=64,
+    )
+    parser.add_argument(
+        "--queue-timeout",
+        help="Seconds a request waits for a free job before it is rejected.",
+        type=float,
+        default=30.0,
+    )
+    args = parser.parse_args()
+    serve(
+        args.host,
+        args.port,
+        workers=args.workers,
+        cache_size=args.cache_size,
+        max_jobs=args.max_jobs,
+        max_waiting=args.max_waiting,
+        queue_timeout=args.queue_timeout,
+    )
+
+
 def render_sram_graph():
     """Render graph from the json export of an sram organisation."""
     parser = argparse.ArgumentParser(
@@ -119,7 +237,7 @@ def render_sram_graph():
     parser.add_argument(
         "-o",
         "--output",
-        help="Path and name to store the generated html file.",
+        help="Path and name to store the generated html file, or an svg or png image.",
         type=Path,
         required=True,
     )
@@ -131,6 +249,12 @@ def render_sram_graph():
         required=True,
     )
     parser.add_argument("-v", "--verbose", help="Verbose output.", action="store_true", default=False)
+    parser.add_argument(
+        "--skip-validation",
+        help="Do not check the organisation json and the configuration before rendering.",
+        action="store_true",
+        default=False,
+    )
 
     json_data = parser.add_argument_group(title="Render graph from a json export for the organisation.")
     json_data.add_argument(
@@ -152,13 +276,65 @@ def render_sram_graph():
         type=str,
     )
 
-    plotting = parser.add_argument_group("Type of plotting: bipartite (default), greedy, louvain")
+    selection = parser.add_argument_group(
+        title="Render only a part of the organisation. With --token only the selected "
+        "collaborations and their memberships are loaded from SRAM."
+    )
+    selection.add_argument("--units", help="Names of the units to render.", nargs="+", type=str)
+    selection.add_argument(
+        "--collaborations", help="Names of the collaborations to render.", nargs="+", type=str
+    )
+    selection.add_argument(
+        "--focus",
+        help="Render only the neighbourhood of this node: a user (uid or username), "
+        "collaboration, service, unit or group.",
+        type=str,
+    )
+    selection.add_argument(
+        "--hops",
+        help="With --focus, the maximum number of edges between the focus and the rendered nodes "
+        "(default 2).",
+        type=int,
+        default=2,
+    )
+
+    plotting = parser.add_argument_group("Type of plotting: bipartite (default), greedy, louvain, fast")
     plotting.add_argument(
         "--plot",
-        help="Plot a graph sorted by node types (bipartite) or by communities (greedy, louvain).",
+        help="Plot a graph sorted by node types (bipartite) or by communities (greedy, louvain, fast). "
+        "fast uses a sparse louvain implementation and requires scipy.",
         type=str,
+        choices=["bipartite", "greedy", "louvain", "fast"],
         default="bipartite",
     )
+    plotting.add_argument(
+        "--workers",
+        help="Number of processes for the layout of the communities (greedy, louvain, fast).",
+        type=int,
+        default=1,
+    )
+    plotting.add_argument(
+        "--size",
+        help="Metric for the node sizes: degree (default), reachable_users (number of users with "
+        "access to the node) or betweenness (approximated from sampled nodes).",
+        type=str,
+        choices=CENTRALITY_METRICS,
+        default="degree",
+    )
+    plotting.add_argument(
+        "--merge-edges",
+        help="Merge parallel edges between two nodes into one edge with a combined label.",
+        action="store_true",
+        default=False,
+    )
+    plotting.add_argument(
+        "--compress",
+        help="Draw users with the same collaborations and roles as one node with the number of users.",
+        action="store_true",
+        default=False,
+    )
+    _add_image_arguments(parser)
+    _add_watch_argument(parser)
 
     args = parser.parse_args()
 
@@ -168,19 +344,64 @@ def render_sram_graph():
         pprint.pprint(graph_config)
 
     # read in sram organisation json or get information from sram server
-    sram_dict = _parse_input_or_token(args)
-    if sram_dict is None:
-        sys.exit(1)
+    config_problems = []
+    if not args.skip_validation:
+        config_problems = validate_config(graph_config, SRAM_NODE_TYPES, SRAM_EDGE_TYPES)
+    nodes = _parse_nodes(args, config_problems)
     # some checks on the output file
     _parse_output(args)
 
     # create the graph and render it
-    nodes = get_nodes_from_dict(sram_dict)
+    if args.watch:
+        _watch(
+            args,
+            load=lambda: _load_organisation(args),
+            build=lambda nodes, graph_config: _organisation_graph(nodes, graph_config, args),
+            source=nodes,
+        )
+        return
+    graph = _organisation_graph(nodes, graph_config, args)
+    _render_output(
+        graph,
+        args,
+        plot_type=args.plot,
+        workers=args.workers,
+        size_metric=args.size,
+        merge_edges=args.merge_edges,
+    )
+
+
+def _organisation_graph(nodes: list, graph_config: dict, args: argparse.Namespace):
+    """Build the graph of the organisation with levels and colours, see render_sram_graph."""
     graph = nodes_to_graph(nodes)
+    if args.focus:
+        graph = _ego_network_or_exit(graph, args.focus, args.hops)
+    if args.compress:
+        n_nodes, n_edges = graph.number_of_nodes(), graph.number_of_edges()
+        graph = compress_users(graph)
+        print(
+            f"Compressed {n_nodes} nodes and {n_edges} edges "
+            f"to {graph.number_of_nodes()} nodes and {graph.number_of_edges()} edges."
+        )
     set_node_levels_from_config(graph, graph_config)
     color_nodes(graph, graph_config)
     color_edges(graph, graph_config)
-    render_editable_network(graph, args.output.absolute(), plot_type=args.plot)
+    return graph
+
+
+def _load_organisation(args: argparse.Namespace) -> list:
+    """Read the input file again in watch mode, raises ValueError if it is not valid."""
+    problems = None if args.skip_validation else []
+    org = read_organisation(
+        args.input,
+        stream=True,
+        units=getattr(args, "units", None),
+        collaborations=getattr(args, "collaborations", None),
+        problems=problems,
+    )
+    if problems:
+        raise ValueError("\n".join(problems))
+    return get_nodes_from_records(org)
 
 
 def list_config_graphs():
@@ -212,7 +433,7 @@ def render_graph_from_config():
     parser.add_argument(
         "-o",
         "--output",
-        help="Path and name to store the generated html file.",
+        help="Path and name to store the generated html file, or an svg or png image.",
         type=Path,
         required=True,
     )
@@ -237,7 +458,41 @@ def render_graph_from_config():
         type=str,
         required=True,
     )
+    parser.add_argument(
+        "--workers",
+        help="Number of processes for the layout of the communities.",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--size",
+        help="Metric for the node sizes: degree (default), reachable_users or betweenness.",
+        type=str,
+        choices=CENTRALITY_METRICS,
+        default="degree",
+    )
+    parser.add_argument(
+        "--merge-edges",
+        help="Merge parallel edges between two nodes into one edge with a combined label.",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--plot",
+        help="Plot a graph sorted by node types (bipartite) or by communities (greedy, louvain, fast).",
+        type=str,
+        choices=PLOT_TYPES,
+        default="greedy",
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="Do not use or fill the cache of precompiled examples.",
+        action="store_true",
+        default=False,
+    )
     parser.add_argument("-v", "--verbose", help="Verbose output.", action="store_true", default=False)
+    _add_image_arguments(parser)
+    _add_watch_argument(parser)
 
     args = parser.parse_args()
 
@@ -258,15 +513,35 @@ def render_graph_from_config():
 
     _parse_output(args)
 
-    graph = nx.MultiDiGraph()
-    add_graph_edges_from_config(graph, example_graphs, args.graph)
-    set_node_type(graph, graph_config)
-    set_node_levels_from_config(graph, graph_config)
-    color_nodes(graph, graph_config)
+    if args.watch:
+        _watch(
+            args,
+            load=lambda: import_example_graph(args.input)[args.graph],
+            build=lambda section, graph_config: build_example_graph(
+                {args.graph: section}, args.graph, graph_config, args.verbose
+            ),
+            source=example_graphs[args.graph],
+        )
+        return
+
+    # the precompiled examples are html files rendered with the default node sizes and edges
+    if not args.no_cache and args.size == "degree" and not args.merge_edges and not _is_image(args.output):
+        cache = ExampleCache(args.input, args.config)
+        if args.verbose:
+            print(f"Using precompiled examples in {cache.directory}.")
+        args.output.write_text(cache.html(args.graph, args.plot), encoding="utf-8")
+        return
+
     print("--> Infer collaboration-aplication relationships.")
-    infer_coll_app_edges(graph, args.verbose)
-    color_edges(graph, graph_config)
-    render_editable_network(graph, args.output.absolute())
+    graph = build_example_graph(example_graphs, args.graph, graph_config, args.verbose)
+    _render_output(
+        graph,
+        args,
+        plot_type=args.plot,
+        workers=args.workers,
+        size_metric=args.size,
+        merge_edges=args.merge_edges,
+    )
 
 
 def get_stats_from_json():
@@ -282,6 +557,43 @@ def get_stats_from_json():
         type=Path,
     )
 
+    parser.add_argument(
+        "--skip-validation",
+        help="Do not check the organisation json before computing the statistics.",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--approximate",
+        help="Read the json file one collaboration at a time and estimate user counts above "
+        "--threshold with HyperLogLog sketches. The relative standard error is reported as users_error. "
+        "The json file is not validated.",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--threshold",
+        help="With --approximate, number of users counted exactly per unit before estimating.",
+        type=int,
+        default=10000,
+    )
+    co_membership = parser.add_argument_group(
+        title="Co-membership analytics on sparse incidence matrices (requires scipy)."
+    )
+    co_membership.add_argument(
+        "--co-membership",
+        help="Print the collaborations that share most members, users in unusually many collaborations "
+        "and the number of users per service instead of the statistics.",
+        action="store_true",
+        default=False,
+    )
+    co_membership.add_argument(
+        "--top", help="Number of similar collaboration pairs, default 10.", type=int, default=10
+    )
+    co_membership.add_argument(
+        "--similar-to", help="Only list the collaborations most similar to this collaboration.", type=str
+    )
+
     sram_connection = parser.add_argument_group(
         title="Connect to SRAM server with server name and token and get statistcs."
     )
@@ -296,13 +608,234 @@ def get_stats_from_json():
 
     args = parser.parse_args()
 
-    sram_dict = _parse_input_or_token(args)
-    if sram_dict is None:
+    if args.co_membership and args.approximate:
+        print("--co-membership needs all memberships and cannot be combined with --approximate.")
         sys.exit(1)
-    nodes = get_nodes_from_dict(sram_dict)
+    if args.approximate and args.input and not args.token:
+        if not args.input.is_file():
+            print(f"Input {args.input} is not a file or does not exist. Exit.")
+            sys.exit(1)
+        try:
+            stats = stats_from_json(args.input, approximate=True, threshold=args.threshold)
+        except (ValueError, KeyError) as error:
+            print(f"Cannot read in {args.input}: {repr(error)}.")
+            sys.exit(1)
+        print(json.dumps(stats, indent=4))
+        return
+
+    if args.approximate:
+        sram_dict = _parse_input_or_token(args)
+        if sram_dict is None:
+            sys.exit(1)
+        if not args.skip_validation:
+            _exit_on_problems(validate_sram_dict(sram_dict))
+        print(json.dumps(stats_from_dict(sram_dict, approximate=True, threshold=args.threshold), indent=4))
+        return
+    nodes = _parse_nodes(args)
+    if args.co_membership:
+        _print_co_membership(nodes, args)
+        return
     print(stats_dict(nodes))
 
 
+def _print_co_membership(nodes: list, args: argparse.Namespace):
+    try:
+        incidence = Incidence.from_nodes(nodes)
+        if args.similar_to:
+            pairs = incidence.similar_collaborations(args.top, args.similar_to)
+            result = {
+                "similar_collaborations": [
+                    {"collaboration": other, "shared_users": shared, "jaccard": round(jaccard, 4)}
+                    for _, other, shared, jaccard in pairs
+                ]
+            }
+        else:
+            result = incidence.summary(k=args.top)
+    except (ImportError, KeyError) as error:
+        print(error.args[0])
+        sys.exit(1)
+    print(json.dumps(result, indent=4))
+
+
+def export_sram_tables():
+    """Export the organisation as columnar tables."""
+    parser = argparse.ArgumentParser(prog="surfiamviz export",
+                                     description="Export an SRAM organisation as tables for analytics.")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Directory to store the table files, will be created if it does not exist.",
+        type=Path,
+        required=True,
+    )
+    parser.add_argument(
+        "--format",
+        help="File format of the tables. auto writes parquet if pyarrow is installed, csv otherwise.",
+        choices=EXPORT_FORMATS,
+        default="auto",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        help="Number of rows written at once.",
+        type=int,
+        default=50000,
+    )
+    parser.add_argument(
+        "--skip-validation",
+        help="Do not check the organisation json before exporting the tables.",
+        action="store_true",
+        default=False,
+    )
+
+    json_data = parser.add_argument_group(title="Export tables from a json export of the organisation.")
+    json_data.add_argument(
+        "-i",
+        "--input",
+        help="The path to the json file from an export of an SRAM organisation.",
+        type=Path,
+    )
+
+    sram_connection = parser.add_argument_group(
+        title="Connect to SRAM server with server name and token and export tables."
+    )
+    sram_connection.add_argument(
+        "--server", help="The name of the SRAM ionstance: test, acc or prod", type=str
+    )
+    sram_connection.add_argument(
+        "--token",
+        help="API token to the SRAM server.",
+        type=str,
+    )
+
+    args = parser.parse_args()
+
+    if args.output.is_file():
+        print(f"Output {args.output} is a file, expected a directory.")
+        sys.exit(234)
+    try:
+        export_format = resolve_format(args.format)
+    except ImportError as error:
+        print(error)
+        sys.exit(1)
+
+    nodes = _parse_nodes(args)
+    args.output.mkdir(parents=True, exist_ok=True)
+    written = export_tables(nodes, args.output, export_format=export_format, chunk_size=args.chunk_size)
+    for table, path in written.items():
+        print(f"{table}: {path}")
+
+
+def validate_inputs():
+    """Check organisation json, configuration and example graphs and report all problems."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz validate",
+        description="Check SRAM json, configuration and example files before rendering.",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Configuration file defining node and edge types.",
+        type=Path,
+    )
+    parser.add_argument(
+        "-e",
+        "--examples",
+        help="A file formatted in toml which contains graph(s), checked against --config.",
+        type=Path,
+    )
+
+    json_data = parser.add_argument_group(title="Check a json export of an organisation.")
+    json_data.add_argument(
+        "-i",
+        "--input",
+        help="The path to the json file from an export of an SRAM organisation.",
+        type=Path,
+    )
+
+    sram_connection = parser.add_argument_group(
+        title="Connect to SRAM server with server name and token and check the organisation."
+    )
+    sram_connection.add_argument(
+        "--server", help="The name of the SRAM ionstance: test, acc or prod", type=str
+    )
+    sram_connection.add_argument(
+        "--token",
+        help="API token to the SRAM server.",
+        type=str,
+    )
+
+    args = parser.parse_args()
+
+    if not (args.input or args.token or args.config):
+        print("Nothing to validate, set --input, --token or --config.")
+        sys.exit(1)
+    if args.examples and not args.config:
+        print("Example graphs are checked against a configuration, set --config.")
+        sys.exit(1)
+
+    problems = []
+    if args.input or args.token:
+        sram_dict = _parse_input_or_token(args)
+        if sram_dict is None:
+            sys.exit(1)
+        problems.extend(validate_sram_dict(sram_dict))
+    if args.config:
+        graph_config = _parse_config(args)
+        if args.input or args.token:
+            problems.extend(validate_config(graph_config, SRAM_NODE_TYPES, SRAM_EDGE_TYPES))
+        else:
+            problems.extend(validate_config(graph_config))
+        if args.examples:
+            example_graphs = import_example_graph(args.examples)
+            for section in example_graphs:
+                problems.extend(validate_example_graph(example_graphs, section, graph_config))
+    _exit_on_problems(problems)
+    print("No problems found.")
+
+
+def precompile_examples():
+    """Render and cache all example graphs."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz precompile",
+        description="Render all graphs of an example file once, for the graph subcommand and the webtool.",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Configuration file defining node, edge types and the graph(s).",
+        type=Path,
+        required=True,
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="A file formatted in toml which contains the graph(s).",
+        type=Path,
+        required=True,
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="Directory of the cache, default $SURFIAMVIZ_CACHE_DIR or ~/.cache/surfiamviz/examples.",
+        type=Path,
+    )
+    parser.add_argument(
+        "--plot",
+        help="Plot types to render, default all.",
+        nargs="+",
+        choices=PLOT_TYPES,
+        default=PLOT_TYPES,
+    )
+    args = parser.parse_args()
+
+    _parse_config(args)
+    if not args.input.is_file():
+        print(f"Input {args.input} is not a file or does not exist. Exit.")
+        sys.exit(234)
+    cache = ExampleCache(args.input, args.config, args.cache_dir)
+    rendered = cache.precompile(plot_types=args.plot)
+    print(f"Rendered {rendered} html file(s), cache in {cache.directory}.")
+
+
 def download_sram_org_json():
     """Save the sram organisation json."""
     parser = argparse.ArgumentParser(prog="surfiamviz download",
@@ -344,32 +877,38 @@ def download_sram_org_json():
         json.dump(org, fp)
 
 
-def _parse_config(args: argparse.Namespace) -> dict:
-    if args.config.is_file():
-        try:
-            graph_config = read_graph_config(args.config.absolute())
-            return graph_config
-        except Exception as error:
-            print(f"Cannot read in {args.config}: {repr(error)}.")
-            sys.exit(234)
-    else:
-        print(f"Config {args.config.absolute()} is directory or does not exist. Exit.")
-        sys.exit(234)
+def _parse_nodes(args: argparse.Namespace, other_problems: list = ()) -> list:
+    """Return the nodes of the organisation, exits if it cannot be read or is not valid.
 
+    Input files are decoded collaboration by collaboration into records, without
+    holding the decoded json of the whole export. other_problems, e.g. of the
+    configuration, are reported together with the problems of the export.
+    """
+    if args.input and not args.token:
+        if not args.input.is_file():
+            print(f"Input {args.input} is not a file or does not exist. Exit.")
+            sys.exit(1)
+        problems = None if args.skip_validation else []
+        try:
+            org = read_organisation(
+                args.input,
+                stream=True,
+                units=getattr(args, "units", None),
+                collaborations=getattr(args, "collaborations", None),
+                problems=problems,
+            )
+        except (ValueError, KeyError, TypeError) as error:
+            print(f"Cannot read in {args.input}: {repr(error)}.")
+            sys.exit(1)
+        _exit_on_problems((problems or []) + list(other_problems))
+        return get_nodes_from_records(org)
 
-def _parse_output(args: argparse.Namespace):
-    """Check the file name and path for the output html file."""
-    if args.output.is_dir():
-        print(f"Output {args.output} is a directory, cannot export graph.")
-        sys.exit(234)
-    elif args.output.is_file():
-        confirm = input(f"Overwrite {args.output.absolute()} [Yes(ENTER)/No(Any key)]?")
-        if confirm != "":
-            sys.exit(234)
-        else:
-            args.output.unlink()
-    else:
-        print(f"Saving graph as {args.output.absolute()}.")
+    sram_dict = _parse_input_or_token(args)
+    if sram_dict is None:
+        sys.exit(1)
+    if not args.skip_validation:
+        _exit_on_problems(validate_sram_dict(sram_dict) + list(other_problems))
+    return get_nodes_from_dict(sram_dict)
 
 
 def _parse_input_or_token(args: argparse.Namespace) -> dict:
@@ -383,11 +922,13 @@ def _parse_input_or_token(args: argparse.Namespace) -> dict:
         print("You need to set either --input or --server and --token.")
         return None
 
+    units = getattr(args, "units", None)
+    collaborations = getattr(args, "collaborations", None)
     if args.input:
         if args.input.is_file():
             try:
                 sram_dict = read_json(args.input)
-                return sram_dict
+                return select_collaborations(sram_dict, units, collaborations)
             except Exception as error:
                 print(f"Cannot read in {args.input}: {repr(error)}.")
                 return None
@@ -402,6 +943,10 @@ def _parse_input_or_token(args: argparse.Namespace) -> dict:
         server = get_sram_url(args.server)
         if server:
             try:
+                if units or collaborations:
+                    return get_sram_org_partial(
+                        args.token, server, units=units, collaborations=collaborations
+                    )
                 sram_dict = get_sram_org(token=args.token, server=server)
                 return sram_dict
             except requests.HTTPError as err:
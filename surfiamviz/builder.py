@@ -0,0 +1,330 @@
+"""Incremental graph builder for the Create tab of the webtool.
+
+A GraphBuilder holds a graph of a custom scenario that is edited one node or edge
+at a time. Every edit only updates the affected part of the graph:
+
+- node type, level and colour are set for new nodes and edges only;
+- the inferred edges between collaborations and applications (see
+  utils.infer_coll_app_edges) are recomputed only for the collaboration and
+  application pairs whose verdict can depend on the edited node or edge;
+- new nodes are placed next to their neighbours or in the column of their level,
+  existing positions are never changed.
+
+The result is the same graph infer_coll_app_edges gives for the user defined edges,
+see GraphBuilder.user_graph.
+"""
+
+import io
+import itertools
+import json
+import re
+from pathlib import Path
+from typing import Union
+
+import networkx as nx
+
+from surfiamviz.centrality import set_node_sizes, undirected_degree
+from surfiamviz.graph_from_config import add_graph_edges_from_config, config_node_type
+from surfiamviz.html_writer import write_html_stream
+from surfiamviz.utils import VIS_OPTIONS, coll_app_verdict, node_color, ownership_paths, undirected_neighbors
+
+# node types that take part in the inference of collaboration-application edges
+INFERENCE_NODE_TYPES = ("COLLABORATION", "APPLICATION", "ORG_ADMIN", "APP_ADMIN", "ORGANISATION", "UNIT")
+
+
+class GraphBuilder:
+    """Graph of a custom scenario with incremental inference and layout."""
+
+    def __init__(self, graph_config: dict, spacing: float = 150.0):
+        """Create an empty graph, node types and colours are taken from graph_config."""
+        self.graph_config = graph_config
+        self.spacing = spacing
+        self.graph = nx.MultiDiGraph()
+        self.positions: dict = {}
+        # nodes per node type in insertion order, the values are unused
+        self._by_type: dict = {}
+        # (coll, app) -> keys of the inferred edges from coll to app
+        self._inferred: dict = {}
+        # next free row per level for nodes without placed neighbours
+        self._next_row: dict = {}
+        # number of nodes placed per anchor, the mean position of their neighbours
+        self._siblings: dict = {}
+        # if a list, _infer appends (coll, app, old verdicts, new verdicts) for changed pairs
+        self.verdict_log: list = None
+
+    @classmethod
+    def from_example(cls, example_graphs: dict, section: str, graph_config: dict, spacing: float = 150.0):
+        """Start from a graph section of an example file."""
+        edges = nx.MultiDiGraph()
+        add_graph_edges_from_config(edges, example_graphs, section)
+        builder = cls(graph_config, spacing)
+        for node in edges:
+            builder._add_node(node)
+        for u, v, attrs in edges.edges(data=True):
+            builder._add_edge(u, v, attrs["edge_type"], attrs.get("label"))
+        builder._infer(builder._all_pairs())
+        return builder
+
+    def nodes_of_type(self, node_type: str) -> list:
+        """Return the nodes of node_type in the order they were added."""
+        return list(self._by_type.get(node_type, ()))
+
+    def is_inferred(self, u, v, key) -> bool:
+        """Whether the edge was inferred and not added by the user."""
+        return key in self._inferred.get((u, v), ())
+
+    def user_edges(self) -> list:
+        """Return the edges added by the user as (u, v, attributes)."""
+        return [
+            (u, v, attrs)
+            for u, v, key, attrs in self.graph.edges(keys=True, data=True)
+            if not self.is_inferred(u, v, key)
+        ]
+
+    def user_graph(self) -> nx.MultiDiGraph:
+        """Return a copy of the graph without the inferred edges."""
+        graph = self.graph.copy()
+        for (coll, app), keys in self._inferred.items():
+            graph.remove_edges_from((coll, app, key) for key in keys)
+        return graph
+
+    def add_node(self, node: str, node_type: str = None):
+        """Add a node, the node type is derived from the name if not given.
+
+        Raises ValueError if the node exists or its type is not configured.
+        """
+        if node in self.graph:
+            raise ValueError(f"Node {node} exists.")
+        self._add_node(node, node_type)
+        self._infer(self._node_pairs(node))
+
+    def add_edge(self, u: str, v: str, edge_type: str, label: str = None) -> int:
+        """Add an edge, missing nodes are added and placed next to the other node. Returns the key."""
+        if edge_type not in self.graph_config["edge_colors"]:
+            raise ValueError(f"Edge type {edge_type} not configured.")
+        for node in (u, v):
+            if node not in self.graph:
+                # type errors before the graph is changed
+                self._node_type(node, None)
+        new_nodes = [node for node in dict.fromkeys((u, v)) if node not in self.graph]
+        for node in new_nodes:
+            self._add_node(node, place=False)
+        key = self._add_edge(u, v, edge_type, label)
+        pairs = self._edge_pairs(u, v)
+        for node in new_nodes:
+            self._place(node)
+            pairs.extend(self._node_pairs(node))
+        self._infer(pairs)
+        return key
+
+    def remove_edge(self, u: str, v: str):
+        """Remove the edges from u to v added by the user, raises KeyError if there are none."""
+        keys = [key for key in self.graph.succ.get(u, {}).get(v, {}) if not self.is_inferred(u, v, key)]
+        if not keys:
+            raise KeyError(f"No edge from {u} to {v}.")
+        pairs = self._edge_pairs(u, v)
+        self.graph.remove_edges_from((u, v, key) for key in keys)
+        self._infer(pairs)
+
+    def set_edges(self, u: str, v: str, edges: list):
+        """Replace the edges from u to v added by the user with edges, a list of (edge_type, label).
+
+        Missing nodes are added like in add_edge, the inference runs once for all edges.
+        """
+        for edge_type, _ in edges:
+            if edge_type not in self.graph_config["edge_colors"]:
+                raise ValueError(f"Edge type {edge_type} not configured.")
+        for node in (u, v):
+            if node not in self.graph:
+                self._node_type(node, None)
+        new_nodes = [node for node in dict.fromkeys((u, v)) if node not in self.graph]
+        for node in new_nodes:
+            self._add_node(node, place=False)
+        # pairs of the old and the new edges, a removed edge can change the neighbourhood
+        pairs = self._edge_pairs(u, v)
+        keys = [key for key in self.graph.succ[u].get(v, {}) if not self.is_inferred(u, v, key)]
+        self.graph.remove_edges_from((u, v, key) for key in keys)
+        for edge_type, label in edges:
+            self._add_edge(u, v, edge_type, label)
+        pairs.extend(self._edge_pairs(u, v))
+        for node in new_nodes:
+            self._place(node)
+            pairs.extend(self._node_pairs(node))
+        self._infer(pairs)
+
+    def edges_between(self, u: str, v: str) -> list:
+        """Return the edges from u to v added by the user as (edge_type, label)."""
+        return [
+            (attrs["edge_type"], attrs.get("label"))
+            for key, attrs in self.graph.succ.get(u, {}).get(v, {}).items()
+            if not self.is_inferred(u, v, key)
+        ]
+
+    def remove_node(self, node: str):
+        """Remove a node and its edges, raises KeyError if it does not exist."""
+        if node not in self.graph:
+            raise KeyError(f"No node {node}.")
+        pairs = set(self._node_pairs(node))
+        for nbr in undirected_neighbors(self.graph, node):
+            pairs.update(self._edge_pairs(node, nbr))
+        self.graph.remove_node(node)
+        del self.positions[node]
+        for by_type in self._by_type.values():
+            by_type.pop(node, None)
+        for pair in [pair for pair in self._inferred if node in pair]:
+            del self._inferred[pair]
+        self._infer(pair for pair in pairs if node not in pair)
+
+    def html(self) -> str:
+        """Return the gravis html of the graph at the current positions."""
+        for node, (x, y) in self.positions.items():
+            self.graph.nodes[node]["x"] = x
+            self.graph.nodes[node]["y"] = y
+        set_node_sizes(self.graph, "degree", values=undirected_degree(self.graph))
+        out = io.StringIO()
+        write_html_stream(self.graph, out, **VIS_OPTIONS)
+        return out.getvalue()
+
+    def render(self, html_path: Union[str, Path]):
+        """Write the gravis html of the graph to html_path."""
+        Path(html_path).write_text(self.html(), encoding="utf-8")
+
+    def to_example_section(self, section: str, explanation: str = "") -> str:
+        """Return the user defined edges as toml section for the example file.
+
+        Nodes without edges cannot be expressed in the example file and are left out.
+        """
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", section):
+            section = json.dumps(section)
+        lines = [f"[{section}]", ""]
+        edge_types: dict = {}
+        for u, v, attrs in self.user_edges():
+            edge = [u, v] + ([attrs["label"]] if attrs.get("label") else [])
+            edge_types.setdefault(attrs["edge_type"], []).append(edge)
+        for edge_type, edges in edge_types.items():
+            name = edge_type.lower()
+            # json strings are valid toml basic strings
+            edge_list = ",\n    ".join(json.dumps(edge, ensure_ascii=False) for edge in edges)
+            lines.append(f"{name}.edges = [\n    {edge_list}\n]")
+            lines.append(f'{name}.type = "{edge_type}"')
+            lines.append("")
+        lines.append(f"explanation = {json.dumps(explanation, ensure_ascii=False)}")
+        return "\n".join(lines) + "\n"
+
+    def _node_type(self, node: str, node_type: str = None) -> str:
+        if node_type is None:
+            node_type = config_node_type(node, self.graph_config)
+        if node_type not in self.graph_config["node_types"]:
+            raise ValueError(f"Cannot retrieve the type of {node} from the config.")
+        return node_type
+
+    def _add_node(self, node: str, node_type: str = None, place: bool = True):
+        node_type = self._node_type(node, node_type)
+        level = self.graph_config["node_types"][node_type]["level"]
+        attrs = {"label": node, "node_type": node_type, "level": level, "subset": level}
+        attrs["color"] = node_color(attrs, self.graph_config)
+        self.graph.add_node(node, **attrs)
+        self._by_type.setdefault(node_type, {})[node] = None
+        if place:
+            self._place(node)
+
+    def _add_edge(self, u: str, v: str, edge_type: str, label: str = None) -> int:
+        attrs = {"edge_type": edge_type, "color": self.graph_config["edge_colors"][edge_type]}
+        if label:
+            attrs["label"] = label
+        return self.graph.add_edge(u, v, **attrs)
+
+    def _place(self, node: str):
+        """Place a new node below the mean of its placed neighbours or in the column of its level.
+
+        Nodes with the same neighbours, e.g. the members added to one collaboration, are
+        spread left and right of the first one, so they are not drawn on top of each other.
+        """
+        nbrs = [self.positions[n] for n in undirected_neighbors(self.graph, node) if n in self.positions]
+        if nbrs:
+            x = sum(p[0] for p in nbrs) / len(nbrs)
+            y = sum(p[1] for p in nbrs) / len(nbrs) + self.spacing / 2
+            sibling = self._siblings.get((x, y), 0)
+            self._siblings[(x, y)] = sibling + 1
+            # 0, +1, -1, +2, -2, ... times a third of the spacing
+            x += (sibling + 1) // 2 * (1 if sibling % 2 else -1) * self.spacing / 3
+        else:
+            level = self.graph.nodes[node]["level"]
+            row = self._next_row.get(level, 0)
+            self._next_row[level] = row + 1
+            x, y = level * self.spacing, row * self.spacing
+        self.positions[node] = (x, y)
+
+    def _type(self, node) -> str:
+        return self.graph.nodes[node]["node_type"]
+
+    def _node_pairs(self, node) -> list:
+        """Collaboration-application pairs whose verdict can depend on the existence of node."""
+        if self._type(node) == "COLLABORATION":
+            return [(node, app) for app in self.nodes_of_type("APPLICATION")]
+        if self._type(node) == "APPLICATION":
+            return [(coll, node) for coll in self.nodes_of_type("COLLABORATION")]
+        if self._type(node) in ("ORG_ADMIN", "APP_ADMIN"):
+            # a rejection by the organisation is inferred once per pair of admins
+            return self._all_pairs()
+        return []
+
+    def _all_pairs(self) -> list:
+        return list(itertools.product(self.nodes_of_type("COLLABORATION"), self.nodes_of_type("APPLICATION")))
+
+    def _edge_pairs(self, u, v) -> list:
+        """Collaboration-application pairs whose verdict can depend on an edge between u and v."""
+        types = {self._type(u): u, self._type(v): v}
+        if not set(types) <= set(INFERENCE_NODE_TYPES):
+            # members, groups and roles are not part of the inference
+            return []
+        if "COLLABORATION" in types:
+            colls = [types["COLLABORATION"]]
+        elif "ORGANISATION" in types or "UNIT" in types:
+            # ownership paths have at most three edges, the collaboration is at most two edges away
+            near = {nbr for node in (u, v) for nbr in undirected_neighbors(self.graph, node)}
+            near.update(nbr for node in list(near) for nbr in undirected_neighbors(self.graph, node))
+            colls = [n for n in near if self._type(n) == "COLLABORATION"]
+        else:
+            colls = self.nodes_of_type("COLLABORATION")
+        if "APPLICATION" in types:
+            apps = [types["APPLICATION"]]
+        elif "APP_ADMIN" in types:
+            app_adm = types["APP_ADMIN"]
+            apps = [n for n in undirected_neighbors(self.graph, app_adm) if self._type(n) == "APPLICATION"]
+        else:
+            apps = self.nodes_of_type("APPLICATION")
+        return list(itertools.product(colls, apps))
+
+    def _infer(self, pairs):
+        """Recompute the inferred edges of the collaboration-application pairs."""
+        org_adms = self.nodes_of_type("ORG_ADMIN")
+        app_adms = self.nodes_of_type("APP_ADMIN")
+        for coll, app in dict.fromkeys(pairs):
+            old_keys = self._inferred.pop((coll, app), ())
+            if self.verdict_log is not None:
+                old = self._verdicts(coll, app, old_keys)
+            self.graph.remove_edges_from((coll, app, key) for key in old_keys)
+            keys = []
+            for org_adm in org_adms:
+                if not self.graph.has_edge(org_adm, app):
+                    # the organisation did not decide on the application yet
+                    continue
+                owned = None
+                for app_adm in app_adms:
+                    if owned is None and self.graph.get_edge_data(org_adm, app)[0].get("label") != "denies":
+                        owned = len(ownership_paths(self.graph, coll, org_adm)) > 0
+                    attrs, _ = coll_app_verdict(self.graph, coll, org_adm, app, app_adm, owned=bool(owned))
+                    if attrs is not None:
+                        keys.append(self._add_edge(coll, app, attrs["edge_type"], attrs.get("label")))
+            if keys:
+                self._inferred[(coll, app)] = keys
+            if self.verdict_log is not None:
+                new = self._verdicts(coll, app, keys)
+                if old != new:
+                    self.verdict_log.append((coll, app, old, new))
+
+    def _verdicts(self, coll, app, keys) -> list:
+        """Return the inferred edges as (edge_type, label)."""
+        edges = self.graph.succ[coll].get(app, {})
+        return [(edges[key]["edge_type"], edges[key].get("label")) for key in keys]
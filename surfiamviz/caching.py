@@ -0,0 +1,80 @@
+"""Hashing and caching helpers for expensive graph computations."""
+
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import networkx as nx
+
+
+def graph_hash(graph: nx.Graph, node_attrs: Iterable[str] = ()) -> str:
+    """Return a content hash of the graph structure.
+
+    The hash covers the nodes, the edges (including keys for multigraphs) and
+    optionally the values of the node attributes in node_attrs. It is computed
+    in a single pass and is used as cache key for partitions and centralities.
+    """
+    node_attrs = tuple(node_attrs)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(type(graph).__name__.encode())
+    for node, attrs in graph.nodes(data=True):
+        digest.update(repr((node, tuple(attrs.get(a) for a in node_attrs))).encode())
+    edges = graph.edges(keys=True) if graph.is_multigraph() else graph.edges()
+    for edge in edges:
+        digest.update(repr(edge).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Small LRU cache mapping content hashes to computed results.
+
+    hits and misses count the lookups with get, they are reported by the metrics.
+    """
+
+    def __init__(self, maxsize: int = 32, ttl: float = None):
+        """Create an empty cache holding at most maxsize results, each for at most ttl seconds."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, Any] = OrderedDict()
+        self._expires: dict[str, float] = {}
+
+    def _expired(self, key: str) -> bool:
+        if self.ttl is None or time.monotonic() < self._expires[key]:
+            return False
+        del self._data[key]
+        del self._expires[key]
+        return True
+
+    def get(self, key: str) -> Any:
+        """Return the cached value or None."""
+        if key not in self._data or self._expired(key):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+        while len(self._data) > self.maxsize:
+            self._expires.pop(self._data.popitem(last=False)[0], None)
+
+    def clear(self):
+        """Remove all entries."""
+        self._data.clear()
+        self._expires.clear()
+
+    def __contains__(self, key: str) -> bool:
+        """Check whether a result is cached for key."""
+        return key in self._data and not self._expired(key)
+
+    def __len__(self) -> int:
+        """Return the number of cached results."""
+        return len(self._data)
@@ -0,0 +1,176 @@
+"""Node importance metrics used for the node sizes.
+
+Three metrics are available: the undirected degree, the number of users that reach a
+node and an approximate betweenness centrality computed from k sampled source nodes.
+Results are cached per graph hash, rendering the same graph again does not recompute them.
+"""
+
+from collections import deque
+
+import networkx as nx
+
+from surfiamviz.caching import ResultCache, graph_hash
+from surfiamviz.community import collapse_multiedges
+from surfiamviz.metrics import METRICS
+
+CENTRALITY_METRICS = ["degree", "reachable_users", "betweenness"]
+
+# node types of the users in SRAM graphs and example graphs
+USER_NODE_TYPES = ("CO_MEMBER", "COLL_ADMIN", "RESEARCHER")
+
+# edge types that give access, actions like creating a collaboration do not
+ACCESS_EDGE_TYPES = ("MEMBERS", "BACKBONE")
+
+_CENTRALITY_CACHE = ResultCache(maxsize=16)
+METRICS.register_cache("centralities", _CENTRALITY_CACHE)
+
+
+def undirected_degree(graph: nx.Graph) -> dict:
+    """Return the degree of every node as if the graph was undirected.
+
+    The result equals dict(graph.to_undirected().degree), but it is computed from the
+    in- and out-adjacency without copying the graph and its attribute dicts.
+    Edges in both directions between two nodes count once (per key for multigraphs),
+    self-loops count twice.
+    """
+    if not graph.is_directed():
+        return dict(graph.degree)
+    multigraph = graph.is_multigraph()
+    degree = {}
+    for node, out_nbrs in graph.succ.items():
+        in_nbrs = graph.pred[node]
+        deg = 0
+        for nbr, keys in out_nbrs.items():
+            if not multigraph:
+                n_edges = 1
+            elif nbr in in_nbrs:
+                n_edges = len(keys.keys() | in_nbrs[nbr].keys())
+            else:
+                n_edges = len(keys)
+            deg += 2 * n_edges if nbr == node else n_edges
+        for nbr, keys in in_nbrs.items():
+            if nbr not in out_nbrs:
+                deg += len(keys) if multigraph else 1
+        degree[node] = deg
+    return degree
+
+
+def reachable_users(graph: nx.DiGraph, user_types: tuple = USER_NODE_TYPES) -> dict:
+    """Count for every node the users that have access to it.
+
+    A user reaches the nodes on directed paths of MEMBERS and BACKBONE edges starting at
+    the user, e.g. its collaborations and their services and groups; paths do not follow
+    actions, like the creation of a collaboration, and do not continue through other
+    users. Nodes that no user reaches directly, like the organisation and its units,
+    count the users that reach any of their descendants. User nodes count themselves.
+    A node that stands for several users (see graph_from_sram_json.compress_users)
+    counts as its count attribute, so the result for the other nodes is the same as
+    for the uncompressed graph.
+    Each user is traversed once, the cost grows with the number of memberships.
+    """
+    users = [node for node, ntype in graph.nodes(data="node_type") if ntype in user_types]
+    user_set = set(users)
+    weights = {user: graph.nodes[user].get("count", 1) for user in users}
+    reached: dict = {node: set() for node in graph}
+    multigraph = graph.is_multigraph()
+
+    def gives_access(attrs: dict) -> bool:
+        if multigraph:
+            return any(data.get("edge_type") in ACCESS_EDGE_TYPES for data in attrs.values())
+        return attrs.get("edge_type") in ACCESS_EDGE_TYPES
+
+    for user in users:
+        reached[user].add(user)
+        seen = {user}
+        queue = deque([user])
+        while queue:
+            node = queue.popleft()
+            for nbr, attrs in graph.adj[node].items():
+                if nbr not in seen and nbr not in user_set and gives_access(attrs):
+                    seen.add(nbr)
+                    reached[nbr].add(user)
+                    queue.append(nbr)
+
+    counts = {}
+    for node, node_users in reached.items():
+        if node_users or node in user_set:
+            counts[node] = sum(map(weights.__getitem__, node_users))
+            continue
+        # container nodes: union over the descendants, only a few such nodes exist
+        collected: set = set()
+        for desc in nx.descendants(graph, node):
+            collected |= reached[desc]
+        counts[node] = sum(map(weights.__getitem__, collected))
+    return counts
+
+
+def approximate_betweenness(graph: nx.Graph, k: int = 64, seed: int = 429) -> dict:
+    """Approximate the betweenness centrality from k sampled source nodes.
+
+    The graph is collapsed into an undirected simple graph first. For graphs with at
+    most k nodes the result is exact.
+    """
+    simple = collapse_multiedges(graph)
+    k = min(k, simple.number_of_nodes())
+    if k == 0:
+        return {}
+    return nx.betweenness_centrality(simple, k=k, seed=seed)
+
+
+def compute_centrality(graph: nx.Graph, metric: str = "degree", k: int = 64, seed: int = 429) -> dict:
+    """Return the values of a metric from CENTRALITY_METRICS for all nodes.
+
+    Parameters
+    ----------
+    graph: Graph
+        Networkx graph, user nodes are recognised by their node_type.
+    metric: str
+        degree, reachable_users or betweenness.
+    k: int
+        Number of sampled source nodes for betweenness.
+    seed: int
+        Seed for the sampling of the source nodes.
+
+    Returns
+    -------
+    Dictionary node -> metric value.
+
+    """
+    if metric not in CENTRALITY_METRICS:
+        raise ValueError(f"Centrality metric {metric} not known, choose from {CENTRALITY_METRICS}.")
+    if metric == "degree":
+        # linear in the graph size, hashing would cost as much as computing
+        return undirected_degree(graph)
+    key = f"{metric}-{k}-{seed}-" + graph_hash(graph, node_attrs=("node_type", "count"))
+    values = _CENTRALITY_CACHE.get(key)
+    if values is not None:
+        return values
+    if metric == "reachable_users":
+        values = reachable_users(graph)
+    else:
+        values = approximate_betweenness(graph, k=k, seed=seed)
+    _CENTRALITY_CACHE.put(key, values)
+    return values
+
+
+def set_node_sizes(
+    graph: nx.Graph, metric: str = "degree", values: dict = None, min_size: float = 25, max_size: float = 100
+):
+    """Set the size attribute of the nodes from a centrality metric.
+
+    The metric value is stored in the node attribute of the same name, values can be
+    passed if they were computed before. Degrees are used directly, size = min_size + degree;
+    the other metrics are scaled linearly to the range min_size to max_size.
+    """
+    if values is None:
+        values = compute_centrality(graph, metric)
+    max_value = max(values.values(), default=0)
+    for node, value in values.items():
+        attrs = graph.nodes[node]
+        attrs[metric] = value
+        if metric == "degree":
+            attrs["size"] = min_size + value
+        elif max_value > 0:
+            attrs["size"] = min_size + (max_size - min_size) * value / max_value
+        else:
+            attrs["size"] = min_size
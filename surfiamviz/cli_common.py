@@ -0,0 +1,96 @@
+"""Helpers of the commandline subcommands: configuration, output files and problems."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from surfiamviz.static_writer import STATIC_FORMATS
+from surfiamviz.utils import (
+    ego_network,
+    read_graph_config,
+    render_editable_network,
+    render_static_network,
+)
+
+
+def _parse_config(args: argparse.Namespace) -> dict:
+    if args.config.is_file():
+        try:
+            graph_config = read_graph_config(args.config.absolute())
+            return graph_config
+        except Exception as error:
+            print(f"Cannot read in {args.config}: {repr(error)}.")
+            sys.exit(234)
+    else:
+        print(f"Config {args.config.absolute()} is directory or does not exist. Exit.")
+        sys.exit(234)
+
+
+def _add_image_arguments(parser: argparse.ArgumentParser):
+    images = parser.add_argument_group(
+        "Static images, written instead of html if the output file ends with .svg or .png. "
+        "Use them for graphs that are too large for a browser."
+    )
+    images.add_argument(
+        "--image-width", help="Width of the image in pixels (default 2000).", type=int, default=2000
+    )
+    images.add_argument(
+        "--min-edge-length",
+        help="Do not draw edges shorter than this number of pixels, e.g. 1 for overviews of large graphs "
+        "(default 0, all edges).",
+        type=float,
+        default=0.0,
+    )
+
+
+def _image_options(args: argparse.Namespace) -> dict:
+    return {
+        "width": getattr(args, "image_width", 2000),
+        "min_edge_length": getattr(args, "min_edge_length", 0.0),
+    }
+
+
+def _is_image(path: Path) -> bool:
+    return path.suffix.lower().lstrip(".") in STATIC_FORMATS
+
+
+def _render_output(graph, args: argparse.Namespace, **render_options):
+    """Render the graph to args.output, as image for .svg and .png files and as html otherwise."""
+    if _is_image(args.output):
+        render_static_network(graph, args.output.absolute(), **_image_options(args), **render_options)
+    else:
+        render_editable_network(graph, args.output.absolute(), **render_options)
+
+
+def _ego_network_or_exit(graph, focus: str, hops: int):
+    if hops < 0:
+        print("--hops must be 0 or larger.")
+        sys.exit(1)
+    try:
+        return ego_network(graph, focus, hops)
+    except KeyError as error:
+        print(error.args[0])
+        sys.exit(1)
+
+
+def _exit_on_problems(problems: list):
+    """Print all validation problems and exit if there are any."""
+    if problems:
+        print(f"ERROR validation: found {len(problems)} problem(s).")
+        print("\n".join(problems))
+        sys.exit(1)
+
+
+def _parse_output(args: argparse.Namespace):
+    """Check the file name and path for the output html file."""
+    if args.output.is_dir():
+        print(f"Output {args.output} is a directory, cannot export graph.")
+        sys.exit(234)
+    elif args.output.is_file():
+        confirm = input(f"Overwrite {args.output.absolute()} [Yes(ENTER)/No(Any key)]?")
+        if confirm != "":
+            sys.exit(234)
+        else:
+            args.output.unlink()
+    else:
+        print(f"Saving graph as {args.output.absolute()}.")
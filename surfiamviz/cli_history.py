@@ -0,0 +1,101 @@
+"""The history subcommand: ingest and query a delta encoded history of exports."""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from surfiamviz.cli_common import _ego_network_or_exit, _parse_config, _parse_output, _render_output
+from surfiamviz.graph_from_config import set_node_levels_from_config
+from surfiamviz.graph_from_sram_json import read_json
+from surfiamviz.history import HistoryStore
+from surfiamviz.precompile import PLOT_TYPES
+from surfiamviz.utils import color_edges, color_nodes
+
+
+def _history_parser() -> argparse.ArgumentParser:
+    """Return the parser of the history subcommand and its actions."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz history",
+        description="Delta encoded history of the exports of an SRAM organisation.",
+    )
+    parser.add_argument("--store", help="Directory of the history store.", type=Path, required=True)
+    actions = parser.add_subparsers(dest="action", required=True)
+
+    ingest = actions.add_parser("ingest", help="Add exports, in increasing order of their dates.")
+    ingest.add_argument(
+        "-i",
+        "--input",
+        help="Json exports of the organisation. Without --date the date (YYYY-MM-DD) is taken "
+        "from the file name.",
+        type=Path,
+        nargs="+",
+        required=True,
+    )
+    ingest.add_argument("--date", help="Date of the export if only one is given, YYYY-MM-DD.", type=str)
+
+    actions.add_parser("growth", help="Print the number of units, collaborations, users, ... per date.")
+
+    access = actions.add_parser("access", help="Print when a user was member of a collaboration.")
+    access.add_argument("--user", help="uid of the user.", type=str, required=True)
+    access.add_argument("--collaboration", help="Name of the collaboration.", type=str, required=True)
+
+    graph = actions.add_parser("graph", help="Render the graph of the organisation on a date.")
+    graph.add_argument("--date", help="Date, YYYY-MM-DD.", type=str, required=True)
+    graph.add_argument(
+        "-o", "--output", help="Path and name of the html file or svg or png image.", type=Path, required=True
+    )
+    graph.add_argument("-c", "--config", help="Configuration file.", type=Path, required=True)
+    graph.add_argument("--plot", type=str, choices=PLOT_TYPES, default="bipartite")
+    graph.add_argument("--focus", help="Render only the neighbourhood of this node.", type=str)
+    graph.add_argument("--hops", help="Size of the neighbourhood in edges (default 2).", type=int, default=2)
+    return parser
+
+
+def query_history():
+    """Ingest exports into a history store or query it."""
+    args = _history_parser().parse_args()
+    store = HistoryStore(args.store)
+
+    if args.action == "ingest":
+        if args.date and len(args.input) > 1:
+            print("--date can only be used with a single input file.")
+            sys.exit(1)
+        exports = []
+        for path in args.input:
+            match = re.search(r"\d{4}-\d{2}-\d{2}", path.name)
+            date = args.date or (match.group() if match else None)
+            if date is None:
+                print(f"Cannot determine the date of {path}, use --date or a file name with YYYY-MM-DD.")
+                sys.exit(1)
+            exports.append((date, path))
+        for date, path in sorted(exports):
+            try:
+                stats = store.ingest(date, read_json(path))
+            except (ValueError, KeyError, OSError) as error:
+                print(f"Cannot ingest {path}: {repr(error)}.")
+                sys.exit(1)
+            print(f"{date}: {stats}")
+    elif args.action == "growth":
+        print(json.dumps(store.growth(), indent=4))
+    elif args.action == "access":
+        periods = store.access_history(args.user, args.collaboration)
+        if not periods:
+            print(f"{args.user} was never member of {args.collaboration}.")
+        for start, end, role in periods:
+            print(f"{role} from {start} until {end or 'now'}")
+    else:
+        graph_config = _parse_config(args)
+        _parse_output(args)
+        try:
+            sram_graph = store.graph_at(args.date)
+        except KeyError as error:
+            print(error)
+            sys.exit(1)
+        if args.focus:
+            sram_graph = _ego_network_or_exit(sram_graph, args.focus, args.hops)
+        set_node_levels_from_config(sram_graph, graph_config)
+        color_nodes(sram_graph, graph_config)
+        color_edges(sram_graph, graph_config)
+        _render_output(sram_graph, args, plot_type=args.plot)
@@ -0,0 +1,82 @@
+"""The simulate subcommand: what-if scenarios on an example graph."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from surfiamviz.cli_common import _parse_config
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.simulate import Simulator, format_verdicts, parse_scenario
+
+
+def simulate_scenarios():
+    """Print the effect of what-if scenarios on an example graph."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz simulate",
+        description=(
+            "Apply hypothetical changes to an example graph and print the changed collaboration-application "
+            "edges. Changes are 'approve U V', 'deny U V', 'add U V EDGE_TYPE [LABEL]' and "
+            "'remove U V [EDGE_TYPE]', the changes of one scenario are separated by semicolons."
+        ),
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Configuration file defining node, edge types and the graph(s).",
+        type=Path,
+        required=True,
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        help="A file formatted in toml which contains the graph(s).",
+        type=Path,
+        required=True,
+    )
+    parser.add_argument("-g", "--graph", help="Name of the example graph.", type=str, required=True)
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        help="Changes of a scenario, can be repeated. Every scenario starts from the example graph.",
+        action="append",
+        default=[],
+    )
+    parser.add_argument("--scenario-file", help="File with one scenario per line.", type=Path)
+    args = parser.parse_args()
+
+    graph_config = _parse_config(args)
+    example_graphs = import_example_graph(args.input)
+    if args.graph not in example_graphs:
+        print(f"Graph {args.graph} not defined in {args.input.absolute()}. Exit.")
+        sys.exit(234)
+    lines = list(args.scenario)
+    if args.scenario_file is not None:
+        text = args.scenario_file.read_text(encoding="utf-8")
+        lines.extend(line for line in text.splitlines() if line.strip())
+    if not lines:
+        print("No scenario, set --scenario or --scenario-file.")
+        sys.exit(1)
+    try:
+        simulator = Simulator.from_example(example_graphs, args.graph, graph_config)
+    except (KeyError, ValueError) as error:
+        print(f"Cannot simulate: {error.args[0]}")
+        sys.exit(1)
+
+    # every scenario is reported, a scenario that cannot be simulated does not stop the others
+    failed = 0
+    for line in lines:
+        print(f"{line}:")
+        try:
+            result = simulator.simulate(parse_scenario(line))
+        except (KeyError, ValueError) as error:
+            print(f"    cannot simulate: {error.args[0]}")
+            failed += 1
+            continue
+        if not result["verdicts"] and not result["access"]:
+            print("    no changes")
+        for coll, app, old, new in result["verdicts"]:
+            print(f"    {coll} -> {app}: {format_verdicts(old)} => {format_verdicts(new)}")
+        for user, app, change in result["access"]:
+            print(f"    {user} {change} access to {app}")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""The store subcommand: an SQLite graph store for organisations that do not fit in memory."""
+
+import argparse
+import sys
+from pathlib import Path
+
+from surfiamviz.cli_common import _parse_config, _parse_output, _render_output
+from surfiamviz.graph_from_config import set_node_levels_from_config
+from surfiamviz.graph_store import GraphStore
+from surfiamviz.precompile import PLOT_TYPES
+from surfiamviz.utils import color_edges, color_nodes
+
+
+def _store_parser() -> argparse.ArgumentParser:
+    """Return the parser of the store subcommand and its actions."""
+    parser = argparse.ArgumentParser(
+        prog="surfiamviz store",
+        description="SQLite graph store of an SRAM organisation, only the selected part is loaded in memory.",
+    )
+    parser.add_argument("--db", help="SQLite database file of the store.", type=Path, required=True)
+    actions = parser.add_subparsers(dest="action", required=True)
+
+    ingest = actions.add_parser("ingest", help="Load a json export into an empty store.")
+    ingest.add_argument("-i", "--input", help="Json export of the organisation.", type=Path, required=True)
+
+    actions.add_parser("stats", help="Print the statistics of the organisation, like the stats subcommand.")
+
+    graph = actions.add_parser("graph", help="Render a subgraph or the neighbourhood of a node.")
+    graph.add_argument(
+        "-o", "--output", help="Path and name of the html file or svg or png image.", type=Path, required=True
+    )
+    graph.add_argument("-c", "--config", help="Configuration file.", type=Path, required=True)
+    graph.add_argument("--plot", type=str, choices=PLOT_TYPES, default="bipartite")
+    graph.add_argument("--node-types", help="Only nodes of these types.", nargs="+", default=[])
+    graph.add_argument("--edge-types", help="Only edges of these types.", nargs="+", default=[])
+    graph.add_argument("--focus", help="Render only the neighbourhood of this node.", type=str)
+    graph.add_argument("--hops", help="Size of the neighbourhood in edges (default 2).", type=int, default=2)
+    return parser
+
+
+def query_graph_store():
+    """Load an export into a graph store or query it."""
+    args = _store_parser().parse_args()
+    if args.action != "ingest" and not args.db.is_file():
+        print(f"Store {args.db} does not exist, ingest an export first.")
+        sys.exit(1)
+    with GraphStore(args.db) as store:
+        if args.action == "ingest":
+            try:
+                counts = store.ingest(args.input)
+            except (ValueError, KeyError, OSError) as error:
+                print(f"Cannot ingest {args.input}: {repr(error)}.")
+                sys.exit(1)
+            print(f"{args.db}: {counts}")
+            return
+        if args.action == "stats":
+            try:
+                print(store.stats())
+            except KeyError as error:
+                print(error.args[0])
+                sys.exit(1)
+            return
+        graph_config = _parse_config(args)
+        _parse_output(args)
+        try:
+            if args.focus:
+                if args.hops < 0:
+                    print("--hops must be 0 or larger.")
+                    sys.exit(1)
+                sram_graph = store.ego_network(args.focus, args.hops)
+            else:
+                sram_graph = store.subgraph(args.edge_types, args.node_types)
+        except KeyError as error:
+            print(error.args[0])
+            sys.exit(1)
+    set_node_levels_from_config(sram_graph, graph_config)
+    color_nodes(sram_graph, graph_config)
+    color_edges(sram_graph, graph_config)
+    _render_output(sram_graph, args, plot_type=args.plot)
@@ -0,0 +1,34 @@
+"""Watch option of the organisation and graph subcommands."""
+
+import argparse
+
+from surfiamviz.cli_common import _image_options
+from surfiamviz.watch import WatchSession
+
+
+def _add_watch_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--watch",
+        help="Keep the graph in memory and render it again when the input or configuration file changes. "
+        "A change of colours only recolours the graph, a change of levels only redoes the layout. "
+        "Stop with Ctrl-C.",
+        action="store_true",
+        default=False,
+    )
+
+
+def _watch(args: argparse.Namespace, load, build, source):
+    """Render the graph and watch the input and configuration files, see watch.WatchSession."""
+    input_path = args.input if args.input is not None and args.input.is_file() else None
+    WatchSession(
+        load,
+        build,
+        args.config,
+        args.output.absolute(),
+        input_path=input_path,
+        plot_type=args.plot,
+        workers=args.workers,
+        size_metric=args.size,
+        merge_edges=args.merge_edges,
+        image_options=_image_options(args),
+    ).run(source=source)
@@ -0,0 +1,217 @@
+"""Community detection for the community layouts.
+
+The greedy and louvain algorithms of networkx run on the graph as given. The graphs
+rendered from SRAM are MultiDiGraphs with many parallel edges; for the fast engine
+the graph is collapsed into an undirected simple graph where the edge weight counts
+the parallel edges, and the Louvain method runs vectorised on the sparse adjacency
+matrix of that graph (requires scipy, networkx louvain is the fallback without it).
+Partitions are cached per graph hash.
+"""
+
+import warnings
+
+import networkx as nx
+import numpy as np
+
+from surfiamviz.caching import ResultCache, graph_hash
+from surfiamviz.metrics import METRICS
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # scipy is optional
+    sp = None
+
+COMMUNITY_ALGORITHMS = ["greedy", "louvain", "fast"]
+
+_PARTITION_CACHE = ResultCache(maxsize=16)
+METRICS.register_cache("partitions", _PARTITION_CACHE)
+
+
+def collapse_multiedges(graph: nx.Graph, weight: str = "weight") -> nx.Graph:
+    """Collapse a (directed) multigraph into an undirected weighted simple graph.
+
+    Parallel edges and edges in both directions between two nodes are merged into
+    one edge, its weight is the sum of the weights of the merged edges (default 1).
+    """
+    simple = nx.Graph()
+    simple.add_nodes_from(graph)
+    adj = simple.adj
+    for u, v, w in graph.edges(data=weight, default=1):
+        if v in adj[u]:
+            adj[u][v][weight] += w
+        else:
+            simple.add_edge(u, v, **{weight: w})
+    return simple
+
+
+def to_sparse_adjacency(simple: nx.Graph, weight: str = "weight"):
+    """Return the node list and the symmetric CSR adjacency matrix of a simple graph.
+
+    Self-loops are stored with twice their weight on the diagonal, so that the row
+    sums equal the weighted degrees.
+    """
+    nodes = list(simple)
+    index = {node: i for i, node in enumerate(nodes)}
+    rows, cols, vals = [], [], []
+    for u, v, w in simple.edges(data=weight, default=1):
+        i, j = index[u], index[v]
+        if i == j:
+            rows.append(i)
+            cols.append(i)
+            vals.append(2.0 * w)
+        else:
+            rows.extend((i, j))
+            cols.extend((j, i))
+            vals.extend((w, w))
+    size = len(nodes)
+    adj = sp.csr_array(
+        (np.asarray(vals, dtype=float), (np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64))),
+        shape=(size, size),
+    )
+    adj.sum_duplicates()
+    return nodes, adj
+
+
+def _modularity(adj, rows, comm, degrees, m2: float, resolution: float) -> float:
+    internal = adj.data[comm[rows] == comm[adj.indices]].sum()
+    totals = np.bincount(comm, weights=degrees)
+    return internal / m2 - resolution * (totals @ totals) / m2**2
+
+
+def _louvain_move_nodes(adj, resolution: float, threshold: float, rng: np.random.Generator) -> np.ndarray:
+    """Local moving phase of the Louvain method on a CSR matrix, returns community per row.
+
+    All rows are evaluated at once: the weights from each row to the communities are
+    the sparse product A @ P with the membership matrix P, the modularity gains are
+    computed on its non-zeros. The rows that gain move together, except that a
+    singleton only joins a singleton with a smaller label, so two never swap. If the
+    batch still lowers the modularity a random half of it is tried, down to the single
+    best move, which always gains. Stops when a sweep gains less than threshold.
+    """
+    size = adj.shape[0]
+    rows = np.repeat(np.arange(size), np.diff(adj.indptr))
+    degrees = np.asarray(adj.sum(axis=1)).ravel()
+    self_loops = adj.diagonal()
+    m2 = degrees.sum()
+    comm = np.arange(size)
+    modularity = _modularity(adj, rows, comm, degrees, m2, resolution)
+    ones = np.ones(size)
+    while True:
+        membership = sp.csr_array((ones, (np.arange(size), comm)), shape=(size, size))
+        links = (adj @ membership).tocsr()
+        link_rows = np.repeat(np.arange(size), np.diff(links.indptr))
+        link_comms = links.indices
+        own = link_comms == comm[link_rows]
+        # the row is taken out of its own community first
+        weights = links.data - own * self_loops[link_rows]
+        totals = np.bincount(comm, weights=degrees, minlength=size)
+        row_degrees = degrees[link_rows]
+        gains = weights - resolution * (totals[link_comms] - own * row_degrees) * row_degrees / m2
+        stay = np.bincount(link_rows, weights=own * weights, minlength=size)
+        stay -= resolution * (totals[comm] - degrees) * degrees / m2
+        # best community per row, rows without links have none
+        linked = np.flatnonzero(np.diff(links.indptr))
+        best = np.maximum.reduceat(gains, links.indptr[linked])
+        first = np.flatnonzero(gains == best[np.searchsorted(linked, link_rows)])
+        first = first[np.r_[True, link_rows[first][1:] != link_rows[first][:-1]]]
+        best_rows, best_comms = link_rows[first], link_comms[first]
+        improvement = gains[first] - stay[best_rows]
+        candidates = (improvement > 1e-12) & (best_comms != comm[best_rows])
+        if not candidates.any():
+            return comm
+        best_rows, best_comms, improvement = (best_rows[candidates], best_comms[candidates],
+                                              improvement[candidates])
+        counts = np.bincount(comm, minlength=size)
+        swap = (counts[comm[best_rows]] == 1) & (counts[best_comms] == 1) & (best_comms > comm[best_rows])
+        chosen = np.flatnonzero(~swap)
+        if chosen.size == 0:
+            chosen = np.arange(best_rows.size)
+        while True:
+            moved = comm.copy()
+            moved[best_rows[chosen]] = best_comms[chosen]
+            moved_modularity = _modularity(adj, rows, moved, degrees, m2, resolution)
+            if moved_modularity > modularity or chosen.size == 1:
+                break
+            if chosen.size < 4:
+                chosen = np.argmax(improvement)[None]
+            else:
+                chosen = rng.choice(chosen, chosen.size // 2, replace=False)
+        if moved_modularity - modularity < threshold:
+            return comm if moved_modularity < modularity else moved
+        comm, modularity = moved, moved_modularity
+
+
+def louvain_sparse(adj, resolution: float = 1.0, threshold: float = 1e-7, seed: int = 429) -> np.ndarray:
+    """Louvain community detection on a symmetric sparse adjacency matrix.
+
+    Each level runs the vectorised local moving phase over the rows of the matrix,
+    then aggregates the communities with the sparse product P.T @ A @ P. As in
+    networkx louvain_communities, a level stops once it gains less than threshold
+    modularity.
+
+    Returns
+    -------
+    Array with a community label per row of adj.
+
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.arange(adj.shape[0])
+    if adj.shape[0] == 0 or adj.sum() == 0:
+        return labels
+    current = adj
+    while True:
+        comm = _louvain_move_nodes(current, resolution, threshold, rng)
+        _, comm = np.unique(comm, return_inverse=True)
+        if comm.max() + 1 == current.shape[0]:
+            return labels
+        labels = comm[labels]
+        membership = sp.csr_array(
+            (np.ones(len(comm)), (np.arange(len(comm)), comm)), shape=(len(comm), comm.max() + 1)
+        )
+        current = (membership.T @ current @ membership).tocsr()
+
+
+def _fast_communities(simple: nx.Graph) -> list:
+    if sp is None:
+        warnings.warn("scipy is not installed, using networkx louvain for the fast community detection.")
+        return nx.community.louvain_communities(simple, weight="weight", seed=429)
+    nodes, adj = to_sparse_adjacency(simple)
+    labels = louvain_sparse(adj)
+    communities: dict[int, set] = {}
+    for node, label in zip(nodes, labels.tolist()):
+        communities.setdefault(label, set()).add(node)
+    return sorted(communities.values(), key=len, reverse=True)
+
+
+def detect_communities(graph: nx.Graph, alg: str = "greedy") -> list:
+    """Detect the communities in the graph.
+
+    Parameters
+    ----------
+    graph: Graph
+        Any networkx graph, for fast multi-edges and edge directions are collapsed first.
+    alg: str
+        greedy (networkx greedy modularity), louvain (networkx louvain) or
+        fast (sparse louvain, falls back to networkx without scipy).
+
+    Returns
+    -------
+    List of sets of nodes, one set per community.
+
+    """
+    if alg not in COMMUNITY_ALGORITHMS:
+        raise ValueError(f"Community algorithm {alg} not known, choose from {COMMUNITY_ALGORITHMS}.")
+    key = alg + graph_hash(graph)
+    communities = _PARTITION_CACHE.get(key)
+    if communities is not None:
+        return communities
+
+    if alg == "greedy":
+        communities = nx.community.greedy_modularity_communities(graph)
+    elif alg == "louvain":
+        communities = nx.community.louvain_communities(graph)
+    else:
+        communities = _fast_communities(collapse_multiedges(graph))
+    communities = [frozenset(comm) for comm in communities]
+    _PARTITION_CACHE.put(key, communities)
+    return communities
@@ -0,0 +1,155 @@
+"""Export an SRAM organisation as columnar tables for analytics.
+
+The tables are built from the output of get_nodes_from_dict, no networkx graph is
+created. Rows are generated lazily and written in chunks, to Parquet or Arrow IPC
+files when pyarrow is installed and to csv files otherwise.
+"""
+
+import csv
+import itertools
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional
+    pa = None
+
+EXPORT_FORMATS = ["auto", "parquet", "arrow", "csv"]
+
+# table name -> column names and pyarrow type names
+TABLE_SCHEMAS = {
+    "units": [("organisation", "string"), ("unit", "string")],
+    "collaborations": [
+        ("collaboration", "string"),
+        ("label", "string"),
+        ("n_units", "int64"),
+        ("n_services", "int64"),
+        ("n_groups", "int64"),
+        ("n_users", "int64"),
+    ],
+    "collaboration_units": [("collaboration", "string"), ("unit", "string")],
+    "users": [("user", "string"), ("label", "string"), ("created_by", "string"), ("is_admin", "bool_")],
+    "memberships": [("user", "string"), ("collaboration", "string"), ("role", "string")],
+    "admin_roles": [("user", "string"), ("collaboration", "string")],
+    "services": [("collaboration", "string"), ("service", "string")],
+    "groups": [("collaboration", "string"), ("group", "string")],
+}
+
+
+def iter_table_rows(nodes: list, table: str) -> Iterator[tuple]:
+    """Yield the rows of one table from the nodes list of get_nodes_from_dict."""
+    org, units, colls, users = nodes
+    if table == "units":
+        yield from ((org["node_name"], unit) for unit in units)
+    elif table == "collaborations":
+        for coll in colls:
+            yield (coll["node_name"], coll["label"], len(coll["edges_from"]), len(coll["services"]),
+                   len(coll["groups"]), len(coll["users"]))
+    elif table == "collaboration_units":
+        yield from ((coll["node_name"], unit) for coll in colls for unit in coll["edges_from"])
+    elif table == "users":
+        for user, u_dict in users.items():
+            yield (user, u_dict.get("label", user), u_dict.get("created_by"), len(u_dict["admin_of"]) > 0)
+    elif table == "memberships":
+        admins = {(user, coll) for user, u_dict in users.items() for coll in u_dict["admin_of"]}
+        for coll in colls:
+            name = coll["node_name"]
+            for user in coll["users"]:
+                yield (user, name, "admin" if (user, name) in admins else "member")
+    elif table == "admin_roles":
+        yield from ((user, coll) for user, u_dict in users.items() for coll in u_dict["admin_of"])
+    elif table == "services":
+        yield from ((coll["node_name"], service) for coll in colls for service in coll["services"])
+    elif table == "groups":
+        yield from ((coll["node_name"], group) for coll in colls for group in coll["groups"])
+    else:
+        raise ValueError(f"Table {table} not known, choose from {list(TABLE_SCHEMAS)}.")
+
+
+def iter_chunks(rows: Iterator[tuple], chunk_size: int) -> Iterator[list]:
+    """Group rows into lists of at most chunk_size rows."""
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def resolve_format(export_format: str) -> str:
+    """Return the concrete format, auto means parquet with pyarrow and csv without."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Export format {export_format} not known, choose from {EXPORT_FORMATS}.")
+    if export_format == "auto":
+        return "csv" if pa is None else "parquet"
+    if export_format != "csv" and pa is None:
+        raise ImportError(f"Export format {export_format} requires pyarrow, install it or use csv.")
+    return export_format
+
+
+def write_table(rows: Iterator[tuple], table: str, path: Path, export_format: str, chunk_size: int = 50000):
+    """Write the rows of one table to path in chunks of chunk_size rows."""
+    columns = TABLE_SCHEMAS[table]
+    if export_format == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([name for name, _ in columns])
+            for chunk in iter_chunks(rows, chunk_size):
+                writer.writerows(chunk)
+        return
+
+    schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in columns])
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(path, schema)
+    else:
+        writer = pa_ipc.new_file(path, schema)
+    try:
+        for chunk in iter_chunks(rows, chunk_size):
+            arrays = [pa.array(column, type=schema.field(i).type) for i, column in enumerate(zip(*chunk))]
+            batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+            if export_format == "parquet":
+                writer.write_batch(batch)
+            else:
+                writer.write(batch)
+    finally:
+        writer.close()
+
+
+def export_tables(
+    nodes: list,
+    output_dir: Path,
+    export_format: str = "auto",
+    chunk_size: int = 50000,
+    tables: list = None,
+) -> dict:
+    """Export the organisation tables to output_dir, one file per table.
+
+    Parameters
+    ----------
+    nodes: list
+        Output of get_nodes_from_dict.
+    output_dir: Path
+        Existing directory for the table files.
+    export_format: str
+        auto, parquet, arrow or csv.
+    chunk_size: int
+        Number of rows converted and written at once.
+    tables: list
+        Names of the tables to export, default all tables in TABLE_SCHEMAS.
+
+    Returns
+    -------
+    Dictionary table name -> path of the written file.
+
+    """
+    export_format = resolve_format(export_format)
+    suffix = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}[export_format]
+    written = {}
+    for table in tables or TABLE_SCHEMAS:
+        path = Path(output_dir) / f"{table}{suffix}"
+        write_table(iter_table_rows(nodes, table), table, path, export_format, chunk_size)
+        written[table] = path
+    return written
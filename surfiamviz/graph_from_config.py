@@ -13,6 +13,20 @@ def import_example_graph(input_file: Path) -> dict:
     return example_graphs
 
 
+def config_node_type(node: str, graph_config: dict) -> str:
+    """Return the node type of a node name, the first configured node type that is part of the name.
+
+    Prints a warning and returns an empty string if no type matches.
+    """
+    res = [node_type for node_type in graph_config["node_types"] if node_type in node]
+    if len(res) == 0:
+        print(f"WARNING Cannot retrieve the type of {node} from the config.")
+        return ""
+    if len(res) > 1:
+        print(f"WARNING {node} can be of types {res}. Setting type to {res[0]}.")
+    return res[0]
+
+
 def set_node_type(graph: nx.MultiDiGraph, graph_config: dict):
     """Add the type to each node in the graph.
 
@@ -22,19 +36,9 @@ def set_node_type(graph: nx.MultiDiGraph, graph_config: dict):
     by mapping each of the defined node_types as a prefix to the node.
     The first one that matches defines the node type.
     """
-    # the available node types
-    config_node_types = graph_config["node_types"].keys()
     for node in graph.nodes():
         if "node_type" not in graph.nodes.get(node):
-            res = [node_type for node_type in config_node_types if node_type in node]
-            if len(res) == 0:
-                print(f"WARNING Cannot retrieve the type of {node} from the config.")
-                ntype = ""
-            elif len(res) > 1:
-                print(f"WARNING {node} can be of types {res}. Setting type to {res[0]}.")
-                ntype = res[0]
-            else:
-                ntype = res[0]
+            ntype = config_node_type(node, graph_config)
             # add also the label to the node, same as node id
             graph.add_node(node, label = node, node_type=ntype)
 
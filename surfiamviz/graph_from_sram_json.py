@@ -1,12 +1,21 @@
 """Generate a graph from an SRAM export."""
 
+import hashlib
 import json
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Union
+from typing import Any, Iterator, Union
 
 import networkx as nx
 import requests
 
+from surfiamviz.caching import ResultCache
+from surfiamviz.centrality import USER_NODE_TYPES
+from surfiamviz.records import Collaboration, Organisation, json_loads, paused_gc
+from surfiamviz.validate import SramValidator, validate_sram_dict
+
 
 def get_sram_url(servername: str) -> str:
     """Return the url of the sram server."""
@@ -25,28 +34,304 @@ def get_sram_url(servername: str) -> str:
 
 def get_sram_org(token: str, server: str = "https://acc.sram.surf.nl") -> dict:
     """Retrieve sram org json from API."""
-    url = server + "/api/organisations/v1"
+    return _get_sram_json(token, server.rstrip("/") + "/api/organisations/v1")
+
+
+def _get_sram_json(token: str, url: str) -> dict:
     headers = {"Accept": "application/json"}
     headers = {"Authorization": f"Bearer {token}"}
 
     response = requests.get(url=url, headers=headers, timeout=10)
-    sram_dict = json.loads(response.content)
+    sram_dict = json_loads(response.content)
     if "error" in sram_dict:
         raise requests.HTTPError(sram_dict["message"])
 
     return sram_dict
 
 
+# hash of (token, server, collaboration identifier) -> collaboration memberships, the
+# webtool shares the process between sessions so the token is part of the key
+_MEMBERSHIP_CACHE = ResultCache(maxsize=4096, ttl=600)
+_MEMBERSHIP_LOCK = threading.Lock()
+
+
+def _membership_key(token: str, server: str, identifier: str) -> str:
+    return hashlib.blake2b(repr((token, server.rstrip("/"), identifier)).encode(), digest_size=16).hexdigest()
+
+
+def get_sram_org_skeleton(token: str, server: str = "https://acc.sram.surf.nl") -> dict:
+    """Retrieve the sram organisation without collaboration memberships.
+
+    The organisation API of SRAM has no variant without memberships, so this is a full
+    download of the organisation. The memberships are moved to the per collaboration
+    cache of the token, so get_sram_org_partial does not request them again; the gain
+    is that only the selected collaborations are parsed and rendered.
+    """
+    sram_dict = get_sram_org(token, server)
+    for coll in sram_dict.get("collaborations", []):
+        memberships = coll.pop("collaboration_memberships", None)
+        if memberships is not None and "identifier" in coll:
+            with _MEMBERSHIP_LOCK:
+                _MEMBERSHIP_CACHE.put(_membership_key(token, server, coll["identifier"]), memberships)
+    return sram_dict
+
+
+def get_collaboration_memberships(token: str, server: str, identifier: str) -> list:
+    """Retrieve the memberships of one collaboration, cached per token and collaboration for 10 minutes."""
+    key = _membership_key(token, server, identifier)
+    with _MEMBERSHIP_LOCK:
+        memberships = _MEMBERSHIP_CACHE.get(key)
+    if memberships is None:
+        url = server.rstrip("/") + f"/api/collaborations/v1/{identifier}"
+        memberships = _get_sram_json(token, url).get("collaboration_memberships", [])
+        with _MEMBERSHIP_LOCK:
+            _MEMBERSHIP_CACHE.put(key, memberships)
+    return memberships
+
+
+def select_collaborations(sram_dict: dict, units: list = None, collaborations: list = None) -> dict:
+    """Return a copy of the organisation restricted to the selected units and collaborations.
+
+    A collaboration is selected if its name is in collaborations or if it belongs to one
+    of the units. The units of the copy are the selected units and the units of the
+    selected collaborations. Without any selection the copy contains all collaborations.
+    """
+    if not units and not collaborations:
+        return {**sram_dict, "collaborations": list(sram_dict["collaborations"])}
+    units = set(units or [])
+    collaborations = set(collaborations or [])
+    selected = dict(sram_dict)
+    selected["collaborations"] = [
+        coll
+        for coll in sram_dict["collaborations"]
+        if coll["name"] in collaborations or units.intersection(coll["units"])
+    ]
+    if units:
+        units.update(unit for coll in selected["collaborations"] for unit in coll["units"])
+        selected["units"] = [unit for unit in sram_dict["units"] if unit in units]
+    return selected
+
+
+def get_sram_org_partial(
+    token: str,
+    server: str = "https://acc.sram.surf.nl",
+    units: list = None,
+    collaborations: list = None,
+    skeleton: dict = None,
+    max_workers: int = 8,
+) -> dict:
+    """Retrieve the sram organisation with memberships only for the selected collaborations.
+
+    Parameters
+    ----------
+    token: str
+        API token of the organisation.
+    server: str
+        Url of the SRAM instance.
+    units: list
+        Names of units, all their collaborations are loaded.
+    collaborations: list
+        Names of collaborations to load.
+    skeleton: dict
+        Result of get_sram_org_skeleton, fetched if not given.
+    max_workers: int
+        Number of concurrent requests for the collaboration memberships.
+
+    Returns
+    -------
+    Organisation dictionary in the format of get_sram_org with only the selected
+    collaborations, which can be passed to get_nodes_from_dict.
+
+    """
+    if skeleton is None:
+        skeleton = get_sram_org_skeleton(token, server)
+    selected = select_collaborations(skeleton, units, collaborations)
+    identifiers = [coll["identifier"] for coll in selected["collaborations"] if "identifier" in coll]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda ident: get_collaboration_memberships(token, server, ident), identifiers)
+        memberships = dict(zip(identifiers, results))
+
+    selected["collaborations"] = [
+        {**coll, "collaboration_memberships": memberships[coll["identifier"]]}
+        if "identifier" in coll
+        else coll
+        for coll in selected["collaborations"]
+    ]
+    return selected
+
+
 def read_json(fpath: Union[str, Path]) -> dict:
-    """Read sram json export."""
+    """Read sram json export, with orjson if it is installed."""
+    with open(fpath, "rb") as f:
+        return json_loads(f.read())
+
+
+class _JsonStream:
+    """Decode json values one after another from a text file, reading it in chunks."""
+
+    def __init__(self, f, chunk_size: int):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self, size: int = 0) -> bool:
+        data = self._file.read(max(size, self._chunk_size))
+        if not data:
+            return False
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next character that is not whitespace."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of json file.")
+
+    def expect(self, char: str):
+        """Consume char, the next character that is not whitespace."""
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} in json file, found {self.peek()!r}.")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decode the next json value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # grow the buffer geometrically, a value larger than a chunk is then
+                # decoded O(log size) times instead of once per chunk
+                if not self._fill(len(self._buffer) - self._pos):
+                    raise
+                continue
+            # a number at the end of the buffer might continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_organisation_json(fpath: Union[str, Path], chunk_size: int = 1 << 20) -> Iterator[tuple]:
+    """Read an sram json export incrementally.
+
+    Yields (key, value) for the keys of the organisation. The collaborations are not
+    collected in a list, ("collaborations", collaboration) is yielded for each of them,
+    so only one collaboration is held in memory at a time.
+    """
     with open(fpath, "r", encoding="utf-8") as f:
-        sram_export = json.load(f)
-    return sram_export
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "collaborations" and stream.peek() == "[":
+                stream.expect("[")
+                if stream.peek() != "]":
+                    while True:
+                        yield key, stream.value()
+                        if stream.peek() != ",":
+                            break
+                        stream.expect(",")
+                stream.expect("]")
+            else:
+                yield key, stream.value()
+            if stream.peek() != ",":
+                break
+            stream.expect(",")
+        stream.expect("}")
+
+
+def read_organisation(
+    fpath: Union[str, Path],
+    stream: bool = False,
+    units: list = None,
+    collaborations: list = None,
+    problems: list = None,
+) -> Organisation:
+    """Read an sram json export into records, see records.Organisation.
+
+    Parameters
+    ----------
+    fpath: str or Path
+        The json export.
+    stream: bool
+        Decode the collaborations one at a time with iter_organisation_json, the
+        decoded json of the whole export is then never held in memory.
+    units: list
+        Only keep the collaborations of these units, as select_collaborations.
+    collaborations: list
+        Only keep these collaborations, as select_collaborations.
+    problems: list
+        If given, the export is validated as with validate_sram_dict and the problems
+        are appended. Collaborations with problems are left out of the result.
+
+    Returns
+    -------
+    The Organisation record, None if problems were found.
+
+    """
+    if not stream:
+        sram_dict = select_collaborations(read_json(fpath), units, collaborations)
+        if problems is not None:
+            problems.extend(validate_sram_dict(sram_dict))
+            if problems:
+                return None
+        return Organisation.from_dict(sram_dict)
+
+    unit_set = set(units or [])
+    collaboration_set = set(collaborations or [])
+    validator = None if problems is None else SramValidator()
+    fields: dict = {"collaborations": []}
+    users: dict = {}
+    index = 0
+    with paused_gc():
+        for key, value in iter_organisation_json(fpath):
+            if key == "collaborations":
+                index += 1
+                if not isinstance(value, dict):
+                    # reported by the validator, or raised as it would report it
+                    if validator is None:
+                        raise ValueError(
+                            f"collaborations[{index - 1}]: expected dict, found {type(value).__name__}."
+                        )
+                    validator.collaboration(value)
+                    continue
+                if (unit_set or collaboration_set) and not (
+                    value.get("name") in collaboration_set or unit_set.intersection(value.get("units") or [])
+                ):
+                    continue
+                if validator is None or validator.collaboration(value):
+                    fields[key].append(Collaboration.from_dict(value, users))
+                continue
+            if key == "units" and validator is not None:
+                validator.units(value)
+            fields[key] = value
+    if validator is not None:
+        problems.extend(validator.finish(list(fields)))
+        if problems:
+            return None
+    if unit_set:
+        # as select_collaborations, the units may come before or after the collaborations
+        unit_set.update(unit for coll in fields["collaborations"] for unit in coll.units)
+        fields["units"] = [unit for unit in fields["units"] if unit in unit_set]
+    return Organisation(fields["name"], fields["short_name"], fields["units"], fields["collaborations"])
 
 
 def get_nodes_from_dict(sram_org_dict: dict) -> list:
     """Extract node names and types from dictionary on sram organisation level.
 
+    The dictionary is decoded into records first, see get_nodes_from_records.
+
     Parameters
     ----------
     sram_org_dict: dict
@@ -67,56 +352,69 @@ def get_nodes_from_dict(sram_org_dict: dict) -> list:
          {"label": str, "created_by": str, "role": str, "create": list[str], "admin_of": list}
 
     """
-    nodes: list[Any] = []
-    org = {"node_name": sram_org_dict["name"]}
-    org["label"] = sram_org_dict["short_name"]
-    nodes.append(org)
-    units = sram_org_dict["units"]
-    nodes.append(units)
+    return get_nodes_from_records(Organisation.from_dict(sram_org_dict))
 
-    colls: list[dict[str, Any]] = []
-    users: dict[dict[str, Any]] = {}
-    for entry in sram_org_dict["collaborations"]:
-        if entry["created_by"] not in users:
-            users[entry["created_by"]] = {"admin_of": [], "create": []}
-        users[entry["created_by"]]["create"].append(entry["name"])
-
-        coll = {"node_name": entry["name"]}
-        coll["label"] = entry["name"]
-        coll["edges_from"] = entry["units"]
-        coll["services"] = []
-        for service in entry["services"]:
-            coll["services"].append(service["name"])
-        coll["groups"] = []
-        for group in entry["groups"]:
-            coll["groups"].append(group["name"])
-        coll["users"] = []
-        if "collaboration_memberships" in entry:
-            for u_entry in entry["collaboration_memberships"]:
-                coll["users"].append(u_entry["user"]["uid"])
-                if u_entry["user"]["uid"] not in users:
-                    users[u_entry["user"]["uid"]] = {"admin_of": [], "create": []}
-                if "label" not in users[u_entry["user"]["uid"]]:
-                    users[u_entry["user"]["uid"]]["label"] = u_entry["user"]["username"]
-                if "created_by" not in users[u_entry["user"]["uid"]]:
-                    users[u_entry["user"]["uid"]]["created_by"] = u_entry["created_by"]
-                if u_entry["role"] == "admin":
-                    users[u_entry["user"]["uid"]]["admin_of"].append(entry["name"])
-        else:
-            print(f"INFO: No user info, 'collaboration_memberships' not in {entry['name']}.")
-        colls.append(coll)
 
+def get_nodes_from_records(org: Organisation) -> list:
+    """Extract node names and types from the records of an organisation.
+
+    Returns the list of nodes per type described in get_nodes_from_dict.
+    """
+    nodes: list[Any] = [{"node_name": org.name, "label": org.short_name}, org.units]
+    colls: list[dict[str, Any]] = []
+    users: dict[str, dict[str, Any]] = {}
+    with paused_gc():
+        _collect_nodes(org, colls, users)
     nodes.append(colls)
     nodes.append(users)
     return nodes
 
 
+def _collect_nodes(org: Organisation, colls: list, users: dict):
+    for entry in org.collaborations:
+        name = entry.name
+        creator = users.get(entry.created_by)
+        if creator is None:
+            creator = users[entry.created_by] = {"admin_of": [], "create": []}
+        creator["create"].append(name)
+
+        coll_users: list = []
+        colls.append(
+            {
+                "node_name": name,
+                "label": name,
+                "edges_from": entry.units,
+                "services": entry.services,
+                "groups": entry.groups,
+                "users": coll_users,
+            }
+        )
+        if entry.memberships is None:
+            print(f"INFO: No user info, 'collaboration_memberships' not in {name}.")
+            continue
+        for membership in entry.memberships:
+            uid = membership.user.uid
+            coll_users.append(uid)
+            user = users.get(uid)
+            if user is None:
+                user = users[uid] = {"admin_of": [], "create": []}
+            if "label" not in user:
+                user["label"] = membership.user.username
+            if "created_by" not in user:
+                user["created_by"] = membership.created_by
+            if membership.role == "admin":
+                user["admin_of"].append(name)
+
+
 def nodes_to_graph(nodes_sets: list) -> nx.MultiGraph:
     """Add nodes and their adges to the graph.
 
     Also sets node attributes color_group, node_type and label, which are used
     to create the hierarchical graph and add the coloring.
 
+    The garbage collector is paused while the graph is built: every node and edge
+    allocates attribute dicts that it would otherwise scan over and over again.
+
     Parameters
     ----------
     nodes_sets: list
@@ -137,14 +435,15 @@ def nodes_to_graph(nodes_sets: list) -> nx.MultiGraph:
 
     """
     graph = nx.MultiDiGraph()
-    graph.add_node(
-        nodes_sets[0]["node_name"],
-        label=nodes_sets[0]["label"],
-        node_type="ORGANISATION",
-    )
-    add_units(graph, nodes_sets[1], nodes_sets[0]["node_name"])
-    add_collaborations(graph, nodes_sets[2], nodes_sets[0]["node_name"])
-    add_users(graph, nodes_sets[3])
+    with paused_gc():
+        graph.add_node(
+            nodes_sets[0]["node_name"],
+            label=nodes_sets[0]["label"],
+            node_type="ORGANISATION",
+        )
+        add_units(graph, nodes_sets[1], nodes_sets[0]["node_name"])
+        add_collaborations(graph, nodes_sets[2], nodes_sets[0]["node_name"])
+        add_users(graph, nodes_sets[3])
     return graph
 
 
@@ -163,56 +462,136 @@ def add_collaborations(graph: nx.MultiGraph, collabs: dict, org: str):
 
     Also sets the correct label, color_group and node_type attributes.
     """
+    add_node = graph.add_node
+    add_edge = graph.add_edge
     for coll in collabs:
-        graph.add_node(
-            coll["node_name"],
-            label=coll["label"],
-            node_type="COLLABORATION",
-        )
+        name = coll["node_name"]
+        add_node(name, label=coll["label"], node_type="COLLABORATION")
         edges_from = coll.get("edges_from", [])
         if len(edges_from) > 0:
             for from_node in edges_from:
-                graph.add_edge(from_node, coll["node_name"], edge_type="BACKBONE")
+                add_edge(from_node, name, edge_type="BACKBONE")
         else:
-            graph.add_edge(org, coll["node_name"])
+            add_edge(org, name)
         for service in coll["services"]:
-            graph.add_node(service, color_group="service", label=service, node_type="APPLICATION")
-            graph.add_edge(coll["node_name"], service, edge_type="BACKBONE")
+            add_node(service, color_group="service", label=service, node_type="APPLICATION")
+            add_edge(name, service, edge_type="BACKBONE")
         for group in coll["groups"]:
-            graph.add_node(
-                f'{coll["node_name"]}_{group}',
-                label=group,
-                color_group="group",
-                node_type="CO_GROUP",
-            )
-            graph.add_edge(
-                coll["node_name"],
-                f'{coll["node_name"]}_{group}',
-                edge_type="BACKBONE",
-            )
+            group_node = f"{name}_{group}"
+            add_node(group_node, label=group, color_group="group", node_type="CO_GROUP")
+            add_edge(name, group_node, edge_type="BACKBONE")
         for user in coll["users"]:
-            graph.add_edge(user, coll["node_name"], label="member_of", edge_type="MEMBERS")
+            add_edge(user, name, label="member_of", edge_type="MEMBERS")
 
 
 def add_users(graph: nx.MultiGraph, users: dict):
     """Add users from node_set."""
     # add all user nodes
     for user, u_dict in users.items():
+        is_admin = len(u_dict["admin_of"]) > 0
         graph.add_node(
             user,
-            color_group="admin" if len(u_dict["admin_of"]) > 0 else "user",
+            color_group="admin" if is_admin else "user",
             label=u_dict.get("label", user),
-            node_type="COLL_ADMIN" if len(u_dict["admin_of"]) > 0 else "CO_MEMBER",
+            node_type="COLL_ADMIN" if is_admin else "CO_MEMBER",
         )
 
     # add action edges between users (admin, member) and collaborations
+    add_edge = graph.add_edge
     for user, u_dict in users.items():
         if "created_by" in u_dict and u_dict["created_by"] in graph:
-            graph.add_edge(u_dict["created_by"], user, label="invite", edge_type="ACTIONS")
+            add_edge(u_dict["created_by"], user, label="invite", edge_type="ACTIONS")
         for item in u_dict["admin_of"]:
-            graph.add_edge(user, item, edge_type="BACKBONE")
+            add_edge(user, item, edge_type="BACKBONE")
         for item in u_dict["create"]:
-            graph.add_edge(user, item, label="create", edge_type="ACTIONS")
+            add_edge(user, item, label="create", edge_type="ACTIONS")
+
+
+def compress_users(graph: nx.MultiDiGraph, user_types: tuple = USER_NODE_TYPES) -> nx.MultiDiGraph:
+    """Collapse users with the same memberships and roles into one node per class.
+
+    The signature of a user is its node type and colour group and the multiset of its
+    edges to other nodes than users, e.g. member_of and admin edges to collaborations
+    and create edges. Users with the same signature form a class; a class of more
+    than one user becomes a single node with the attributes of its first user and
+
+    - count: the number of users in the class,
+    - members: their node names,
+    - label: "<count> users".
+
+    The edges of a class are mapped onto its node, edges that become identical (same
+    end points, edge_type and label) are merged into one edge with weight, the number
+    of merged edges. Invites between users of the same class are dropped. Users in
+    classes of one, all other nodes and edges and their attributes are copied
+    unchanged, the input graph is not modified.
+
+    Parameters
+    ----------
+    graph: MultiDiGraph
+        Graph of an organisation, see nodes_to_graph.
+    user_types: tuple
+        Node types of the users that are compressed.
+
+    Returns
+    -------
+    The quotient graph: MultiDiGraph
+
+    """
+    node_types = dict(graph.nodes(data="node_type"))
+    classes: dict = {}
+    for node, attrs in graph.nodes(data=True):
+        if attrs.get("node_type") not in user_types:
+            continue
+        edges = Counter(
+            (direction, nbr, edge.get("edge_type"), edge.get("label"))
+            for direction, adj in (("out", graph.succ[node]), ("in", graph.pred[node]))
+            for nbr, keydict in adj.items()
+            if node_types.get(nbr) not in user_types
+            for edge in keydict.values()
+        )
+        signature = (attrs.get("node_type"), attrs.get("color_group"), frozenset(edges.items()))
+        classes.setdefault(signature, []).append(node)
+
+    class_of: dict = {}
+    class_attrs: dict = {}
+    for members in classes.values():
+        if len(members) == 1:
+            continue
+        name = f"{members[0]} +{len(members) - 1}"
+        class_attrs[name] = {
+            **graph.nodes[members[0]],
+            "label": f"{len(members)} users",
+            "count": len(members),
+            "members": members,
+        }
+        for member in members:
+            class_of[member] = name
+
+    quotient = nx.MultiDiGraph()
+    quotient.graph.update(graph.graph)
+    # a class takes the place of its first user in the node order
+    quotient.add_nodes_from(
+        (class_of[node], class_attrs[class_of[node]]) if node in class_of else (node, attrs)
+        for node, attrs in graph.nodes(data=True)
+        if node not in class_of or class_attrs[class_of[node]]["members"][0] == node
+    )
+    edges: list = []
+    merged: dict = {}
+    for u, v, attrs in graph.edges(data=True):
+        if u not in class_of and v not in class_of:
+            edges.append((u, v, attrs))
+            continue
+        cu, cv = class_of.get(u, u), class_of.get(v, v)
+        if cu == cv:
+            continue
+        key = (cu, cv, attrs.get("edge_type"), attrs.get("label"))
+        if key in merged:
+            merged[key]["weight"] = merged[key].get("weight", 1) + 1
+        else:
+            merged[key] = dict(attrs)
+            edges.append((cu, cv, merged[key]))
+    quotient.add_edges_from(edges)
+    return quotient
 
 
 def stats_dict(nodes: list) -> dict:
@@ -224,19 +603,28 @@ def stats_dict(nodes: list) -> dict:
     stats["collaborations"]["names"] = [coll["node_name"] for coll in nodes[2]]
     stats["users"] = len(set(u_list for coll in nodes[2] for u_list in coll["users"]))
 
+    # one pass over the collaborations and users instead of one per unit and collaboration
+    unit_colls = {unit: 0 for unit in nodes[1]}
+    unit_users = {unit: set() for unit in nodes[1]}
+    coll_dicts = {}
+    for coll in nodes[2]:
+        coll_dicts.setdefault(coll["node_name"], coll)
+        for unit in set(coll["edges_from"]):
+            if unit in unit_colls:
+                unit_colls[unit] += 1
+                unit_users[unit].update(coll["users"])
+    admins = Counter(coll for u_dict in nodes[3].values() for coll in set(u_dict["admin_of"]))
+
     for unit in stats["units"]["names"]:
         stats["units"][unit] = {}
-        colls = [coll for coll in nodes[2] if unit in coll["edges_from"]]
-        stats["units"][unit]["collaborations"] = len(colls)
-        users = set(u_list for coll in colls for u_list in coll["users"])
-        stats["units"][unit]["users"] = len(users)
+        stats["units"][unit]["collaborations"] = unit_colls[unit]
+        stats["units"][unit]["users"] = len(unit_users[unit])
 
     for coll in stats["collaborations"]["names"]:
         stats["collaborations"][coll] = {}
-        coll_dict = [c for c in nodes[2] if c["node_name"] == coll][0]
+        coll_dict = coll_dicts[coll]
         stats["collaborations"][coll]["users"] = len(coll_dict["users"])
         stats["collaborations"][coll]["groups"] = len(coll_dict["groups"])
-        stats["collaborations"][coll]["admins"] = len([u for u in nodes[3]
-                                                            if coll in nodes[3][u]["admin_of"]])
+        stats["collaborations"][coll]["admins"] = admins[coll]
 
     return json.dumps(stats, indent=4)
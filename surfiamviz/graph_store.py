@@ -0,0 +1,401 @@
+"""SQLite store of the graph of an organisation, for exports that do not fit in memory.
+
+An export is read one collaboration at a time (see iter_organisation_json) and
+written in batches into indexed tables, in a single transaction:
+
+    meta            name, short_name and units of the organisation
+    nodes           id, name, node_type, label, color_group of the nodes of nodes_to_graph
+    edges           src, dst, edge_type, label, indexed by src, dst and edge_type
+    collaborations  the collaborations in the order of the export, with their number of groups
+    memberships     collaboration, user and role
+    users           username and inviter of the users with a membership
+
+Subgraphs (with the semantics of utils.subgraph), neighbourhoods (utils.ego_network)
+and the statistics of stats_dict are SQL queries; only the selected nodes and edges
+are turned into a networkx graph. The materialised graphs have the nodes, edges and
+attributes of the same part of the graph of nodes_to_graph.
+
+During the ingest the node ids are kept in a dictionary by node name, which is much
+smaller than the decoded export or its graph.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Union
+
+import networkx as nx
+
+from surfiamviz.graph_from_sram_json import iter_organisation_json
+from surfiamviz.records import Collaboration, paused_gc
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS nodes (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, node_type TEXT, label TEXT, color_group TEXT
+);
+CREATE TABLE IF NOT EXISTS edges (src INTEGER NOT NULL, dst INTEGER NOT NULL, edge_type TEXT, label TEXT);
+CREATE TABLE IF NOT EXISTS collaborations (id INTEGER PRIMARY KEY, node INTEGER NOT NULL, groups INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS collaboration_units (coll INTEGER NOT NULL, unit TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS memberships (coll INTEGER NOT NULL, user INTEGER NOT NULL, role TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS users (node INTEGER PRIMARY KEY, username TEXT, created_by TEXT);
+"""
+
+# created after the bulk insert, which is faster than updating them row by row
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS edges_src ON edges (src);
+CREATE INDEX IF NOT EXISTS edges_dst ON edges (dst);
+CREATE INDEX IF NOT EXISTS edges_type ON edges (edge_type);
+CREATE INDEX IF NOT EXISTS nodes_type ON nodes (node_type);
+CREATE INDEX IF NOT EXISTS nodes_label ON nodes (label);
+CREATE INDEX IF NOT EXISTS memberships_coll ON memberships (coll);
+CREATE INDEX IF NOT EXISTS memberships_user ON memberships (user);
+CREATE INDEX IF NOT EXISTS collaboration_units_unit ON collaboration_units (unit);
+"""
+
+
+def _user_attrs(uid: str) -> tuple:
+    """Node attributes (node_type, label, color_group) of a user before its memberships are known."""
+    return ("CO_MEMBER", uid, "user")
+
+
+class _Ingest:
+    """Rows of one ingest, written to the database in batches."""
+
+    def __init__(self, connection: sqlite3.Connection, batch_size: int):
+        self.connection = connection
+        self.batch_size = batch_size
+        # node name -> [id, (node_type, label, color_group)]
+        self.nodes: dict = {}
+        tables = ("nodes", "updates", "edges", "colls", "units", "members", "users")
+        self.rows: dict = {table: [] for table in tables}
+
+    def node(self, name: str, attrs: tuple = (None, None, None)) -> int:
+        """Return the id of the node, later attributes update earlier ones like graph.add_node.
+
+        attrs are (node_type, label, color_group), None leaves an attribute unchanged.
+        """
+        entry = self.nodes.get(name)
+        if entry is None:
+            node_id = len(self.nodes) + 1
+            self.nodes[name] = [node_id, attrs]
+            self.rows["nodes"].append((node_id, name, *attrs))
+            return node_id
+        if attrs in (entry[1], (None, None, None)):
+            return entry[0]
+        merged = tuple(new if new is not None else old for old, new in zip(entry[1], attrs))
+        if merged != entry[1]:
+            entry[1] = merged
+            self.rows["updates"].append((*merged, entry[0]))
+        return entry[0]
+
+    def flush_if_full(self):
+        """Write the collected rows if there are batch_size or more."""
+        if sum(len(rows) for rows in self.rows.values()) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the collected rows, nodes before their updates."""
+        statements = {
+            "nodes": "INSERT INTO nodes VALUES (?, ?, ?, ?, ?)",
+            "updates": "UPDATE nodes SET node_type = ?, label = ?, color_group = ? WHERE id = ?",
+            "edges": "INSERT INTO edges VALUES (?, ?, ?, ?)",
+            "colls": "INSERT INTO collaborations VALUES (?, ?, ?)",
+            "units": "INSERT INTO collaboration_units VALUES (?, ?)",
+            "members": "INSERT INTO memberships VALUES (?, ?, ?)",
+            # the first membership of a user sets its label and inviter
+            "users": "INSERT OR IGNORE INTO users VALUES (?, ?, ?)",
+        }
+        for table, statement in statements.items():
+            if self.rows[table]:
+                self.connection.executemany(statement, self.rows[table])
+                self.rows[table].clear()
+
+
+class GraphStore:
+    """Graph of one organisation in an SQLite database."""
+
+    def __init__(self, path: Union[str, Path]):
+        """Open the database, it is created if it does not exist. Use ":memory:" for a temporary store."""
+        self.path = path
+        self.connection = sqlite3.connect(str(path))
+        self.connection.executescript(_SCHEMA)
+
+    def __enter__(self):
+        """Use the store in a with statement, the connection is closed at the end."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the connection."""
+        self.close()
+
+    def close(self):
+        """Close the connection to the database."""
+        self.connection.close()
+
+    def _meta(self, key: str):
+        row = self.connection.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError("The store holds no organisation, ingest an export first.")
+        return json.loads(row[0])
+
+    def ingest(self, fpath: Union[str, Path], batch_size: int = 100000) -> dict:
+        """Read an sram json export into the store, one collaboration at a time.
+
+        The store must be empty, raises ValueError otherwise. Returns the number of
+        nodes, edges and memberships.
+        """
+        fields: dict = {}
+
+        def collaborations():
+            for key, value in iter_organisation_json(fpath):
+                if key == "collaborations":
+                    # a new dictionary of users per collaboration, the store keeps the first username
+                    yield Collaboration.from_dict(value)
+                elif key in ("name", "short_name", "units"):
+                    fields[key] = value
+
+        return self.ingest_records(fields, collaborations(), batch_size)
+
+    def ingest_records(self, fields: dict, collaborations: Iterable, batch_size: int = 100000) -> dict:
+        """Write the organisation fields and collaboration records, see ingest.
+
+        fields holds name, short_name and units, it may be filled while iterating
+        over collaborations; the organisation node is written at the end.
+        """
+        connection = self.connection
+        if connection.execute("SELECT 1 FROM meta").fetchone() is not None:
+            raise ValueError(f"{self.path} holds an organisation already.")
+        # bulk load: one transaction, no journal on disk, indexes afterwards
+        connection.execute("PRAGMA journal_mode = MEMORY")
+        connection.execute("PRAGMA synchronous = OFF")
+        rows = _Ingest(connection, batch_size)
+        # the organisation is the first node, its name is updated at the end
+        org = rows.node("\0organisation")
+        with connection, paused_gc():
+            for coll_id, entry in enumerate(collaborations, start=1):
+                self._ingest_collaboration(rows, org, coll_id, entry)
+                rows.flush_if_full()
+            for unit in fields.get("units", []):
+                rows.rows["edges"].append((org, rows.node(unit, ("UNIT", unit, None)), "BACKBONE", None))
+            rows.flush()
+            self._name_organisation(rows, org, fields["name"], fields["short_name"])
+            connection.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [(key, json.dumps(fields[key])) for key in ("name", "short_name", "units")],
+            )
+            self._finish_users()
+            # executescript would commit the transaction
+            for statement in _INDEXES.split(";"):
+                if statement.strip():
+                    connection.execute(statement)
+        connection.execute("PRAGMA synchronous = FULL")
+        connection.execute("PRAGMA journal_mode = DELETE")
+        return self.counts()
+
+    def _name_organisation(self, rows: _Ingest, org: int, name: str, short_name: str):
+        """Rename the organisation node, merge it into an earlier node with the same name."""
+        execute = self.connection.execute
+        if name in rows.nodes:
+            # like graph.add_node, the organisation attributes update those of the node
+            node = rows.nodes[name][0]
+            execute("UPDATE edges SET src = ? WHERE src = ?", (node, org))
+            execute("UPDATE edges SET dst = ? WHERE dst = ?", (node, org))
+            execute("DELETE FROM nodes WHERE id = ?", (org,))
+            org = node
+        execute(
+            "UPDATE nodes SET name = ?, node_type = 'ORGANISATION', label = ? WHERE id = ?",
+            (name, short_name, org),
+        )
+
+    @staticmethod
+    def _ingest_collaboration(rows: _Ingest, org: int, coll_id: int, entry: Collaboration):
+        """Add the rows of a collaboration in the order of get_nodes_from_records and nodes_to_graph."""
+        name = entry.name
+        node = rows.node
+        add_edge = rows.rows["edges"].append
+        creator = node(entry.created_by, _user_attrs(entry.created_by))
+        coll = node(name, ("COLLABORATION", name, None))
+        rows.rows["colls"].append((coll_id, coll, len(entry.groups)))
+        for unit in entry.units:
+            rows.rows["units"].append((coll_id, unit))
+            add_edge((node(unit), coll, "BACKBONE", None))
+        if not entry.units:
+            add_edge((org, coll, None, None))
+        for service in entry.services:
+            add_edge((coll, node(service, ("APPLICATION", service, "service")), "BACKBONE", None))
+        for group in entry.groups:
+            add_edge((coll, node(f"{name}_{group}", ("CO_GROUP", group, "group")), "BACKBONE", None))
+        add_edge((creator, coll, "ACTIONS", "create"))
+        if entry.memberships is None:
+            print(f"INFO: No user info, 'collaboration_memberships' not in {name}.")
+            return
+        add_member = rows.rows["members"].append
+        add_user = rows.rows["users"].append
+        for membership in entry.memberships:
+            uid = membership.user.uid
+            user = node(uid, _user_attrs(uid))
+            add_member((coll_id, user, membership.role))
+            add_user((user, membership.user.username, membership.created_by))
+            add_edge((user, coll, "MEMBERS", "member_of"))
+            if membership.role == "admin":
+                add_edge((user, coll, "BACKBONE", None))
+
+    def _finish_users(self):
+        """Set the labels and types of the users and add the invite edges, like add_users."""
+        execute = self.connection.execute
+        execute("UPDATE nodes SET label = users.username FROM users WHERE nodes.id = users.node")
+        execute(
+            "UPDATE nodes SET node_type = 'COLL_ADMIN', color_group = 'admin' "
+            "WHERE id IN (SELECT user FROM memberships WHERE role = 'admin')"
+        )
+        execute(
+            "INSERT INTO edges SELECT inviter.id, users.node, 'ACTIONS', 'invite' "
+            "FROM users JOIN nodes AS inviter ON inviter.name = users.created_by"
+        )
+
+    def counts(self) -> dict:
+        """Return the number of nodes, edges and memberships."""
+        return {
+            table: self.connection.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("nodes", "edges", "memberships")
+        }
+
+    def _materialise(self, node_query: str, params: tuple, edge_types: list = None) -> nx.MultiDiGraph:
+        """Return the graph of the nodes selected by node_query (ids) and the edges between them."""
+        connection = self.connection
+        connection.execute("DROP TABLE IF EXISTS temp.selected")
+        connection.execute("CREATE TEMP TABLE selected (id INTEGER PRIMARY KEY)")
+        connection.execute(f"INSERT OR IGNORE INTO temp.selected {node_query}", params)
+        edge_filter = ""
+        if edge_types:
+            # like utils.subgraph, edges without an edge type are kept
+            placeholders = ", ".join("?" * len(edge_types))
+            edge_filter = f"AND (e.edge_type IN ({placeholders}) OR e.edge_type IS NULL)"
+        graph = nx.MultiDiGraph()
+        names = {}
+        # networkx copies the attributes, the dictionaries are shared between edges of the same kind
+        edge_attrs: dict = {}
+        add_edge = graph.add_edge
+        for node_id, name, node_type, label, color_group in connection.execute(
+            "SELECT n.id, n.name, n.node_type, n.label, n.color_group FROM nodes AS n "
+            "JOIN temp.selected AS s ON s.id = n.id ORDER BY n.id"
+        ):
+            names[node_id] = name
+            attrs = {"node_type": node_type, "label": label, "color_group": color_group}
+            graph.add_node(name, **{key: value for key, value in attrs.items() if value is not None})
+        for src, dst, edge_type, label in connection.execute(
+            # CROSS JOIN makes SQLite look up the edges of the selected nodes in the index
+            "SELECT e.src, e.dst, e.edge_type, e.label FROM temp.selected AS s "
+            "CROSS JOIN edges AS e ON e.src = s.id JOIN temp.selected AS d ON d.id = e.dst "
+            f"WHERE 1 {edge_filter}",
+            tuple(edge_types or ()),
+        ):
+            attrs = edge_attrs.get((edge_type, label))
+            if attrs is None:
+                attrs = {"edge_type": edge_type, "label": label}
+                attrs = edge_attrs[(edge_type, label)] = {
+                    key: value for key, value in attrs.items() if value is not None
+                }
+            add_edge(names[src], names[dst], **attrs)
+        connection.execute("DROP TABLE temp.selected")
+        return graph
+
+    def subgraph(self, edge_types: list, node_types: list) -> nx.MultiDiGraph:
+        """Return the nodes of node_types and the edges of edge_types between them, see utils.subgraph.
+
+        Empty lists select all nodes or edges.
+        """
+        if not node_types:
+            return self._materialise("SELECT id FROM nodes", (), edge_types)
+        placeholders = ", ".join("?" * len(node_types))
+        return self._materialise(
+            f"SELECT id FROM nodes WHERE node_type IN ({placeholders})", tuple(node_types), edge_types
+        )
+
+    def find_node(self, name: str) -> int:
+        """Return the id of the node called name, or of the only node with label name, see utils.find_node."""
+        row = self.connection.execute("SELECT id FROM nodes WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        matches = self.connection.execute("SELECT id, name FROM nodes WHERE label = ?", (name,)).fetchall()
+        if len(matches) == 1:
+            return matches[0][0]
+        if not matches:
+            raise KeyError(f"No node with name or label {name}.")
+        raise KeyError(f"Label {name} is not unique, use one of the node names {[m[1] for m in matches]}.")
+
+    def ego_network(self, center: str, hops: int = 2) -> nx.MultiDiGraph:
+        """Return the neighbourhood of center up to hops edges away, see utils.ego_network.
+
+        One query per hop finds the neighbours of the frontier through the edge indexes.
+        """
+        connection = self.connection
+        connection.execute("DROP TABLE IF EXISTS temp.found")
+        connection.execute("DROP TABLE IF EXISTS temp.frontier")
+        connection.execute("CREATE TEMP TABLE found (id INTEGER PRIMARY KEY)")
+        connection.execute("CREATE TEMP TABLE frontier (id INTEGER PRIMARY KEY)")
+        center_id = self.find_node(center)
+        connection.execute("INSERT INTO temp.found VALUES (?)", (center_id,))
+        connection.execute("INSERT INTO temp.frontier VALUES (?)", (center_id,))
+        for _ in range(hops):
+            connection.execute(
+                "CREATE TEMP TABLE next_frontier AS "
+                "SELECT e.dst AS id FROM temp.frontier AS f CROSS JOIN edges AS e ON e.src = f.id "
+                "UNION SELECT e.src FROM temp.frontier AS f CROSS JOIN edges AS e ON e.dst = f.id"
+            )
+            connection.execute("DELETE FROM temp.frontier")
+            connection.execute(
+                "INSERT INTO temp.frontier SELECT id FROM temp.next_frontier WHERE id NOT IN temp.found"
+            )
+            connection.execute("DROP TABLE temp.next_frontier")
+            if connection.execute("SELECT count(*) FROM temp.frontier").fetchone()[0] == 0:
+                break
+            connection.execute("INSERT INTO temp.found SELECT id FROM temp.frontier")
+        graph = self._materialise("SELECT id FROM temp.found", ())
+        connection.execute("DROP TABLE temp.found")
+        connection.execute("DROP TABLE temp.frontier")
+        return graph
+
+    def stats(self) -> str:
+        """Return the statistics of stats_dict as json, computed with SQL queries."""
+        connection = self.connection
+        units = self._meta("units")
+        colls = connection.execute(
+            "SELECT c.id, n.name, c.groups FROM collaborations AS c JOIN nodes AS n ON n.id = c.node "
+            "ORDER BY c.id"
+        ).fetchall()
+        stats: dict = {"units": {"names": units}, "collaborations": {"names": [name for _, name, _ in colls]}}
+        stats["users"] = connection.execute("SELECT count(DISTINCT user) FROM memberships").fetchone()[0]
+
+        unit_counts = dict.fromkeys(units, (0, 0))
+        unit_counts.update(
+            (unit, (n_colls, n_users))
+            for unit, n_colls, n_users in connection.execute(
+                "SELECT cu.unit, count(DISTINCT cu.coll), count(DISTINCT m.user) "
+                "FROM collaboration_units AS cu LEFT JOIN memberships AS m ON m.coll = cu.coll "
+                "GROUP BY cu.unit"
+            )
+            if unit in unit_counts
+        )
+        for unit in units:
+            stats["units"][unit] = {"collaborations": unit_counts[unit][0], "users": unit_counts[unit][1]}
+
+        users = dict(connection.execute("SELECT coll, count(*) FROM memberships GROUP BY coll"))
+        # admins count per collaboration name, the users of a name are those of its first collaboration
+        admins = dict(
+            connection.execute(
+                "SELECT n.name, count(DISTINCT m.user) FROM memberships AS m "
+                "JOIN collaborations AS c ON c.id = m.coll JOIN nodes AS n ON n.id = c.node "
+                "WHERE m.role = 'admin' GROUP BY n.name"
+            )
+        )
+        for coll_id, name, groups in colls:
+            if name in stats["collaborations"]:
+                continue
+            stats["collaborations"][name] = {
+                "users": users.get(coll_id, 0),
+                "groups": groups,
+                "admins": admins.get(name, 0),
+            }
+        return json.dumps(stats, indent=4)
@@ -0,0 +1,233 @@
+"""History of an organisation over a series of SRAM exports.
+
+Each export is reduced with get_nodes_from_dict to a snapshot of facts: the units,
+the collaborations with their units, services, groups and creator, the users and
+the memberships with their role. The store keeps the first snapshot and, for every
+later export, only the facts that were added, changed or removed:
+
+    <store>/manifest.json          dates and growth statistics per date
+    <store>/base.json.gz           snapshot of the first date
+    <store>/deltas/<date>.json.gz  {"set": {fact: value}, "del": [fact, ...]}
+
+Growth statistics are computed on ingest and read from the manifest, the graph at
+a date is rebuilt by applying the deltas up to that date to the base snapshot and
+the access history of a user is found in the deltas. No export is parsed again.
+"""
+
+import gzip
+import json
+from pathlib import Path
+from typing import Iterator, Union
+
+import networkx as nx
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+
+# Facts are keys of the form kind<TAB>name[<TAB>name]:
+#   org                     {"node_name": str, "label": str}
+#   unit<TAB>unit           1
+#   coll<TAB>coll           {"label", "edges_from", "services", "groups", "created_by"}
+#   user<TAB>uid            {"label", "created_by"} (if known)
+#   member<TAB>coll<TAB>uid "admin" or "member"
+_SEP = "\t"
+
+
+def nodes_to_facts(nodes: list) -> dict:
+    """Reduce the output of get_nodes_from_dict to a dictionary of facts."""
+    org, units, colls, users = nodes
+    creators = {coll: uid for uid, u_dict in users.items() for coll in u_dict["create"]}
+    facts: dict = {"org": dict(org)}
+    for unit in units:
+        facts[f"unit{_SEP}{unit}"] = 1
+    for coll in colls:
+        name = coll["node_name"]
+        facts[f"coll{_SEP}{name}"] = {
+            "label": coll["label"],
+            "edges_from": list(coll["edges_from"]),
+            "services": list(coll["services"]),
+            "groups": list(coll["groups"]),
+            "created_by": creators.get(name),
+        }
+        for uid in coll["users"]:
+            role = "admin" if name in users[uid]["admin_of"] else "member"
+            facts[f"member{_SEP}{name}{_SEP}{uid}"] = role
+    for uid, u_dict in users.items():
+        facts[f"user{_SEP}{uid}"] = {key: u_dict[key] for key in ("label", "created_by") if key in u_dict}
+    return facts
+
+
+def facts_to_nodes(facts: dict) -> list:
+    """Rebuild the nodes list of get_nodes_from_dict from a dictionary of facts."""
+    units, colls, users, members = [], {}, {}, []
+    for key, value in facts.items():
+        kind, _, rest = key.partition(_SEP)
+        if kind == "unit":
+            units.append(rest)
+        elif kind == "coll":
+            colls[rest] = {
+                "node_name": rest,
+                "label": value["label"],
+                "edges_from": value["edges_from"],
+                "services": value["services"],
+                "groups": value["groups"],
+                "users": [],
+            }
+        elif kind == "user":
+            users[rest] = {"admin_of": [], "create": [], **value}
+        elif kind == "member":
+            members.append((*rest.split(_SEP), value))
+    # users are complete only after the loop, creators and members refer to them
+    for name, coll in colls.items():
+        creator = facts[f"coll{_SEP}{name}"]["created_by"]
+        if creator is not None:
+            users[creator]["create"].append(name)
+    for coll, uid, role in members:
+        colls[coll]["users"].append(uid)
+        if role == "admin":
+            users[uid]["admin_of"].append(coll)
+    return [dict(facts["org"]), units, list(colls.values()), users]
+
+
+def facts_delta(old: dict, new: dict) -> dict:
+    """Return the delta that turns the facts old into new."""
+    return {
+        "set": {key: value for key, value in new.items() if old.get(key) != value},
+        "del": [key for key in old if key not in new],
+    }
+
+
+def apply_delta(facts: dict, delta: dict):
+    """Apply a delta to facts in place."""
+    for key in delta["del"]:
+        facts.pop(key, None)
+    facts.update(delta["set"])
+
+
+def growth_stats(facts: dict) -> dict:
+    """Count units, collaborations, users, memberships, admin roles and services."""
+    counts = {"units": 0, "collaborations": 0, "users": 0, "memberships": 0, "admins": 0, "services": 0}
+    members, services = set(), set()
+    for key, value in facts.items():
+        kind, _, rest = key.partition(_SEP)
+        if kind == "unit":
+            counts["units"] += 1
+        elif kind == "coll":
+            counts["collaborations"] += 1
+            services.update(value["services"])
+        elif kind == "member":
+            counts["memberships"] += 1
+            counts["admins"] += value == "admin"
+            members.add(rest.split(_SEP)[1])
+    counts["users"] = len(members)
+    counts["services"] = len(services)
+    return counts
+
+
+def _write_gzip_json(path: Path, data):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def _read_gzip_json(path: Path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class HistoryStore:
+    """Delta encoded history of the exports of one organisation.
+
+    Dates are ISO strings (YYYY-MM-DD) and must be ingested in increasing order.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        """Open the store in directory, it is created on the first ingest."""
+        self.directory = Path(directory)
+        manifest_path = self.directory / "manifest.json"
+        if manifest_path.is_file():
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self._manifest = json.load(f)
+        else:
+            self._manifest = {"dates": [], "stats": {}}
+        # facts of the latest date, loaded on first ingest
+        self._latest: dict = None
+
+    @property
+    def dates(self) -> list:
+        """The ingested dates in increasing order."""
+        return list(self._manifest["dates"])
+
+    def _delta_path(self, date: str) -> Path:
+        return self.directory / "deltas" / f"{date}.json.gz"
+
+    def _iter_deltas(self, until: str = None) -> Iterator[tuple]:
+        """Yield (date, delta) starting with the base snapshot as delta of the first date."""
+        for i, date in enumerate(self._manifest["dates"]):
+            if until is not None and date > until:
+                return
+            if i == 0:
+                yield date, {"set": _read_gzip_json(self.directory / "base.json.gz"), "del": []}
+            else:
+                yield date, _read_gzip_json(self._delta_path(date))
+
+    def facts_at(self, date: str) -> dict:
+        """Return the facts of the latest export on or before date."""
+        if not self._manifest["dates"] or date < self._manifest["dates"][0]:
+            raise KeyError(f"No export on or before {date}.")
+        facts: dict = {}
+        for _, delta in self._iter_deltas(until=date):
+            apply_delta(facts, delta)
+        return facts
+
+    def ingest(self, date: str, sram_dict: dict) -> dict:
+        """Add the export of date, returns the growth statistics of that date."""
+        dates = self._manifest["dates"]
+        if dates and date <= dates[-1]:
+            raise ValueError(f"Date {date} is not after the last ingested date {dates[-1]}.")
+        facts = nodes_to_facts(get_nodes_from_dict(sram_dict))
+        (self.directory / "deltas").mkdir(parents=True, exist_ok=True)
+        if not dates:
+            _write_gzip_json(self.directory / "base.json.gz", facts)
+        else:
+            if self._latest is None:
+                self._latest = self.facts_at(dates[-1])
+            _write_gzip_json(self._delta_path(date), facts_delta(self._latest, facts))
+        self._latest = facts
+        stats = growth_stats(facts)
+        dates.append(date)
+        self._manifest["stats"][date] = stats
+        with open(self.directory / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=1)
+        return stats
+
+    def graph_at(self, date: str) -> nx.MultiDiGraph:
+        """Return the graph of the organisation on date."""
+        return nodes_to_graph(facts_to_nodes(self.facts_at(date)))
+
+    def growth(self) -> dict:
+        """Return the growth statistics per date."""
+        return {date: dict(self._manifest["stats"][date]) for date in self._manifest["dates"]}
+
+    def access_history(self, user: str, collaboration: str) -> list:
+        """Return the periods user was member of collaboration.
+
+        Returns
+        -------
+        List of [first date, end date, role] per period; the end date is the first
+        date without the membership, None if the membership still exists. A change
+        of role starts a new period.
+
+        """
+        key = f"member{_SEP}{collaboration}{_SEP}{user}"
+        periods: list = []
+        for date, delta in self._iter_deltas():
+            if key in delta["set"]:
+                if periods and periods[-1][1] is None:
+                    periods[-1][1] = date
+                periods.append([date, None, delta["set"][key]])
+            elif key in delta["del"] and periods:
+                periods[-1][1] = date
+        return periods
+
+    def disk_usage(self) -> int:
+        """Return the number of bytes used by the store."""
+        return sum(path.stat().st_size for path in self.directory.rglob("*") if path.is_file())
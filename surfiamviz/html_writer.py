@@ -0,0 +1,105 @@
+"""Write gravis html files without holding the whole document in memory.
+
+gravis converts the graph into a gJGF dictionary, dumps it to one json string and
+inserts it into its html template. For large graphs this document is much larger
+than the graph itself. Here the template is rendered once for an empty placeholder
+graph and the node and edge json is written piece by piece in between, through a
+buffer of fixed size. The result is the same html gravis would write.
+"""
+
+import json
+from pathlib import Path
+from typing import IO, Iterator, Union
+
+import gravis as gv
+import networkx as nx
+
+# An empty gJGF graph with a label that does not occur in the gravis template.
+_PLACEHOLDER_LABEL = "surfiamviz-streamed-graph-data"
+_PLACEHOLDER = {"graph": {"directed": True, "label": _PLACEHOLDER_LABEL, "nodes": {}, "edges": []}}
+
+
+def _split_template(vis_kwargs: dict) -> tuple:
+    """Render the html for the placeholder graph and split it around the graph data."""
+    html_text = gv.vis(_PLACEHOLDER, **vis_kwargs).to_html_standalone()
+    marker = json.dumps([_PLACEHOLDER["graph"]])
+    if html_text.count(marker) != 1:
+        raise ValueError("Cannot locate the graph data in the gravis template.")
+    head, tail = html_text.split(marker)
+    return head, tail
+
+
+def _iter_gjgf_json(graph: nx.Graph) -> Iterator[str]:
+    """Yield the gJGF json of the graph in pieces, the same text gravis generates.
+
+    Mirrors gravis' networkx conversion: the node label and the edge keys id, label,
+    relation and directed stay on the data level, all other attributes go into metadata.
+    """
+    yield '[{"nodes": {'
+    for i, (node, attrs) in enumerate(graph.nodes(data=True)):
+        node_dict = {}
+        if attrs:
+            metadata = dict(attrs)
+            if "label" in metadata:
+                node_dict["label"] = metadata.pop("label")
+            if metadata:
+                node_dict["metadata"] = metadata
+        yield (", " if i else "") + json.dumps(str(node)) + ": " + json.dumps(node_dict)
+    yield '}, "edges": ['
+    for i, (u, v, attrs) in enumerate(graph.edges(data=True)):
+        edge_dict = {"source": str(u), "target": str(v)}
+        if attrs:
+            metadata = dict(attrs)
+            for key in ("id", "label", "relation", "directed"):
+                if key in metadata:
+                    edge_dict[key] = metadata.pop(key)
+            if metadata:
+                edge_dict["metadata"] = metadata
+        yield (", " if i else "") + json.dumps(edge_dict)
+    yield "], " + json.dumps({"directed": graph.is_directed()})[1:-1]
+    graph_metadata = dict(graph.graph)
+    for key in ("label", "type"):
+        if key in graph_metadata:
+            yield ", " + json.dumps({key: graph_metadata.pop(key)})[1:-1]
+    if graph_metadata:
+        yield ", " + json.dumps({"metadata": graph_metadata})[1:-1]
+    yield "}]"
+
+
+def write_html_stream(graph: nx.Graph, out: IO[str], buffer_size: int = 1 << 16, **vis_kwargs):
+    """Write the gravis html of graph to a writable text stream, e.g. a file or socket.makefile("w").
+
+    Pieces are collected up to buffer_size characters before they are written, so the
+    memory used for the export does not grow with the graph. vis_kwargs are passed to gv.vis.
+    """
+    head, tail = _split_template(vis_kwargs)
+    out.write(head)
+    buffer: list[str] = []
+    size = 0
+    for piece in _iter_gjgf_json(graph):
+        buffer.append(piece)
+        size += len(piece)
+        if size >= buffer_size:
+            out.write("".join(buffer))
+            buffer.clear()
+            size = 0
+    out.write("".join(buffer))
+    out.write(tail)
+
+
+def export_html_streaming(
+    graph: nx.Graph,
+    html_path: Union[str, Path],
+    buffer_size: int = 1 << 16,
+    overwrite: bool = False,
+    **vis_kwargs,
+):
+    """Export the graph as gravis html file, writing the graph data in chunks.
+
+    Like gravis' Figure.export_html an existing file is only replaced with overwrite=True.
+    """
+    html_path = Path(html_path)
+    if not overwrite and html_path.is_file():
+        raise FileExistsError(f"File {html_path} already exists.")
+    with open(html_path, "w", encoding="utf-8", buffering=buffer_size) as f:
+        write_html_stream(graph, f, buffer_size=buffer_size, **vis_kwargs)
@@ -0,0 +1,178 @@
+"""Sparse incidence matrices of an organisation for co-membership analytics.
+
+The memberships of get_nodes_from_dict are stored as two sparse CSR matrices with
+one entry per membership and per connected service:
+
+    memberships     users x collaborations
+    services        collaborations x services
+
+Questions about all pairs of collaborations or all users are answered by sparse
+matrix products instead of loops over the graph, e.g. the number of members two
+collaborations share is memberships.T @ memberships. Its entries are only stored for
+pairs that share at least one member, so the product stays small for organisations
+with many small collaborations. Requires scipy.
+"""
+
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # scipy is optional
+    sp = None
+
+
+def _index(names) -> dict:
+    """Map names to consecutive indices, in the order they are seen first."""
+    index: dict = {}
+    for name in names:
+        index.setdefault(name, len(index))
+    return index
+
+
+def _binary_csr(rows: list, cols: list, shape: tuple):
+    """Return a CSR matrix with ones at (rows, cols), repeated entries count once."""
+    matrix = sp.csr_array((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=shape)
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix
+
+
+class Incidence:
+    """Users x collaborations and collaborations x services incidence matrices."""
+
+    def __init__(self, users: list, collaborations: list, services: list, memberships, coll_services):
+        """Create from the row and column names and the CSR matrices, see from_nodes."""
+        self.users = users
+        self.collaborations = collaborations
+        self.services = services
+        self.memberships = memberships
+        self.coll_services = coll_services
+
+    @classmethod
+    def from_nodes(cls, nodes: list) -> "Incidence":
+        """Build the matrices from the nodes returned by get_nodes_from_dict.
+
+        Users are the members of at least one collaboration, collaborations with the
+        same name share a column. Raises ImportError if scipy is not installed.
+        """
+        if sp is None:
+            raise ImportError("The incidence matrices require scipy, install surfiamviz[fast].")
+        colls = _index(coll["node_name"] for coll in nodes[2])
+        users = _index(uid for coll in nodes[2] for uid in coll["users"])
+        services = _index(service for coll in nodes[2] for service in coll["services"])
+        member_rows, member_cols, service_rows, service_cols = [], [], [], []
+        for coll in nodes[2]:
+            col = colls[coll["node_name"]]
+            member_rows.extend(users[uid] for uid in coll["users"])
+            member_cols.extend([col] * len(coll["users"]))
+            service_rows.extend([col] * len(coll["services"]))
+            service_cols.extend(services[service] for service in coll["services"])
+        return cls(
+            list(users),
+            list(colls),
+            list(services),
+            _binary_csr(member_rows, member_cols, (len(users), len(colls))),
+            _binary_csr(service_rows, service_cols, (len(colls), len(services))),
+        )
+
+    def collaboration_sizes(self) -> np.ndarray:
+        """Return the number of members per collaboration."""
+        return np.diff(self.memberships.tocsc().indptr)
+
+    def collaborations_per_user(self) -> np.ndarray:
+        """Return the number of collaborations per user."""
+        return np.diff(self.memberships.indptr)
+
+    def overlap(self):
+        """Return the collaborations x collaborations CSR matrix of the number of shared members.
+
+        The diagonal holds the number of members of each collaboration.
+        """
+        return (self.memberships.T @ self.memberships).tocsr()
+
+    def users_per_service(self) -> np.ndarray:
+        """Return the number of users that reach each service through their collaborations."""
+        reach = self.memberships @ self.coll_services
+        return np.diff(reach.tocsc().indptr)
+
+    def similar_collaborations(self, k: int = 10, collaboration: str = None) -> list:
+        """Return the k most similar pairs of collaborations by the Jaccard index of their members.
+
+        Parameters
+        ----------
+        k: int
+            Number of pairs.
+        collaboration: str
+            Only pairs with this collaboration, raises KeyError if it does not exist.
+
+        Returns
+        -------
+        List of (collaboration, collaboration, shared members, jaccard), by decreasing
+        jaccard and shared members. Pairs without shared members are left out.
+
+        """
+        sizes = self.collaboration_sizes()
+        if collaboration is None:
+            pairs = sp.triu(self.overlap(), k=1).tocoo()
+            rows, cols, shared = pairs.row, pairs.col, pairs.data
+        else:
+            if collaboration not in self.collaborations:
+                raise KeyError(f"No collaboration {collaboration}.")
+            row = self.collaborations.index(collaboration)
+            # one column of the product instead of the full overlap matrix
+            column = self.memberships[:, [row]]
+            shared_col = (self.memberships.T @ column).tocoo()
+            keep = shared_col.row != row
+            cols = shared_col.row[keep]
+            shared = shared_col.data[keep]
+            rows = np.full(len(cols), row)
+        jaccard = shared / (sizes[rows] + sizes[cols] - shared)
+        top = np.lexsort((-shared, -jaccard))[:k]
+        return [
+            (self.collaborations[rows[i]], self.collaborations[cols[i]], int(shared[i]), float(jaccard[i]))
+            for i in top
+        ]
+
+    def outlier_users(self, threshold: float = 3.5) -> list:
+        """Return users in unusually many collaborations.
+
+        Uses the modified z-score of the number of collaborations per user, based on
+        the median and the median absolute deviation, which are not inflated by the
+        outliers themselves. Returns (uid, collaborations, score) by decreasing score.
+        """
+        counts = self.collaborations_per_user()
+        if len(counts) == 0:
+            return []
+        median = np.median(counts)
+        mad = np.median(np.abs(counts - median))
+        if mad == 0:
+            # most users share the same count, fall back to the mean absolute deviation
+            mad = np.mean(np.abs(counts - median)) / 0.7979
+        if mad == 0:
+            return []
+        scores = 0.6745 * (counts - median) / mad
+        outliers = np.flatnonzero(scores > threshold)
+        outliers = outliers[np.argsort(-scores[outliers], kind="stable")]
+        return [(self.users[i], int(counts[i]), round(float(scores[i]), 2)) for i in outliers]
+
+    def summary(self, k: int = 10, threshold: float = 3.5) -> dict:
+        """Return the co-membership analytics as a dictionary that can be written as json."""
+        per_user = self.collaborations_per_user()
+        return {
+            "users": len(self.users),
+            "collaborations": len(self.collaborations),
+            "memberships": int(self.memberships.nnz),
+            "collaborations_per_user": {
+                "mean": round(float(per_user.mean()), 2) if len(per_user) else 0.0,
+                "max": int(per_user.max()) if len(per_user) else 0,
+            },
+            "similar_collaborations": [
+                {"collaborations": [a, b], "shared_users": shared, "jaccard": round(jaccard, 4)}
+                for a, b, shared, jaccard in self.similar_collaborations(k)
+            ],
+            "outlier_users": [
+                {"uid": uid, "collaborations": count, "score": score}
+                for uid, count, score in self.outlier_users(threshold)
+            ],
+            "users_per_service": dict(zip(self.services, self.users_per_service().tolist())),
+        }
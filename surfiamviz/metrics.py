@@ -0,0 +1,246 @@
+"""Latency, graph size, cache and memory metrics of the webtool and render server.
+
+Metrics are only recorded when they are switched on, either with the environment
+variables below or by creating a Metrics object with enabled=True (as the render
+server does for its /metrics endpoint). Switched off, stage() returns a shared object
+that does nothing, so the instrumented code only pays for one function call.
+
+    SURFIAMVIZ_METRICS      file that is rewritten with the metrics in the Prometheus
+                            text format after each stage
+    SURFIAMVIZ_METRICS_LOG  file to which a json line is appended for each stage,
+                            - for standard error
+
+The metrics are kept per process. Peak memory is the maximum resident set size of
+the process, so for the webtool it covers all sessions.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:
+    # resource is optional, it does not exist on Windows
+    resource = None
+
+# environment variables that switch the metrics of the webtool on
+METRICS_ENV = "SURFIAMVIZ_METRICS"
+METRICS_LOG_ENV = "SURFIAMVIZ_METRICS_LOG"
+
+# upper bounds of the histogram buckets, in seconds and in nodes or edges
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (10, 100, 1000, 10_000, 100_000, 1_000_000)
+
+_HELP = {
+    "surfiamviz_stage_seconds": ("histogram", "Duration of the pipeline stages."),
+    "surfiamviz_graph_nodes": ("histogram", "Number of nodes of the graphs handled by a stage."),
+    "surfiamviz_graph_edges": ("histogram", "Number of edges of the graphs handled by a stage."),
+    "surfiamviz_cache_requests_total": ("counter", "Cache lookups by cache and result (hit or miss)."),
+    "surfiamviz_render_requests_total": ("counter", "Render server requests by cache result."),
+    "surfiamviz_peak_memory_bytes": ("gauge", "Maximum resident set size of the process."),
+}
+
+
+def peak_memory() -> int:
+    """Return the maximum resident set size of the process in bytes, 0 if unknown."""
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kibibytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _label_text(labels: tuple, extra: str = "") -> str:
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _NoStage:
+    """Stage that records nothing, returned while the metrics are switched off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def graph(self, graph):
+        """Return graph unchanged."""
+        return graph
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    """Times a block of code and records it when the block ends."""
+
+    __slots__ = ("metrics", "name", "labels", "sizes", "start")
+
+    def __init__(self, metrics, name: str, labels: dict):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.sizes = None
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.finish(self, time.perf_counter() - self.start, "ok" if exc_type is None else "error")
+        return False
+
+    def graph(self, graph):
+        """Record the number of nodes and edges of graph for this stage and return graph."""
+        self.sizes = (graph.number_of_nodes(), graph.number_of_edges())
+        return graph
+
+
+class Metrics:
+    """Histograms, counters and a json log of the stages of one process."""
+
+    def __init__(self, enabled: bool = False, prometheus_path: str = None, log_path: str = None):
+        """Create empty metrics.
+
+        The metrics are switched on if enabled is True or a file for the Prometheus
+        text or the json log is given.
+        """
+        self.prometheus_path = Path(prometheus_path) if prometheus_path else None
+        self.log_path = log_path
+        self.enabled = bool(enabled or prometheus_path or log_path)
+        self._histograms: dict[tuple, list] = {}
+        self._counters: dict[tuple, float] = {}
+        self._caches: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        """Create the metrics configured by $SURFIAMVIZ_METRICS and $SURFIAMVIZ_METRICS_LOG."""
+        return cls(prometheus_path=os.environ.get(METRICS_ENV), log_path=os.environ.get(METRICS_LOG_ENV))
+
+    def stage(self, name: str, **labels):
+        """Return a context manager that records the duration of a stage.
+
+        Use the graph method of the returned object to record the size of the graph
+        the stage produced or handled. A stage that raises is recorded with
+        status="error".
+        """
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self, name, labels)
+
+    def observe(self, name: str, value: float, buckets: tuple, **labels):
+        """Add value to the histogram name."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # counts per bucket with +Inf last, sum and count
+                histogram = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0, buckets]
+            histogram[0][bisect_left(buckets, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def count(self, name: str, value: float = 1, **labels):
+        """Increase the counter name by value."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def cache_lookup(self, cache: str, hit: bool):
+        """Count a hit or miss of the cache with the given name."""
+        self.count("surfiamviz_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def register_cache(self, name: str, cache):
+        """Report the hits and misses of a ResultCache under name.
+
+        The counters of the cache are read when the metrics are rendered, so the
+        lookups themselves are not slowed down.
+        """
+        self._caches[name] = cache
+
+    def finish(self, timed: _Stage, seconds: float, status: str):
+        """Record a finished stage, write the Prometheus file and log a json line."""
+        labels = dict(timed.labels, stage=timed.name)
+        self.observe("surfiamviz_stage_seconds", seconds, LATENCY_BUCKETS, status=status, **labels)
+        if timed.sizes is not None:
+            self.observe("surfiamviz_graph_nodes", timed.sizes[0], SIZE_BUCKETS, **labels)
+            self.observe("surfiamviz_graph_edges", timed.sizes[1], SIZE_BUCKETS, **labels)
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+        if self.log_path:
+            record = {"time": time.time(), "pid": os.getpid(), **labels, "status": status, "seconds": seconds}
+            if timed.sizes is not None:
+                record["nodes"], record["edges"] = timed.sizes
+            record["peak_memory_bytes"] = peak_memory()
+            self._log(json.dumps(record, default=str))
+
+    def _log(self, line: str):
+        with self._lock:
+            if self.log_path == "-":
+                print(line, file=sys.stderr, flush=True)
+            else:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def render_prometheus(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        samples: dict[str, list] = {name: [] for name in _HELP}
+        with self._lock:
+            for (name, labels), (counts, total, number, buckets) in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    bucket_labels = _label_text(labels, f'le="{bound}"')
+                    samples[name].append(f"{name}_bucket{bucket_labels} {cumulative}")
+                samples[name].append(f"{name}_sum{_label_text(labels)} {total}")
+                samples[name].append(f"{name}_count{_label_text(labels)} {number}")
+            counters = dict(self._counters)
+        for cache_name, cache in self._caches.items():
+            for result, value in (("hit", cache.hits), ("miss", cache.misses)):
+                key = ("surfiamviz_cache_requests_total", (("cache", cache_name), ("result", result)))
+                counters[key] = counters.get(key, 0) + value
+        for (name, labels), value in sorted(counters.items()):
+            samples.setdefault(name, []).append(f"{name}{_label_text(labels)} {value}")
+        samples["surfiamviz_peak_memory_bytes"].append(f"surfiamviz_peak_memory_bytes {peak_memory()}")
+        lines = []
+        for name, name_samples in samples.items():
+            if name_samples:
+                kind, description = _HELP.get(name, ("counter", ""))
+                lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", *name_samples]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Replace the file at path with the metrics in the Prometheus text format."""
+        path = Path(path)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=path.parent, prefix=f".{path.name}.", delete=False
+        ) as tmp:
+            tmp.write(self.render_prometheus())
+        os.replace(tmp.name, path)
+
+
+# metrics of the webtool, switched on by the environment variables
+METRICS = Metrics.from_env()
+
+
+def stage(name: str, **labels):
+    """Return a context manager that records the duration of a stage in METRICS."""
+    return METRICS.stage(name, **labels)
@@ -0,0 +1,162 @@
+"""Precompiled example graphs.
+
+The example graphs are static: they only change when the example file or the
+configuration changes. Every section is built once, with node types, levels,
+colours and inferred collaboration-application edges, and rendered once per plot
+type. The attributed graph (node-link json) and the html files are stored in a
+cache directory under the hash of the example and configuration files:
+
+    <cache_dir>/<files hash>/<section hash>/graph.json
+    <cache_dir>/<files hash>/<section hash>/<plot_type>.html
+
+Missing entries are compiled on first use, the precompile subcommand fills the
+cache in advance.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Union
+
+import networkx as nx
+
+from surfiamviz import __version__
+from surfiamviz.graph_from_config import (
+    add_graph_edges_from_config,
+    import_example_graph,
+    set_node_levels_from_config,
+    set_node_type,
+)
+from surfiamviz.metrics import METRICS
+from surfiamviz.utils import (
+    color_edges,
+    color_nodes,
+    infer_coll_app_edges,
+    read_graph_config,
+    render_editable_network,
+)
+
+PLOT_TYPES = ["bipartite", "greedy", "louvain", "fast"]
+
+# environment variable to change the default cache directory
+CACHE_DIR_ENV = "SURFIAMVIZ_CACHE_DIR"
+
+
+def default_cache_dir() -> Path:
+    """Return the cache directory, $SURFIAMVIZ_CACHE_DIR or ~/.cache/surfiamviz/examples."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV])
+    return Path("~").expanduser() / ".cache" / "surfiamviz" / "examples"
+
+
+def examples_key(examples_path: Union[str, Path], config_path: Union[str, Path]) -> str:
+    """Return the hash of the contents of the example and configuration files.
+
+    The versions of surfiamviz and networkx are part of the hash, so graphs and html
+    files built by an older version are not served after an upgrade.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"surfiamviz {__version__} networkx {nx.__version__}\0".encode())
+    for path in (examples_path, config_path):
+        digest.update(Path(path).read_bytes())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_example_graph(
+    example_graphs: dict, section: str, graph_config: dict, verbose: bool = False
+) -> nx.MultiDiGraph:
+    """Build the graph of a section with node types, levels, colours and inferred edges."""
+    graph = nx.MultiDiGraph()
+    add_graph_edges_from_config(graph, example_graphs, section)
+    set_node_type(graph, graph_config)
+    set_node_levels_from_config(graph, graph_config)
+    color_nodes(graph, graph_config)
+    infer_coll_app_edges(graph, verbose)
+    color_edges(graph, graph_config)
+    return graph
+
+
+def _write_atomic(path: Path, text: str):
+    """Write text to path via a temporary file, readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=path.parent, suffix=".tmp", delete=False
+    ) as tmp:
+        tmp.write(text)
+    os.replace(tmp.name, path)
+
+
+class ExampleCache:
+    """Precompiled graphs and html files of one example file and configuration."""
+
+    def __init__(
+        self,
+        examples_path: Union[str, Path],
+        config_path: Union[str, Path],
+        cache_dir: Union[str, Path] = None,
+    ):
+        """Open the cache entry for the current contents of the example and configuration files."""
+        self.examples_path = Path(examples_path)
+        self.config_path = Path(config_path)
+        self.key = examples_key(examples_path, config_path)
+        self.directory = Path(cache_dir or default_cache_dir()) / self.key
+        self._example_graphs = None
+        self._graph_config = None
+
+    @property
+    def example_graphs(self) -> dict:
+        """The parsed example file, read on first use."""
+        if self._example_graphs is None:
+            self._example_graphs = import_example_graph(self.examples_path)
+        return self._example_graphs
+
+    @property
+    def graph_config(self) -> dict:
+        """The parsed configuration, read on first use."""
+        if self._graph_config is None:
+            self._graph_config = read_graph_config(self.config_path)
+        return self._graph_config
+
+    def _section_dir(self, section: str) -> Path:
+        # section names in toml can contain characters that are not allowed in file names
+        return self.directory / hashlib.blake2b(section.encode(), digest_size=8).hexdigest()
+
+    def graph(self, section: str) -> nx.MultiDiGraph:
+        """Return the attributed graph of section, built and stored if missing."""
+        path = self._section_dir(section) / "graph.json"
+        METRICS.cache_lookup("example_graphs", path.is_file())
+        if path.is_file():
+            with open(path, "r", encoding="utf-8") as f:
+                return nx.node_link_graph(json.load(f), edges="edges")
+        if section not in self.example_graphs:
+            raise KeyError(f"Graph {section} not defined in {self.examples_path}.")
+        graph = build_example_graph(self.example_graphs, section, self.graph_config)
+        _write_atomic(path, json.dumps(nx.node_link_data(graph, edges="edges")))
+        return graph
+
+    def html(self, section: str, plot_type: str = "greedy") -> str:
+        """Return the html of section rendered with plot_type, rendered and stored if missing."""
+        if plot_type not in PLOT_TYPES:
+            raise ValueError(f"Plot type {plot_type} not known, choose from {PLOT_TYPES}.")
+        path = self._section_dir(section) / f"{plot_type}.html"
+        METRICS.cache_lookup("example_html", path.is_file())
+        if not path.is_file():
+            graph = self.graph(section)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                tmp_path = Path(tmp_dir) / "graph.html"
+                render_editable_network(graph, tmp_path, plot_type=plot_type)
+                _write_atomic(path, tmp_path.read_text(encoding="utf-8"))
+        return path.read_text(encoding="utf-8")
+
+    def precompile(self, sections: list = None, plot_types: list = None) -> int:
+        """Render all sections (default all) with all plot types, return the number of new html files."""
+        rendered = 0
+        for section in sections or list(self.example_graphs):
+            for plot_type in plot_types or PLOT_TYPES:
+                if not (self._section_dir(section) / f"{plot_type}.html").is_file():
+                    self.html(section, plot_type)
+                    rendered += 1
+        return rendered
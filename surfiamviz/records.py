@@ -0,0 +1,153 @@
+"""Typed records of an SRAM organisation export.
+
+The export holds many fields the graphs never use, e.g. the accepted user policy,
+timestamps, logos and the attributes of services and groups. The records keep only
+the fields read by get_nodes_from_records and use __slots__, so they are smaller
+than the decoded json dictionaries:
+
+    Organisation(name, short_name, units, collaborations)
+    Collaboration(name, created_by, units, services, groups, memberships)
+    Membership(user, role, created_by)
+    User(uid, username)
+
+A user appears in one membership per collaboration; all memberships of a user
+refer to the same User record. Json is decoded with orjson if it is installed.
+
+Decoding creates millions of small containers but no garbage. Like nodes_to_graph,
+the decoders pause the cyclic garbage collector, which otherwise runs repeated full
+collections and takes more time than the decoding itself.
+"""
+
+import gc
+import json
+from contextlib import contextmanager
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+@contextmanager
+def paused_gc():
+    """Disable the cyclic garbage collector in the block, if it was enabled."""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def json_loads(data: Union[bytes, str]):
+    """Decode json with orjson if installed, otherwise with the json module."""
+    with paused_gc():
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+
+class User:  # pylint: disable=too-few-public-methods
+    """SRAM user, identified by its uid."""
+
+    __slots__ = ("uid", "username")
+
+    def __init__(self, uid: str, username: str):
+        """Create a user."""
+        self.uid = uid
+        self.username = username
+
+    def __repr__(self) -> str:
+        """Return the uid and username."""
+        return f"User({self.uid!r}, {self.username!r})"
+
+
+class Membership:  # pylint: disable=too-few-public-methods
+    """Membership of a user in a collaboration."""
+
+    __slots__ = ("user", "role", "created_by")
+
+    def __init__(self, user: User, role: str, created_by: str):
+        """Create a membership, role is admin or member."""
+        self.user = user
+        self.role = role
+        self.created_by = created_by
+
+    @classmethod
+    def from_dict(cls, entry: dict, users: dict) -> "Membership":
+        """Decode a collaboration membership, users maps uids to the User records seen so far."""
+        user_entry = entry["user"]
+        uid = user_entry["uid"]
+        user = users.get(uid)
+        if user is None:
+            user = users[uid] = User(uid, user_entry["username"])
+        return cls(user, entry["role"], entry["created_by"])
+
+
+class Collaboration:  # pylint: disable=too-few-public-methods
+    """Collaboration with the names of its units, services and groups."""
+
+    __slots__ = ("name", "created_by", "units", "services", "groups", "memberships")
+
+    def __init__(
+        self,
+        name: str,
+        created_by: str,
+        units: list,
+        services: list,
+        groups: list,
+        memberships: Optional[list] = None,
+    ):
+        """Create a collaboration, memberships is None if the export has no membership information."""
+        self.name = name
+        self.created_by = created_by
+        self.units = units
+        self.services = services
+        self.groups = groups
+        self.memberships = memberships
+
+    @classmethod
+    def from_dict(cls, entry: dict, users: dict = None) -> "Collaboration":
+        """Decode a collaboration of the export, users maps uids to the User records seen so far."""
+        users = {} if users is None else users
+        memberships = entry.get("collaboration_memberships")
+        return cls(
+            entry["name"],
+            entry["created_by"],
+            list(entry["units"]),
+            [service["name"] for service in entry["services"]],
+            [group["name"] for group in entry["groups"]],
+            None if memberships is None else [Membership.from_dict(m, users) for m in memberships],
+        )
+
+
+class Organisation:
+    """SRAM organisation with its units and collaborations."""
+
+    __slots__ = ("name", "short_name", "units", "collaborations")
+
+    def __init__(self, name: str, short_name: str, units: list, collaborations: list):
+        """Create an organisation."""
+        self.name = name
+        self.short_name = short_name
+        self.units = units
+        self.collaborations = collaborations
+
+    @classmethod
+    def from_dict(cls, sram_org_dict: dict) -> "Organisation":
+        """Decode the dictionary of an export, e.g. the result of read_json."""
+        users: dict = {}
+        with paused_gc():
+            return cls(
+                sram_org_dict["name"],
+                sram_org_dict["short_name"],
+                list(sram_org_dict["units"]),
+                [Collaboration.from_dict(entry, users) for entry in sram_org_dict["collaborations"]],
+            )
+
+    @classmethod
+    def from_json(cls, data: Union[bytes, str]) -> "Organisation":
+        """Decode the json of an export."""
+        return cls.from_dict(json_loads(data))
@@ -0,0 +1,399 @@
+"""Local render service for shared deployments of the webtool.
+
+The server accepts render requests as json over HTTP and returns the gravis html.
+A request contains either an SRAM organisation export or a graph section of an
+example file, the graph configuration and the plot options. Jobs run in a bounded
+process pool; identical requests, recognised by the hash of their content, are
+rendered once: requests arriving while a job is running wait for the same job and
+later requests are answered from an html cache.
+
+    POST /render   json request -> text/html, 404 if the focus node does not exist,
+                   503 if all jobs stay busy for longer than the queue timeout
+    GET  /health   json with the number of workers, running jobs and cached results
+    GET  /metrics  render latencies, cache hits and misses and peak memory in the
+                   Prometheus text format
+"""
+
+import hashlib
+import json
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import networkx as nx
+import requests
+
+from surfiamviz.caching import ResultCache
+from surfiamviz.graph_from_config import set_node_levels_from_config, set_node_type
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.metrics import METRICS, Metrics
+from surfiamviz.precompile import build_example_graph
+from surfiamviz.utils import color_edges, color_nodes, ego_network, label_index, render_editable_network
+from surfiamviz.validate import (
+    SRAM_EDGE_TYPES,
+    SRAM_NODE_TYPES,
+    validate_config,
+    validate_example_graph,
+    validate_sram_dict,
+)
+
+# environment variable with the url of the render server used by the webtool
+RENDER_SERVER_ENV = "SURFIAMVIZ_RENDER_SERVER"
+
+
+# graphs of exports rendered with a focus, per process
+_EXPORT_GRAPHS = ResultCache(maxsize=4)
+METRICS.register_cache("export_graphs", _EXPORT_GRAPHS)
+
+
+class QueueFullError(Exception):
+    """Raised when a request waited too long or too many requests wait for a free job."""
+
+
+def sram_request(
+    sram_dict: dict,
+    graph_config: dict,
+    plot_type: str = "bipartite",
+    size_metric: str = "degree",
+    merge_edges: bool = False,
+    focus: str = None,
+    hops: int = 2,
+    sram_hash: str = None,
+) -> dict:
+    """Return the render request for an SRAM organisation export.
+
+    With focus only the neighbourhood of that node up to hops edges away is rendered.
+    The request then carries the export_key of the export, pass sram_hash (see
+    export_key) to compute it without hashing the whole export for every request.
+    """
+    request = {
+        "kind": "organisation",
+        "sram": sram_dict,
+        "config": graph_config,
+        "plot": plot_type,
+        "size": size_metric,
+        "merge": merge_edges,
+    }
+    if focus:
+        request["focus"] = focus
+        request["hops"] = hops
+    if focus or sram_hash:
+        request["export"] = export_key(sram_dict, graph_config, sram_hash)
+    return request
+
+
+def example_request(
+    example_graphs: dict,
+    name: str,
+    graph_config: dict,
+    plot_type: str = "bipartite",
+    size_metric: str = "degree",
+    merge_edges: bool = False,
+) -> dict:
+    """Return the render request for the graph section name of an example file."""
+    return {
+        "kind": "example",
+        "graphs": {name: example_graphs[name]},
+        "name": name,
+        "config": graph_config,
+        "plot": plot_type,
+        "size": size_metric,
+        "merge": merge_edges,
+    }
+
+
+def request_hash(request: dict) -> str:
+    """Return the content hash of a render request."""
+    data = json.dumps(request, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def export_key(sram_dict: dict, graph_config: dict, sram_hash: str = None) -> str:
+    """Return the key of the graph built from an export with a configuration.
+
+    sram_hash is any content hash of the export, e.g. of the uploaded file, computed
+    once per export; without it the export is hashed with request_hash.
+    """
+    if sram_hash is None:
+        sram_hash = request_hash(sram_dict)
+    return request_hash({"sram": sram_hash, "config": graph_config})
+
+
+def validate_request(request: dict) -> list:
+    """Return the problems of a render request, empty if it can be rendered."""
+    if not isinstance(request, dict) or request.get("kind") not in ("organisation", "example"):
+        return ["request: kind must be organisation or example."]
+    if not isinstance(request.get("config"), dict):
+        return ["request: config is missing."]
+    if "focus" in request and not (
+        isinstance(request["focus"], str) and isinstance(request.get("hops"), int) and request["hops"] >= 0
+    ):
+        return ["request: focus must be a node name and hops a number >= 0."]
+    if not isinstance(request.get("export", ""), str):
+        return ["request: export must be the export_key of the export."]
+    if request["kind"] == "organisation":
+        return validate_sram_dict(request.get("sram")) + validate_config(
+            request["config"], SRAM_NODE_TYPES, SRAM_EDGE_TYPES
+        )
+    if not isinstance(request.get("graphs"), dict):
+        return ["request: graphs is missing."]
+    return validate_config(request["config"]) + validate_example_graph(
+        request["graphs"], request.get("name"), request["config"]
+    )
+
+
+def _organisation_graph(sram_dict: dict, graph_config: dict) -> nx.MultiDiGraph:
+    graph = nodes_to_graph(get_nodes_from_dict(sram_dict))
+    set_node_type(graph, graph_config)
+    set_node_levels_from_config(graph, graph_config)
+    color_nodes(graph, graph_config)
+    color_edges(graph, graph_config)
+    return graph
+
+
+def build_graph(request: dict) -> nx.MultiDiGraph:
+    """Build the coloured graph of a render request.
+
+    For requests with a focus the graph of the whole export and an index of its node
+    labels are kept in a small cache of the process under the export key of the
+    request, so looking at other nodes of the same export only costs the search and
+    rendering of their neighbourhoods. Raises KeyError if the focus is not a node of
+    the graph.
+    """
+    graph_config = request["config"]
+    labels = None
+    if request["kind"] == "example":
+        graph = build_example_graph(request["graphs"], request["name"], graph_config)
+    elif "focus" not in request:
+        return _organisation_graph(request["sram"], graph_config)
+    else:
+        key = request.get("export") or export_key(request["sram"], graph_config)
+        cached = _EXPORT_GRAPHS.get(key)
+        if cached is None:
+            graph = _organisation_graph(request["sram"], graph_config)
+            cached = (graph, label_index(graph))
+            _EXPORT_GRAPHS.put(key, cached)
+        graph, labels = cached
+    if "focus" in request:
+        # a new graph, the cached graph is not changed by the rendering
+        return ego_network(graph, request["focus"], request["hops"], labels)
+    return graph
+
+
+def render_request(request: dict) -> str:
+    """Render a request and return the html, runs in the worker processes."""
+    return render_graph(build_graph(request), request)
+
+
+def render_graph(graph: nx.MultiDiGraph, request: dict) -> str:
+    """Return the html of the graph built for request with the plot options of the request."""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        html_path = Path(tmp_dir) / "graph.html"
+        render_editable_network(
+            graph,
+            html_path,
+            plot_type=request.get("plot", "bipartite"),
+            size_metric=request.get("size", "degree"),
+            merge_edges=request.get("merge", False),
+        )
+        return html_path.read_text(encoding="utf-8")
+
+
+class RenderService:
+    """Bounded pool of render workers with deduplication and an html cache."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        cache_size: int = 32,
+        max_jobs: int = 16,
+        max_waiting: int = 64,
+        queue_timeout: float = 30.0,
+    ):
+        """Start the worker pool, at most max_jobs different requests are rendered or queued at once.
+
+        Further requests wait up to queue_timeout seconds for a free job, at most
+        max_waiting of them at a time.
+        """
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._cache = ResultCache(maxsize=cache_size)
+        self._in_flight: dict[str, Future] = {}
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._job_done = threading.Condition(self._lock)
+        # always on, the server answers GET /metrics; the workers are not instrumented
+        self.metrics = Metrics(enabled=True)
+        self.metrics.register_cache("render_html", self._cache)
+
+    def submit(self, request: dict) -> tuple:
+        """Return a future with the html of the request and hit, joined or new.
+
+        hit means the html was cached, joined that an identical request is being
+        rendered and new that a job was queued. If max_jobs jobs are running the
+        request waits for one of them to finish; raises QueueFullError if that takes
+        longer than queue_timeout or max_waiting requests are waiting already.
+        """
+        if request["kind"] == "organisation":
+            # the export is hashed once here, keys sent by clients are not trusted
+            request = {**request, "export": export_key(request["sram"], request["config"])}
+            key = request_hash({name: value for name, value in request.items() if name != "sram"})
+        else:
+            key = request_hash(request)
+        deadline = time.monotonic() + self.queue_timeout
+        with self._lock:
+            while True:
+                html = self._cache.get(key)
+                if html is not None:
+                    future: Future = Future()
+                    future.set_result(html)
+                    return future, "hit"
+                if key in self._in_flight:
+                    return self._in_flight[key], "joined"
+                if len(self._in_flight) < self.max_jobs:
+                    break
+                self._wait_for_job(deadline)
+            future = self._pool.submit(render_request, request)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future, "new"
+
+    def _wait_for_job(self, deadline: float):
+        """Wait, holding the lock, until a job finishes; raise QueueFullError at the deadline."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or self._waiting >= self.max_waiting:
+            raise QueueFullError(f"{self.max_jobs} render jobs are running, try again later.")
+        self._waiting += 1
+        try:
+            self._job_done.wait(remaining)
+        finally:
+            self._waiting -= 1
+
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            self._in_flight.pop(key, None)
+            if not future.cancelled() and future.exception() is None:
+                self._cache.put(key, future.result())
+            self._job_done.notify_all()
+
+    def status(self) -> dict:
+        """Return the number of workers, running jobs and cached results."""
+        with self._lock:
+            return {"workers": self.workers, "in_flight": len(self._in_flight), "cached": len(self._cache)}
+
+    def close(self):
+        """Shut down the worker pool."""
+        self._pool.shutdown(cancel_futures=True)
+
+
+def make_server(host: str, port: int, service: RenderService, timeout: float = 600) -> ThreadingHTTPServer:
+    """Create the HTTP server for service, each connection is handled in its own thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        """Handle render and health requests."""
+
+        def _send(self, code: int, body: str, content_type: str = "application/json", cache: str = None):
+            content = body.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            if cache:
+                self.send_header("X-Render-Cache", cache)
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):  # noqa: N802 pylint: disable=invalid-name
+            """Return the status or the metrics of the service."""
+            if self.path == "/metrics":
+                self._send(200, service.metrics.render_prometheus(), content_type="text/plain; version=0.0.4")
+            elif self.path == "/health":
+                self._send(200, json.dumps(service.status()))
+            else:
+                self._send(404, json.dumps({"error": f"{self.path} not found."}))
+
+        def do_POST(self):  # noqa: N802 pylint: disable=invalid-name
+            """Render the json request in the body."""
+            if self.path != "/render":
+                self._send(404, json.dumps({"error": f"{self.path} not found."}))
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+            except ValueError as error:
+                self._send(400, json.dumps({"error": f"Invalid json: {error}"}))
+                return
+            problems = validate_request(request)
+            if problems:
+                self._send(400, json.dumps({"error": "Invalid request.", "problems": problems}))
+                return
+            try:
+                future, cache = service.submit(request)
+            except QueueFullError as error:
+                service.metrics.count("surfiamviz_render_requests_total", cache="rejected")
+                self._send(503, json.dumps({"error": str(error)}))
+                return
+            service.metrics.count("surfiamviz_render_requests_total", cache=cache)
+            try:
+                plot = request.get("plot", "bipartite")
+                with service.metrics.stage("render", kind=request["kind"], plot=plot):
+                    html = future.result(timeout=timeout)
+            except KeyError as error:
+                # the focus of the request is not a node of the graph
+                self._send(404, json.dumps({"error": error.args[0]}))
+                return
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                self._send(500, json.dumps({"error": repr(error)}))
+                return
+            self._send(200, html, content_type="text/html", cache=cache)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            """Do not log the single requests."""
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 2,
+    cache_size: int = 32,
+    max_jobs: int = 16,
+    max_waiting: int = 64,
+    queue_timeout: float = 30.0,
+):
+    """Run the render server until interrupted."""
+    service = RenderService(
+        workers=workers,
+        cache_size=cache_size,
+        max_jobs=max_jobs,
+        max_waiting=max_waiting,
+        queue_timeout=queue_timeout,
+    )
+    server = make_server(host, port, service)
+    print(f"Render server listening on http://{host}:{server.server_address[1]}. Stop with Ctrl-c.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def render_remote(server_url: str, request: dict, timeout: float = 600) -> str:
+    """Send a render request to a render server and return the html.
+
+    Raises KeyError if the focus of the request is not a node of the graph and
+    requests.HTTPError if the server cannot render the request.
+    """
+    response = requests.post(server_url.rstrip("/") + "/render", json=request, timeout=timeout)
+    if response.status_code == 404 and "focus" in request:
+        raise KeyError(response.json()["error"])
+    response.raise_for_status()
+    return response.text
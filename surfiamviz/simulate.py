@@ -0,0 +1,178 @@
+"""What-if simulation of approvals and memberships on an example graph.
+
+A scenario is a list of hypothetical changes, applied as an overlay on the graph of a
+GraphBuilder and taken back afterwards:
+
+    approve U V                     U approves V, e.g. an org admin an application
+    deny U V                        U denies V
+    add U V EDGE_TYPE [LABEL]       add an edge, e.g. add RESEARCHER_3 COLLABORATION MEMBERS member_of
+    remove U V [EDGE_TYPE]          remove the edges from U to V (of EDGE_TYPE)
+
+The builder keeps the inferred collaboration-application edges up to date for the
+pairs whose verdict can depend on a changed edge (see GraphBuilder._edge_pairs), so
+a scenario costs about as much as the edges it changes and not a new inference over
+all collaborations, applications and admins. The result lists the changed verdicts
+and the users that gain or lose access to an application through them.
+"""
+
+import shlex
+
+from surfiamviz.builder import GraphBuilder
+from surfiamviz.centrality import USER_NODE_TYPES
+from surfiamviz.utils import undirected_neighbors
+
+# usage of the changes, the arguments in brackets are optional
+CHANGE_USAGE = {
+    "approve": "approve U V",
+    "deny": "deny U V",
+    "add": "add U V EDGE_TYPE [LABEL]",
+    "remove": "remove U V [EDGE_TYPE]",
+}
+SIMULATION_ACTIONS = tuple(CHANGE_USAGE)
+
+
+def parse_change(text: str) -> tuple:
+    """Parse one change, returns (action, u, v, edge_type, label).
+
+    Node names with spaces can be quoted. Raises ValueError for unknown actions or a
+    wrong number of arguments.
+    """
+    words = shlex.split(text)
+    if not words or words[0] not in SIMULATION_ACTIONS:
+        raise ValueError(f"Change {text!r} must start with one of {', '.join(SIMULATION_ACTIONS)}.")
+    action, args = words[0], words[1:]
+    usage = CHANGE_USAGE[action]
+    max_args = len(usage.split()) - 1
+    min_args = max_args - usage.count("[")
+    if not min_args <= len(args) <= max_args:
+        raise ValueError(f"Change {text!r} does not match {usage!r}.")
+    args += [None] * (4 - len(args))
+    return (action, *args)
+
+
+def parse_scenario(text: str) -> list:
+    """Parse the changes of a scenario, separated by semicolons."""
+    return [parse_change(change) for change in text.split(";") if change.strip()]
+
+
+def format_verdicts(verdicts: list) -> str:
+    """Return the inferred edges of a pair as text, e.g. BACKBONE or REJECT (reject by org)."""
+    if not verdicts:
+        return "no edge"
+    return ", ".join(
+        edge_type if label is None else f"{edge_type} ({label})" for edge_type, label in verdicts
+    )
+
+
+class Simulator:
+    """Run what-if scenarios on the graph of a GraphBuilder, the graph is unchanged afterwards."""
+
+    def __init__(self, builder: GraphBuilder):
+        """Simulate on the graph of builder."""
+        self.builder = builder
+
+    @classmethod
+    def from_example(cls, example_graphs: dict, section: str, graph_config: dict):
+        """Simulate on a graph section of an example file."""
+        return cls(GraphBuilder.from_example(example_graphs, section, graph_config))
+
+    def simulate(self, changes: list) -> dict:
+        """Apply the changes, report their effect and take them back.
+
+        Parameters
+        ----------
+        changes: list
+            Changes as returned by parse_change.
+
+        Returns
+        -------
+        Dictionary with
+            verdicts: list of (collaboration, application, verdicts before, verdicts after),
+                the verdicts are lists of (edge_type, label) of the inferred edges;
+            access: list of (user, application, "gained" or "lost").
+
+        """
+        builder = self.builder
+        undo: list = []
+        users: set = set()
+        builder.verdict_log = []
+        try:
+            for action, u, v, edge_type, label in changes:
+                new_nodes = [node for node in dict.fromkeys((u, v)) if node not in builder.graph]
+                old = builder.edges_between(u, v)
+                builder.set_edges(u, v, self._changed_edges(old, action, edge_type, label))
+                undo.append((u, v, old, new_nodes))
+                users.update(node for node in (u, v) if self._is_user(node))
+            verdicts = self._merge_log(builder.verdict_log)
+            users.update(user for coll, _, _, _ in verdicts for user in self._members(coll))
+            after = {user: self._access(user) for user in users}
+        finally:
+            builder.verdict_log = None
+            for u, v, old, new_nodes in reversed(undo):
+                builder.set_edges(u, v, old)
+                for node in new_nodes:
+                    builder.remove_node(node)
+        access = []
+        for user in sorted(users):
+            before = self._access(user) if user in builder.graph else set()
+            access.extend((user, app, "gained") for app in sorted(after[user] - before))
+            access.extend((user, app, "lost") for app in sorted(before - after[user]))
+        return {"verdicts": verdicts, "access": access}
+
+    def simulate_batch(self, scenarios: list) -> list:
+        """Run independent scenarios one after another, each on the unchanged graph."""
+        return [self.simulate(changes) for changes in scenarios]
+
+    @staticmethod
+    def _changed_edges(old: list, action: str, edge_type: str, label: str) -> list:
+        if action in ("approve", "deny"):
+            # a decision replaces the earlier decision between the same nodes
+            label = "approves" if action == "approve" else "denies"
+            return [edge for edge in old if edge[0] != "ACTIONS"] + [("ACTIONS", label)]
+        if action == "add":
+            return old + [(edge_type, label)]
+        return [edge for edge in old if edge_type is not None and edge[0] != edge_type]
+
+    @staticmethod
+    def _merge_log(log: list) -> list:
+        """Keep the first old and the last new verdicts per pair, drop pairs without change."""
+        merged: dict = {}
+        for coll, app, old, new in log:
+            merged[(coll, app)] = (merged[(coll, app)][0] if (coll, app) in merged else old, new)
+        return [(coll, app, old, new) for (coll, app), (old, new) in merged.items() if old != new]
+
+    def _is_user(self, node) -> bool:
+        return self.builder.graph.nodes[node].get("node_type") in USER_NODE_TYPES
+
+    def _linked(self, a, b) -> bool:
+        """Check whether a and b are joined by an edge that is not an action, in either direction."""
+        graph = self.builder.graph
+        return any(
+            attrs["edge_type"] != "ACTIONS"
+            for u, v in ((a, b), (b, a))
+            for attrs in (graph.get_edge_data(u, v) or {}).values()
+        )
+
+    def _members(self, coll) -> list:
+        """Return the users of a collaboration, members point to it and admins hang off it."""
+        if coll not in self.builder.graph:
+            return []
+        return [
+            user
+            for user in undirected_neighbors(self.builder.graph, coll)
+            if self._is_user(user) and self._linked(user, coll)
+        ]
+
+    def _access(self, user) -> set:
+        """Return the applications the user reaches through its collaborations."""
+        graph = self.builder.graph
+        return {
+            app
+            for coll in undirected_neighbors(graph, user)
+            if graph.nodes[coll].get("node_type") == "COLLABORATION" and self._linked(user, coll)
+            for app, keydict in graph.succ[coll].items()
+            if any(
+                attrs["edge_type"] == "BACKBONE" and self.builder.is_inferred(coll, app, key)
+                for key, attrs in keydict.items()
+            )
+        }
@@ -0,0 +1,332 @@
+"""Static SVG and PNG images of large graphs, written without a browser.
+
+The html files of gravis need a browser that lays out and draws every node and
+edge, which fails for very large organisations. These writers take the positions
+(x, y), colours (color) and sizes (size) set by the layout and draw a static image:
+
+- svg: edges and nodes are written as one path element per colour and batch of
+  primitives, directly to the file;
+- png: edges and nodes are drawn per colour and batch into a numpy pixel array which
+  is compressed with zlib, no imaging library is needed.
+
+Memory is bounded by the node positions, one batch of primitives and, for png, the
+image. Edges shorter than min_edge_length pixels can be dropped, they are not
+visible in an overview of a large graph anyway.
+"""
+
+import struct
+import zlib
+from pathlib import Path
+from typing import IO, Iterator, Union
+from xml.sax.saxutils import escape, quoteattr
+
+import networkx as nx
+import numpy as np
+
+STATIC_FORMATS = ["svg", "png"]
+
+# colours used if nodes or edges have no color attribute, see utils.color_nodes
+DEFAULT_NODE_COLOR = "lightblue"
+DEFAULT_EDGE_COLOR = "lightgray"
+# size of nodes without size attribute, the default node size of gravis
+DEFAULT_NODE_SIZE = 25
+
+# CSS named colours, the names of the matplotlib colour scheme used in the configuration
+_NAMED_COLORS = {
+    "aliceblue": "f0f8ff", "antiquewhite": "faebd7", "aqua": "00ffff", "aquamarine": "7fffd4",
+    "azure": "f0ffff", "beige": "f5f5dc", "bisque": "ffe4c4", "black": "000000",
+    "blanchedalmond": "ffebcd", "blue": "0000ff", "blueviolet": "8a2be2", "brown": "a52a2a",
+    "burlywood": "deb887", "cadetblue": "5f9ea0", "chartreuse": "7fff00", "chocolate": "d2691e",
+    "coral": "ff7f50", "cornflowerblue": "6495ed", "cornsilk": "fff8dc", "crimson": "dc143c",
+    "cyan": "00ffff", "darkblue": "00008b", "darkcyan": "008b8b", "darkgoldenrod": "b8860b",
+    "darkgray": "a9a9a9", "darkgreen": "006400", "darkgrey": "a9a9a9", "darkkhaki": "bdb76b",
+    "darkmagenta": "8b008b", "darkolivegreen": "556b2f", "darkorange": "ff8c00", "darkorchid": "9932cc",
+    "darkred": "8b0000", "darksalmon": "e9967a", "darkseagreen": "8fbc8f", "darkslateblue": "483d8b",
+    "darkslategray": "2f4f4f", "darkslategrey": "2f4f4f", "darkturquoise": "00ced1",
+    "darkviolet": "9400d3", "deeppink": "ff1493", "deepskyblue": "00bfff", "dimgray": "696969",
+    "dimgrey": "696969", "dodgerblue": "1e90ff", "firebrick": "b22222", "floralwhite": "fffaf0",
+    "forestgreen": "228b22", "fuchsia": "ff00ff", "gainsboro": "dcdcdc", "ghostwhite": "f8f8ff",
+    "gold": "ffd700", "goldenrod": "daa520", "gray": "808080", "green": "008000", "greenyellow": "adff2f",
+    "grey": "808080", "honeydew": "f0fff0", "hotpink": "ff69b4", "indianred": "cd5c5c", "indigo": "4b0082",
+    "ivory": "fffff0", "khaki": "f0e68c", "lavender": "e6e6fa", "lavenderblush": "fff0f5",
+    "lawngreen": "7cfc00", "lemonchiffon": "fffacd", "lightblue": "add8e6", "lightcoral": "f08080",
+    "lightcyan": "e0ffff", "lightgoldenrodyellow": "fafad2", "lightgray": "d3d3d3", "lightgreen": "90ee90",
+    "lightgrey": "d3d3d3", "lightpink": "ffb6c1", "lightsalmon": "ffa07a", "lightseagreen": "20b2aa",
+    "lightskyblue": "87cefa", "lightslategray": "778899", "lightslategrey": "778899",
+    "lightsteelblue": "b0c4de", "lightyellow": "ffffe0", "lime": "00ff00", "limegreen": "32cd32",
+    "linen": "faf0e6", "magenta": "ff00ff", "maroon": "800000", "mediumaquamarine": "66cdaa",
+    "mediumblue": "0000cd", "mediumorchid": "ba55d3", "mediumpurple": "9370db", "mediumseagreen": "3cb371",
+    "mediumslateblue": "7b68ee", "mediumspringgreen": "00fa9a", "mediumturquoise": "48d1cc",
+    "mediumvioletred": "c71585", "midnightblue": "191970", "mintcream": "f5fffa", "mistyrose": "ffe4e1",
+    "moccasin": "ffe4b5", "navajowhite": "ffdead", "navy": "000080", "oldlace": "fdf5e6",
+    "olive": "808000", "olivedrab": "6b8e23", "orange": "ffa500", "orangered": "ff4500",
+    "orchid": "da70d6", "palegoldenrod": "eee8aa", "palegreen": "98fb98", "paleturquoise": "afeeee",
+    "palevioletred": "db7093", "papayawhip": "ffefd5", "peachpuff": "ffdab9", "peru": "cd853f",
+    "pink": "ffc0cb", "plum": "dda0dd", "powderblue": "b0e0e6", "purple": "800080",
+    "rebeccapurple": "663399", "red": "ff0000", "rosybrown": "bc8f8f", "royalblue": "4169e1",
+    "saddlebrown": "8b4513", "salmon": "fa8072", "sandybrown": "f4a460", "seagreen": "2e8b57",
+    "seashell": "fff5ee", "sienna": "a0522d", "silver": "c0c0c0", "skyblue": "87ceeb",
+    "slateblue": "6a5acd", "slategray": "708090", "slategrey": "708090", "snow": "fffafa",
+    "springgreen": "00ff7f", "steelblue": "4682b4", "tan": "d2b48c", "teal": "008080", "thistle": "d8bfd8",
+    "tomato": "ff6347", "turquoise": "40e0d0", "violet": "ee82ee", "wheat": "f5deb3", "white": "ffffff",
+    "whitesmoke": "f5f5f5", "yellow": "ffff00", "yellowgreen": "9acd32",
+}
+
+
+def color_rgb(color: str) -> tuple:
+    """Return the (r, g, b) values of a CSS colour name or a hex colour (#rgb or #rrggbb)."""
+    value = _NAMED_COLORS.get(color.lower().replace(" ", ""), color.lstrip("#"))
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    try:
+        return tuple(int(value[i : i + 2], 16) for i in (0, 2, 4))
+    except ValueError:
+        raise ValueError(f"Unknown colour {color}.") from None
+
+
+class _Frame:
+    """Map the layout coordinates to pixels of an image width pixels wide."""
+
+    def __init__(self, graph: nx.Graph, width: int, margin: int):
+        """Compute the bounding box of the nodes, raises ValueError if a node has no position."""
+        min_x = min_y = float("inf")
+        max_x = max_y = float("-inf")
+        for node, attrs in graph.nodes(data=True):
+            if "x" not in attrs or "y" not in attrs:
+                raise ValueError(f"Node {node} has no position, lay out the graph first.")
+            # the box contains the nodes, not only their centres
+            half = attrs.get("size", DEFAULT_NODE_SIZE) / 2
+            min_x, max_x = min(min_x, attrs["x"] - half), max(max_x, attrs["x"] + half)
+            min_y, max_y = min(min_y, attrs["y"] - half), max(max_y, attrs["y"] + half)
+        if not graph:
+            min_x = max_x = min_y = max_y = 0
+        span_x, span_y = max(max_x - min_x, 1e-9), max(max_y - min_y, 1e-9)
+        self.scale = (width - 2 * margin) / max(span_x, span_y)
+        self.width = width
+        self.height = int(round(span_y * self.scale)) + 2 * margin
+        if span_x < span_y:
+            # centre a tall graph horizontally
+            margin_x = (width - span_x * self.scale) / 2
+        else:
+            margin_x = margin
+        self.offset_x = margin_x - min_x * self.scale
+        self.offset_y = margin - min_y * self.scale
+
+    def positions(self, graph: nx.Graph) -> dict:
+        """Return the pixel position of every node."""
+        return {
+            node: (attrs["x"] * self.scale + self.offset_x, attrs["y"] * self.scale + self.offset_y)
+            for node, attrs in graph.nodes(data=True)
+        }
+
+    def radius(self, size: float, min_radius: float) -> float:
+        """Return the radius in pixels of a node of the given size."""
+        return max(min_radius, size * self.scale / 2)
+
+
+def _edge_batches(graph: nx.Graph, pos: dict, min_edge_length: float, batch_size: int) -> Iterator[tuple]:
+    """Yield (colour, [(x1, y1, x2, y2), ...]) with at most batch_size segments.
+
+    Parallel edges of the same colour are drawn once. Edges shorter than
+    min_edge_length pixels, including self loops, are dropped.
+    """
+    batches: dict = {}
+    min_sq = min_edge_length * min_edge_length
+    for u, nbrs in graph.adj.items():
+        x1, y1 = pos[u]
+        for v, data in nbrs.items():
+            x2, y2 = pos[v]
+            if u == v or (x2 - x1) ** 2 + (y2 - y1) ** 2 < min_sq:
+                continue
+            attrs = data.values() if graph.is_multigraph() else [data]
+            for color in dict.fromkeys(a.get("color", DEFAULT_EDGE_COLOR) for a in attrs):
+                batch = batches.setdefault(color, [])
+                batch.append((x1, y1, x2, y2))
+                if len(batch) >= batch_size:
+                    yield color, batch
+                    batches[color] = []
+    for color, batch in batches.items():
+        if batch:
+            yield color, batch
+
+
+def _node_batches(
+    graph: nx.Graph, pos: dict, frame: _Frame, min_radius: float, batch_size: int
+) -> Iterator[tuple]:
+    """Yield (colour, [(x, y, radius), ...]) with at most batch_size nodes."""
+    batches: dict = {}
+    for node, attrs in graph.nodes(data=True):
+        color = attrs.get("color", DEFAULT_NODE_COLOR)
+        batch = batches.setdefault(color, [])
+        batch.append((*pos[node], frame.radius(attrs.get("size", DEFAULT_NODE_SIZE), min_radius)))
+        if len(batch) >= batch_size:
+            yield color, batch
+            batches[color] = []
+    for color, batch in batches.items():
+        if batch:
+            yield color, batch
+
+
+def write_svg_stream(
+    graph: nx.Graph,
+    out: IO[str],
+    width: int = 2000,
+    margin: int = 20,
+    min_edge_length: float = 0.0,
+    edge_width: float = 0.5,
+    min_radius: float = 1.5,
+    labels: bool = False,
+    batch_size: int = 5000,
+    background: str = "white",
+):
+    """Write an svg image of the graph to a writable text stream.
+
+    Parameters
+    ----------
+    graph: nx.Graph
+        Graph with the node attributes x and y and optionally color and size, and the
+        edge attribute color.
+    out: text stream
+        Writable text stream, e.g. an open file.
+    width: int
+        Width of the image in pixels, the height follows from the positions.
+    margin: int
+        Empty border in pixels.
+    min_edge_length: float
+        Edges shorter than this number of pixels are not drawn.
+    edge_width: float
+        Width of the edges in pixels.
+    min_radius: float
+        Smallest radius of the nodes in pixels.
+    labels: bool
+        Write the node labels, only readable for small graphs.
+    batch_size: int
+        Maximum number of edges or nodes in one path element.
+    background: str
+        Colour of the background.
+
+    """
+    frame = _Frame(graph, width, margin)
+    pos = frame.positions(graph)
+    out.write(
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{frame.width}" height="{frame.height}" '
+        f'viewBox="0 0 {frame.width} {frame.height}">\n'
+        f'<rect width="100%" height="100%" fill={quoteattr(background)}/>\n'
+        f'<g fill="none" stroke-width="{edge_width}" stroke-linecap="round">\n'
+    )
+    for color, batch in _edge_batches(graph, pos, min_edge_length, batch_size):
+        path = "".join(f"M{x1:.1f} {y1:.1f}L{x2:.1f} {y2:.1f}" for x1, y1, x2, y2 in batch)
+        out.write(f'<path stroke={quoteattr(color)} d="{path}"/>\n')
+    out.write('</g>\n<g stroke="none">\n')
+    for color, batch in _node_batches(graph, pos, frame, min_radius, batch_size):
+        # a circle as two arcs, all nodes of a batch in one path
+        path = "".join(
+            f"M{x - r:.1f} {y:.1f}a{r:.1f} {r:.1f} 0 1 0 {2 * r:.1f} 0a{r:.1f} {r:.1f} 0 1 0 {-2 * r:.1f} 0"
+            for x, y, r in batch
+        )
+        out.write(f'<path fill={quoteattr(color)} d="{path}"/>\n')
+    out.write("</g>\n")
+    if labels:
+        out.write('<g font-family="sans-serif" font-size="10" text-anchor="middle">\n')
+        for node, label in graph.nodes(data="label", default=None):
+            x, y = pos[node]
+            text = escape(str(node if label is None else label))
+            out.write(f'<text x="{x:.1f}" y="{y:.1f}">{text}</text>\n')
+        out.write("</g>\n")
+    out.write("</svg>\n")
+
+
+def _draw_segments(image: np.ndarray, segments: np.ndarray, rgb: tuple, max_points: int):
+    """Draw line segments (x1, y1, x2, y2) of one pixel width, at most max_points pixels at once."""
+    height, width, _ = image.shape
+    lengths = np.ceil(np.maximum(abs(segments[:, 2] - segments[:, 0]), abs(segments[:, 3] - segments[:, 1])))
+    steps = lengths.astype(np.int64) + 1
+    start = 0
+    while start < len(segments):
+        # as many segments as fit in max_points, at least one
+        stop = start + max(1, int(np.searchsorted(np.cumsum(steps[start:]), max_points, side="right")))
+        seg, n = segments[start:stop], steps[start:stop]
+        index = np.repeat(np.arange(len(seg)), n)
+        offsets = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        t = offsets / np.maximum(n - 1, 1)[index]
+        xs = np.rint(seg[index, 0] + t * (seg[index, 2] - seg[index, 0])).astype(np.int64)
+        ys = np.rint(seg[index, 1] + t * (seg[index, 3] - seg[index, 1])).astype(np.int64)
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        image[ys[inside], xs[inside]] = rgb
+        start = stop
+
+
+def _draw_discs(image: np.ndarray, discs: np.ndarray, rgb: tuple):
+    """Draw filled discs (x, y, radius), discs of the same rounded radius at once."""
+    height, width, _ = image.shape
+    radii = np.maximum(np.rint(discs[:, 2]).astype(np.int64), 1)
+    for radius in np.unique(radii):
+        centres = np.rint(discs[radii == radius, :2]).astype(np.int64)
+        dy, dx = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+        mask = dx * dx + dy * dy <= radius * radius
+        xs = (centres[:, 0, None] + dx[mask][None, :]).ravel()
+        ys = (centres[:, 1, None] + dy[mask][None, :]).ravel()
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        image[ys[inside], xs[inside]] = rgb
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def write_png(
+    graph: nx.Graph,
+    out: IO[bytes],
+    width: int = 2000,
+    margin: int = 20,
+    min_edge_length: float = 0.0,
+    min_radius: float = 1.5,
+    batch_size: int = 20000,
+    max_points: int = 1 << 18,
+    background: str = "white",
+):
+    """Write a png image of the graph to a writable binary stream.
+
+    The parameters are those of write_svg_stream; edges are one pixel wide and
+    max_points bounds the number of pixels computed at once while drawing edges.
+    """
+    frame = _Frame(graph, width, margin)
+    pos = frame.positions(graph)
+    # png rows start with the filter type, 0 (none); the image is a view of the pixels
+    rows = np.zeros((frame.height, frame.width * 3 + 1), dtype=np.uint8)
+    image = rows[:, 1:].reshape(frame.height, frame.width, 3)
+    image[:, :] = color_rgb(background)
+    for color, batch in _edge_batches(graph, pos, min_edge_length, batch_size):
+        _draw_segments(image, np.array(batch, dtype=np.float64), color_rgb(color), max_points)
+    for color, batch in _node_batches(graph, pos, frame, min_radius, batch_size):
+        _draw_discs(image, np.array(batch, dtype=np.float64), color_rgb(color))
+    pos.clear()
+
+    compressor = zlib.compressobj(6)
+    idat = b"".join(
+        compressor.compress(rows[i : i + 256].tobytes()) for i in range(0, frame.height, 256)
+    ) + compressor.flush()
+    out.write(b"\x89PNG\r\n\x1a\n")
+    out.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", frame.width, frame.height, 8, 2, 0, 0, 0)))
+    out.write(_png_chunk(b"IDAT", idat))
+    out.write(_png_chunk(b"IEND", b""))
+
+
+def export_static(graph: nx.Graph, image_path: Union[str, Path], overwrite: bool = False, **kwargs):
+    """Write an svg or png image of the graph, the format is taken from the file suffix.
+
+    Like export_html_streaming an existing file is only replaced with overwrite=True.
+    kwargs are passed to write_svg_stream or write_png.
+    """
+    image_path = Path(image_path)
+    image_format = image_path.suffix.lower().lstrip(".")
+    if image_format not in STATIC_FORMATS:
+        raise ValueError(f"Cannot write {image_path}, use one of the suffixes {STATIC_FORMATS}.")
+    if not overwrite and image_path.is_file():
+        raise FileExistsError(f"File {image_path} already exists.")
+    if image_format == "svg":
+        with open(image_path, "w", encoding="utf-8", buffering=1 << 16) as f:
+            write_svg_stream(graph, f, **kwargs)
+    else:
+        with open(image_path, "wb") as f:
+            write_png(graph, f, **kwargs)
@@ -0,0 +1,169 @@
+"""Statistics of SRAM organisations computed while streaming over the collaborations.
+
+stats_dict in graph_from_sram_json needs the nodes of the whole organisation and
+keeps the full set of users per unit. Here the collaborations are processed one at
+a time. Users are counted with exact sets; with approximate=True a set is replaced
+by a HyperLogLog sketch once it holds more than threshold users, which bounds the
+memory per unit. Estimated counts are reported together with their relative
+standard error.
+"""
+
+import hashlib
+import math
+from pathlib import Path
+from typing import Iterable, Union
+
+from surfiamviz.graph_from_sram_json import iter_organisation_json
+
+
+class HyperLogLog:
+    """HyperLogLog sketch estimating the number of distinct items.
+
+    Uses 2**precision registers of one byte, the relative standard error of the
+    estimate is 1.04 / sqrt(2**precision), about 0.8 % for the default precision 14.
+    """
+
+    def __init__(self, precision: int = 14):
+        """Create an empty sketch with 2**precision registers."""
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18.")
+        self.precision = precision
+        self._m = 1 << precision
+        self._registers = bytearray(self._m)
+        self._value_bits = 64 - precision
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the estimate."""
+        return 1.04 / math.sqrt(self._m)
+
+    def add(self, item):
+        """Add an item, items are identified by their string representation."""
+        hashed = int.from_bytes(hashlib.blake2b(str(item).encode(), digest_size=8).digest(), "big")
+        index = hashed >> self._value_bits
+        rank = self._value_bits - (hashed & ((1 << self._value_bits) - 1)).bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def count(self) -> int:
+        """Estimate the number of distinct items added."""
+        m = self._m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # small range correction: linear counting
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+
+class UserCounter:
+    """Count distinct users exactly, or with a HyperLogLog sketch past threshold users."""
+
+    def __init__(self, threshold: int = None, precision: int = 14):
+        """Count exactly up to threshold users, None means always exact."""
+        self.threshold = threshold
+        self.precision = precision
+        self._users: set = set()
+        self._sketch: HyperLogLog = None
+
+    @property
+    def exact(self) -> bool:
+        """Whether the count is exact."""
+        return self._sketch is None
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of the count, 0 for exact counts."""
+        return 0.0 if self.exact else self._sketch.relative_error
+
+    def update(self, users: Iterable):
+        """Add users."""
+        if self._sketch is not None:
+            for user in users:
+                self._sketch.add(user)
+            return
+        self._users.update(users)
+        if self.threshold is not None and len(self._users) > self.threshold:
+            self._sketch = HyperLogLog(self.precision)
+            for user in self._users:
+                self._sketch.add(user)
+            self._users = set()
+
+    def count(self) -> int:
+        """Return the (estimated) number of users."""
+        return len(self._users) if self.exact else self._sketch.count()
+
+
+class StreamingStats:
+    """Statistics of an organisation collected one collaboration at a time.
+
+    The result of to_dict has the same structure as stats_dict. With approximate=True
+    user counts above threshold are estimated and the relative standard error of
+    every user count is added as users_error.
+    """
+
+    def __init__(self, approximate: bool = False, threshold: int = 10000, precision: int = 14):
+        """Create empty statistics."""
+        self._threshold = threshold if approximate else None
+        self._precision = precision
+        self.approximate = approximate
+        self.units: list = []
+        self.collaborations: dict = {}
+        self._unit_collaborations: dict = {}
+        self._unit_users: dict = {}
+        self._users = UserCounter(self._threshold, precision)
+
+    def add_collaboration(self, coll: dict):
+        """Add a collaboration from the sram json export."""
+        memberships = coll.get("collaboration_memberships", [])
+        users = [m["user"]["uid"] for m in memberships]
+        self.collaborations[coll["name"]] = {
+            "users": len(users),
+            "groups": len(coll["groups"]),
+            "admins": len({m["user"]["uid"] for m in memberships if m["role"] == "admin"}),
+        }
+        self._users.update(users)
+        for unit in coll["units"]:
+            if unit not in self._unit_users:
+                self._unit_users[unit] = UserCounter(self._threshold, self._precision)
+                self._unit_collaborations[unit] = 0
+            self._unit_collaborations[unit] += 1
+            self._unit_users[unit].update(users)
+
+    def to_dict(self) -> dict:
+        """Return the statistics."""
+        stats: dict = {"units": {"names": self.units}}
+        for unit in self.units:
+            counter = self._unit_users.get(unit, UserCounter())
+            stats["units"][unit] = {
+                "collaborations": self._unit_collaborations.get(unit, 0),
+                "users": counter.count(),
+            }
+            if self.approximate:
+                stats["units"][unit]["users_error"] = counter.relative_error
+        stats["collaborations"] = {"names": list(self.collaborations), **self.collaborations}
+        stats["users"] = self._users.count()
+        if self.approximate:
+            stats["users_error"] = self._users.relative_error
+        return stats
+
+
+def stats_from_dict(sram_dict: dict, approximate: bool = False, threshold: int = 10000) -> dict:
+    """Compute the statistics of an sram organisation dictionary."""
+    stats = StreamingStats(approximate=approximate, threshold=threshold)
+    stats.units = sram_dict["units"]
+    for coll in sram_dict["collaborations"]:
+        stats.add_collaboration(coll)
+    return stats.to_dict()
+
+
+def stats_from_json(fpath: Union[str, Path], approximate: bool = False, threshold: int = 10000) -> dict:
+    """Compute the statistics of an sram json export without loading the whole file."""
+    stats = StreamingStats(approximate=approximate, threshold=threshold)
+    for key, value in iter_organisation_json(fpath):
+        if key == "collaborations":
+            stats.add_collaboration(value)
+        elif key == "units":
+            stats.units = value
+    return stats.to_dict()
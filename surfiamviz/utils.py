@@ -2,18 +2,49 @@
 
 import itertools
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import gravis as gv
 import networkx as nx
 import tomllib
 
+from surfiamviz.centrality import set_node_sizes, undirected_degree
+from surfiamviz.community import COMMUNITY_ALGORITHMS, detect_communities
+from surfiamviz.html_writer import export_html_streaming
+from surfiamviz.static_writer import export_static
+
+# Options for gravis' vis used for all rendered graphs.
+VIS_OPTIONS = {
+    "show_edge_label": True,
+    "edge_label_data_source": "label",
+    "edge_curvature": 0.3,
+    "use_node_size_normalization": False,
+    "node_size_data_source": "size",
+    "node_label_data_source": "label",
+    "layout_algorithm_active": False,
+    "show_details": True,
+}
+
+
+def layout_network(
+    graph: nx.MultiDiGraph,
+    plot_type: str = "greedy",
+    workers: int = 1,
+    size_metric: str = "degree",
+    merge_edges: bool = False,
+) -> nx.MultiDiGraph:
+    """Set the positions (x, y) and sizes of the nodes, returns the graph that was laid out.
+
+    workers is the number of processes used for the per community layouts.
+    The node sizes are set from size_metric, one of centrality.CENTRALITY_METRICS.
+    With merge_edges parallel edges are merged before the layout, see merge_parallel_edges;
+    the positions are then set on the merged copy, which is returned, and not on graph.
+    """
+    if merge_edges:
+        graph = merge_parallel_edges(graph)
 
-def render_editable_network(graph: nx.MultiDiGraph, html_path: Path, plot_type: str = "greedy"):
-    """Save the graph as html file."""
-    print(f"Rendering {html_path}:")
-
-    max_deg = max(deg for _, deg in graph.to_undirected().degree)
+    deg_centrality = undirected_degree(graph)
+    max_deg = max(deg_centrality.values())
     scaling = 300 + len(graph.nodes()) * max_deg
     if plot_type == "bipartite":
         # fix hierarchical positioning of node
@@ -22,53 +53,208 @@ def render_editable_network(graph: nx.MultiDiGraph, html_path: Path, plot_type:
             node = graph.nodes[name]
             node["x"] = x
             node["y"] = y
-        # scale nodes
-        deg_centrality = dict(graph.to_undirected().degree)
-        _ = [graph.add_node(node, size=25 + deg_centrality[node]) for node in graph.nodes()]
     else:
-        community_layout(graph, scaling, plot_type)
-
-    fig = gv.vis(
-        graph,
-        show_edge_label=True,
-        edge_label_data_source="label",
-        edge_curvature=0.3,
-        use_node_size_normalization=False,
-        node_size_data_source="size",
-        node_label_data_source="label",
-        layout_algorithm_active=False,
-        show_details=True,
-    )
-    fig.export_html(html_path)
+        community_layout(graph, scaling, plot_type, workers=workers)
+    set_node_sizes(graph, size_metric, values=deg_centrality if size_metric == "degree" else None)
+    return graph
+
+
+def render_editable_network(
+    graph: nx.MultiDiGraph,
+    html_path: Path,
+    plot_type: str = "greedy",
+    workers: int = 1,
+    size_metric: str = "degree",
+    merge_edges: bool = False,
+):
+    """Save the graph as html file.
+
+    The graph is laid out with layout_network, see there for the parameters.
+    The html is written in chunks, see html_writer.export_html_streaming.
+    """
+    print(f"Rendering {html_path}:")
+    graph = layout_network(graph, plot_type, workers, size_metric, merge_edges)
+    export_html_streaming(graph, html_path, **VIS_OPTIONS)
+
+
+def render_static_network(
+    graph: nx.MultiDiGraph,
+    image_path: Path,
+    plot_type: str = "greedy",
+    workers: int = 1,
+    size_metric: str = "degree",
+    merge_edges: bool = False,
+    **image_options,
+):
+    """Save the graph as svg or png image, for graphs too large for the html files.
+
+    The graph is laid out with layout_network, see there for the parameters.
+    image_options, e.g. width and min_edge_length, are passed to static_writer.export_static.
+    """
+    print(f"Rendering {image_path}:")
+    graph = layout_network(graph, plot_type, workers, size_metric, merge_edges)
+    export_static(graph, image_path, **image_options)
+
+
+def undirected_neighbors(graph: nx.Graph, node) -> list:
+    """Return the neighbours of node over in- and out-edges without copying the graph."""
+    if not graph.is_directed():
+        return list(graph.adj[node])
+    return list(dict.fromkeys(itertools.chain(graph.succ[node], graph.pred[node])))
+
+
+def undirected_view(graph: nx.Graph) -> nx.Graph:
+    """Return a read-only undirected view of the graph, no node or edge data is copied."""
+    if not graph.is_directed():
+        return graph
+    return graph.to_undirected(as_view=True)
+
+
+def label_index(graph: nx.Graph) -> dict:
+    """Return a dictionary label -> nodes with that label, for repeated find_node calls."""
+    index: dict = {}
+    for node, label in graph.nodes(data="label"):
+        index.setdefault(label, []).append(node)
+    return index
+
 
+def find_node(graph: nx.Graph, name: str, labels: dict = None):
+    """Return the node called name, or the only node with label name.
 
-def community_layout(graph: nx.MultiDiGraph, scaling: int, alg: str = "greedy") -> list:
-    """Determine the community layout."""
-    if alg == "greedy":
-        communities = nx.community.greedy_modularity_communities(graph)
-    elif alg == "louvain":
-        communities = nx.community.louvain_communities(graph)
+    Without labels, the result of label_index, all node labels are searched.
+    Raises KeyError if there is no such node or the label is not unique.
+    """
+    if name in graph:
+        return name
+    if labels is not None:
+        matches = labels.get(name, [])
     else:
+        matches = [node for node, label in graph.nodes(data="label") if label == name]
+    if len(matches) == 1:
+        return matches[0]
+    if not matches:
+        raise KeyError(f"No node with name or label {name}.")
+    raise KeyError(f"Label {name} is not unique, use one of the node names {matches}.")
+
+
+def ego_network(graph: nx.MultiDiGraph, center: str, hops: int = 2, labels: dict = None) -> nx.MultiDiGraph:
+    """Return the neighbourhood of center up to hops edges away, following in- and out-edges.
+
+    The breadth first search stops after hops levels, only the nodes found and their
+    edges are visited and copied. The cost depends on the size of the neighbourhood,
+    not of the whole graph.
+
+    Parameters
+    ----------
+    graph: MultiDiGraph
+        The graph, it is not changed.
+    center: str
+        Name or unique label of the node in the centre, see find_node.
+    hops: int
+        Maximum distance of the nodes from center, ignoring edge directions.
+    labels: dict
+        Result of label_index for the graph, so that looking up center by its label
+        does not search all nodes.
+
+    Returns
+    -------
+    A new graph with copies of the node and edge attributes.
+
+    """
+    center = find_node(graph, center, labels)
+    found = {center: None}
+    frontier = [center]
+    for _ in range(hops):
+        next_frontier = []
+        for node in frontier:
+            for nbr in undirected_neighbors(graph, node):
+                if nbr not in found:
+                    found[nbr] = None
+                    next_frontier.append(nbr)
+        if not next_frontier:
+            break
+        frontier = next_frontier
+    ego = graph.__class__()
+    ego.graph.update(graph.graph)
+    ego.add_nodes_from((node, dict(graph.nodes[node])) for node in found)
+    for u in found:
+        # hubs like the organisation or the creator of all collaborations: look up the
+        # found nodes in their adjacency instead of scanning it
+        nbrs = graph.succ[u]
+        targets = found if len(nbrs) > len(found) else nbrs
+        ego.add_edges_from(
+            (u, v, key, dict(data))
+            for v in targets
+            if v in found and v in nbrs
+            for key, data in nbrs[v].items()
+        )
+    return ego
+
+
+def community_layout(graph: nx.MultiDiGraph, scaling: int, alg: str = "greedy", workers: int = 1) -> list:
+    """Determine the community layout.
+
+    alg is one of the algorithms in community.COMMUNITY_ALGORITHMS: greedy, louvain or fast.
+    The communities are laid out independently around fixed centers, with workers > 1
+    they are distributed over a process pool. The positions do not depend on workers.
+    """
+    if alg not in COMMUNITY_ALGORITHMS:
         warnings.warn(f"Plotting type {alg} not known. Generate network without specific positioning.")
         return graph
-
-    print(type(communities))
+    communities = detect_communities(graph, alg)
 
     supergraph = nx.cycle_graph(len(communities))
     superpos = nx.spring_layout(supergraph, scale=scaling / 2, seed=429)
     centers = list(superpos.values())
 
-    pos = {}
-    for center, comm in zip(centers, communities):
-        pos.update(nx.spring_layout(nx.subgraph(graph, comm), center=center, scale=scaling / 2, seed=1430))
-    for name, (x, y) in pos.items():
-        node = graph.nodes[name]
-        node["x"] = x
-        node["y"] = y
+    jobs = [
+        _community_layout_job(graph, comm, center, scaling / 2, 1430)
+        for center, comm in zip(centers, communities)
+    ]
+    if workers > 1 and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            results = list(executor.map(_spring_layout_job, jobs, chunksize=chunksize))
+    else:
+        results = [_spring_layout_job(job) for job in jobs]
+
+    for (nodes, *_), positions in zip(jobs, results):
+        for name, (x, y) in zip(nodes, positions):
+            node = graph.nodes[name]
+            node["x"] = x
+            node["y"] = y
 
     return graph
 
 
+def _community_layout_job(graph: nx.MultiDiGraph, comm: set, center, scale: float, seed: int) -> tuple:
+    """Compact description of the spring layout of one community.
+
+    Nodes are listed in the order of the subgraph view and the edges are given by node
+    index with the summed weights of parallel edges, which is the adjacency matrix
+    spring_layout uses for the subgraph itself.
+    """
+    sub = nx.subgraph(graph, comm)
+    nodes = list(sub)
+    index = {node: i for i, node in enumerate(nodes)}
+    weights: dict = {}
+    for u, v, w in sub.edges(data="weight", default=1):
+        pair = (index[u], index[v])
+        weights[pair] = weights.get(pair, 0) + w
+    edges = [(i, j, w) for (i, j), w in weights.items()]
+    return nodes, edges, graph.is_directed(), tuple(center), scale, seed
+
+
+def _spring_layout_job(job: tuple) -> list:
+    """Run the spring layout of one community job, returns positions in node order."""
+    nodes, edges, directed, center, scale, seed = job
+    sub = nx.DiGraph() if directed else nx.Graph()
+    sub.add_nodes_from(range(len(nodes)))
+    sub.add_weighted_edges_from(edges)
+    pos = nx.spring_layout(sub, center=center, scale=scale, seed=seed)
+    return [tuple(pos[i]) for i in range(len(nodes))]
+
+
 def read_graph_config(config_path: Path) -> dict:
     """Read config file."""
     with open(config_path, "rb") as f:
@@ -92,20 +278,23 @@ def color_nodes(graph: nx.MultiDiGraph, graph_config: dict):
         The configuration file
 
     """
-    default_color = graph_config["node_colors"].get("no_type", "lightblue")
     for node in graph.nodes():
-        node_attrs = graph.nodes.get(node)
-        if "color_group" in node_attrs:
-            color_group = node_attrs.get("color_group", "no_type")
-        elif "node_type" in node_attrs:
-            if node_attrs["node_type"] in graph_config["node_types"]:
-                color_group = graph_config["node_types"][node_attrs["node_type"]].get("name", "default")
-            else:
-                color_group = "default"
+        graph.add_node(node, color=node_color(graph.nodes.get(node), graph_config))
+
+
+def node_color(node_attrs: dict, graph_config: dict) -> str:
+    """Return the colour of a node from its color_group or node_type, see color_nodes."""
+    default_color = graph_config["node_colors"].get("no_type", "lightblue")
+    if "color_group" in node_attrs:
+        color_group = node_attrs.get("color_group", "no_type")
+    elif "node_type" in node_attrs:
+        if node_attrs["node_type"] in graph_config["node_types"]:
+            color_group = graph_config["node_types"][node_attrs["node_type"]].get("name", "default")
         else:
             color_group = "default"
-        node_color = graph_config["node_colors"].get(color_group, default_color)
-        graph.add_node(node, color=node_color)
+    else:
+        color_group = "default"
+    return graph_config["node_colors"].get(color_group, default_color)
 
 
 def color_edges(graph: nx.MultiDiGraph, graph_config: dict):
@@ -120,81 +309,113 @@ def color_edges(graph: nx.MultiDiGraph, graph_config: dict):
         graph[edge[0]][edge[1]][edge[2]]["color"] = edge_color
 
 
+def nodes_of_type(graph: nx.MultiDiGraph, node_type: str) -> list:
+    """Return the nodes of graph with the given node_type."""
+    return [n for n, ntype in graph.nodes(data="node_type") if ntype == node_type]
+
+
+def _approves(graph: nx.MultiDiGraph, source, target) -> bool:
+    """Whether the first edge from source to target is the action approves."""
+    return (
+        graph.has_edge(source, target)
+        and graph.get_edge_data(source, target)[0]["edge_type"] == "ACTIONS"
+        and graph.get_edge_data(source, target)[0].get("label") == "approves"
+    )
+
+
+def _adjacent(graph: nx.Graph, u, v) -> bool:
+    """Whether u and v are connected by an edge in either direction."""
+    return v in graph.adj[u] or (graph.is_directed() and v in graph.pred[u])
+
+
+def ownership_paths(graph: nx.MultiDiGraph, coll, org_adm) -> list:
+    """Return the paths that connect a collaboration to an organisation admin.
+
+    A collaboration belongs to an org_admin if there exists a path, ignoring edge
+    directions, which only contains
+    collaboration -> organisation -> orgadmin or
+    collaboration -> unit -> organisation -> orgadmin (or organisation and unit swapped).
+    Only the neighbours of coll and org_adm are inspected, so the cost does not grow
+    with the number of collaborations in the organisation.
+    """
+    node_type = graph.nodes(data="node_type")
+    middle = ("ORGANISATION", "UNIT")
+    adm_nbrs = [y for y in undirected_neighbors(graph, org_adm) if node_type[y] in middle]
+    paths = []
+    for x in undirected_neighbors(graph, coll):
+        if node_type[x] not in middle:
+            continue
+        if node_type[x] == "ORGANISATION" and _adjacent(graph, x, org_adm):
+            paths.append([coll, x, org_adm])
+        for y in adm_nbrs:
+            if node_type[y] != node_type[x] and _adjacent(graph, x, y):
+                paths.append([coll, x, y, org_adm])
+    return paths
+
+
+def coll_app_verdict(graph: nx.MultiDiGraph, coll, org_adm, app, app_adm, owned: bool = None) -> tuple:
+    """Decide whether a collaboration can be connected to an application.
+
+    Parameters
+    ----------
+    graph: MultiDiGraph
+        Graph with node types and the action edges of the admins.
+    coll, org_adm, app, app_adm:
+        The collaboration, organisation admin, application and application admin.
+    owned: bool
+        Whether coll belongs to org_adm, see ownership_paths. Computed if None.
+
+    Returns
+    -------
+    (edge attributes, reason): the attributes of the inferred edge from coll to app
+    and the reason of the verdict, the attributes are None if coll does not belong
+    to org_adm.
+
+    """
+    # Org rejects first, app cannot reject or approve
+    if graph.get_edge_data(org_adm, app)[0].get("label") == "denies":
+        return {"edge_type": "REJECT", "label": "reject by org"}, f"Not Approved: {app} {org_adm}"
+    if owned is None:
+        owned = len(ownership_paths(graph, coll, org_adm)) > 0
+    if not owned:
+        return None, f"Not owned: {coll} {org_adm}"
+    if not (graph.has_edge(app, app_adm) and _approves(graph, app_adm, coll)):
+        return {"edge_type": "REJECT", "label": "reject by app"}, f"Not Approved: {coll} {app_adm} {app}"
+    if not _approves(graph, org_adm, app):
+        # in case someone created a graph where org and app reject
+        return {"edge_type": "REJECT", "label": "reject by org"}, f"Not Approved: {app} {org_adm}"
+    return {"edge_type": "BACKBONE"}, f"Approved: {coll} {app_adm} {app} {org_adm}"
+
+
 def infer_coll_app_edges(graph: nx.MultiDiGraph, verbose):
-    # pylint: disable=R1702
     """Infer the relationship between an app and a collaboration.
 
     Whether a collaboration can be connected to an application depends on the organisation
     admin approving the application and an application admin approving a collaboration.
     Those can be infered from the action edges "appoves" and "disapproves".
+    The verdict per combination is given by coll_app_verdict.
     """
-    org_adms = [n for n in graph.nodes if graph.nodes.get(n)["node_type"] == "ORG_ADMIN"]
-    app_adms = [n for n in graph.nodes if graph.nodes.get(n)["node_type"] == "APP_ADMIN"]
-    apps = [n for n in graph.nodes if graph.nodes.get(n)["node_type"] == "APPLICATION"]
-    colls = [n for n in graph.nodes if graph.nodes.get(n)["node_type"] == "COLLABORATION"]
-
-    approved_by_app = [
-        (coll, adm, app)
-        for (coll, adm, app) in itertools.product(colls, app_adms, apps)
-        if graph.has_edge(adm, coll)
-        and graph.has_edge(app, adm)
-        and graph.get_edge_data(adm, coll)[0]["edge_type"] == "ACTIONS"
-        and graph.get_edge_data(adm, coll)[0]["label"] == "approves"
-    ]
-    approved_by_org = [
-        (a, o)
-        for a, o in itertools.product(apps, org_adms)
-        if graph.has_edge(o, a)
-        and graph.get_edge_data(o, a)[0]["edge_type"] == "ACTIONS"
-        and graph.get_edge_data(o, a)[0]["label"] == "approves"
-    ]
-
-    for coll, org_adm, app, app_adm in itertools.product(colls, org_adms, apps, app_adms):
-        # a collaboration belongs to an org_admin if there exists a path which only contains
-        # collaboration -> organisation -> orgadmin
-        # collaboration -> unit -> organisation -> orgadmin
-
-        # Org rejects first, app cannot reject or approve
-        if graph.get_edge_data(org_adm, app)[0]["label"] == "denies":
-            if verbose:
-                print("Not Approved:", app, org_adm)
-            graph.add_edge(coll, app, edge_type="REJECT", label="reject by org")
-        else:
-
-            paths = [
-                sorted(["COLLABORATION", "ORGANISATION", "ORG_ADMIN"]),
-                sorted(["COLLABORATION", "ORGANISATION", "ORG_ADMIN", "UNIT"]),
-            ]
-
-            all_paths = nx.all_simple_paths(graph.to_undirected(), coll, org_adm)
-            valid_paths = []
-            for path in all_paths:
-                node_types = [graph.nodes.get(n)["node_type"] for n in path]
-                if sorted(node_types) in paths:
-                    valid_paths.append(path)
+    org_adms = nodes_of_type(graph, "ORG_ADMIN")
+    app_adms = nodes_of_type(graph, "APP_ADMIN")
+    apps = nodes_of_type(graph, "APPLICATION")
+    colls = nodes_of_type(graph, "COLLABORATION")
+
+    # edges added below connect collaborations and applications and cannot be part of an
+    # ownership path
+    for coll, org_adm in itertools.product(colls, org_adms):
+        owned = None
+        for app, app_adm in itertools.product(apps, app_adms):
+            if owned is None and graph.get_edge_data(org_adm, app)[0].get("label") != "denies":
+                valid_paths = ownership_paths(graph, coll, org_adm)
+                owned = len(valid_paths) > 0
+                if verbose:
+                    print(coll, org_adm, "valid paths: ", valid_paths)
+            attrs, reason = coll_app_verdict(graph, coll, org_adm, app, app_adm, owned=bool(owned))
             if verbose:
-                print(coll, org_adm, app, app_adm, "valid paths: ", valid_paths)
-            if len(valid_paths) > 0:
-                # we choose >0 since there might also be trust and other action edges
-                # which results in multiple paths, we are also working with multigraphs here.
-                if (coll, app_adm, app) in approved_by_app:
-                    if verbose:
-                        print("Approved:", coll, app_adm, app)
-                    if (app, org_adm) in approved_by_org:
-                        if verbose:
-                            print("Approved:", app, org_adm)
-                        graph.add_edge(coll, app, edge_type="BACKBONE")
-                    else:
-                        # in case someone created a graph where org and app reject
-                        if verbose:
-                            print("Not Approved:", app, org_adm)
-                        graph.add_edge(coll, app, edge_type="REJECT", label="reject by org")
-                else:
-                    if verbose:
-                        print("Not Approved:", coll, app_adm, app)
-                    graph.add_edge(coll, app, edge_type="REJECT", label="reject by app")
-        if verbose:
-            print("------")
+                print(reason)
+                print("------")
+            if attrs is not None:
+                graph.add_edge(coll, app, **attrs)
 
 
 def subgraph(graph: nx.MultiDiGraph, edge_types: list, node_types: list) -> nx.MultiDiGraph:
@@ -217,3 +438,30 @@ def subgraph(graph: nx.MultiDiGraph, edge_types: list, node_types: list) -> nx.M
     if node_types == []:
         return g
     return g.subgraph(selected_nodes)
+
+
+def merge_parallel_edges(graph: nx.MultiDiGraph) -> nx.MultiDiGraph:
+    """Merge parallel edges with the same direction into one weighted edge.
+
+    A merged edge keeps the attributes of the first edge, e.g. its colour, and gets
+    weight (number of merged edges), edge_types (list of their edge_type) and a label
+    combining the distinct labels. Single edges are copied unchanged. The node
+    attributes are copied, the input graph is not modified.
+    """
+    merged = nx.MultiDiGraph()
+    merged.graph.update(graph.graph)
+    merged.add_nodes_from(graph.nodes(data=True))
+    for u, nbrs in graph.adj.items():
+        for v, keydict in nbrs.items():
+            edges = list(keydict.values())
+            if len(edges) == 1:
+                merged.add_edge(u, v, **edges[0])
+                continue
+            attrs = dict(edges[0])
+            attrs["weight"] = len(edges)
+            attrs["edge_types"] = [e.get("edge_type", "NO_TYPE") for e in edges]
+            labels = list(dict.fromkeys(e["label"] for e in edges if "label" in e))
+            if labels:
+                attrs["label"] = ", ".join(labels)
+            merged.add_edge(u, v, **attrs)
+    return merged
@@ -0,0 +1,204 @@
+"""Validate SRAM exports and configuration files before building graphs.
+
+Malformed input otherwise fails deep inside the pipeline, e.g. with a KeyError in
+color_edges. The checks below run in a single pass over the input and collect all
+problems, so they can be reported at once.
+"""
+
+# Node and edge types that nodes_to_graph creates for an SRAM organisation.
+# Edges from the organisation to collaborations without unit carry no edge_type,
+# color_edges looks them up as NO_TYPE.
+SRAM_NODE_TYPES = [
+    "ORGANISATION",
+    "UNIT",
+    "COLLABORATION",
+    "APPLICATION",
+    "CO_GROUP",
+    "COLL_ADMIN",
+    "CO_MEMBER",
+]
+SRAM_EDGE_TYPES = ["BACKBONE", "MEMBERS", "ACTIONS", "NO_TYPE"]
+
+# keys of the organisation read by get_nodes_from_dict
+SRAM_ORGANISATION_KEYS = ["name", "short_name", "units", "collaborations"]
+
+
+def _check_type(problems: list, value, expected: type, where: str) -> bool:
+    if not isinstance(value, expected):
+        problems.append(f"{where}: expected {expected.__name__}, found {type(value).__name__}.")
+        return False
+    return True
+
+
+def _check_keys(problems: list, entry: dict, keys: list, where: str) -> bool:
+    missing = [key for key in keys if key not in entry]
+    if missing:
+        problems.append(f"{where}: missing {', '.join(missing)}.")
+    return not missing
+
+
+def validate_sram_dict(sram_dict: dict) -> list:
+    """Check the structure and references of an SRAM organisation export.
+
+    Checks that all keys get_nodes_from_dict reads exist, that collaborations only
+    reference units of the organisation, that collaboration names are unique and
+    that every membership has a user with uid and username.
+
+    Returns
+    -------
+    List of problems, empty if the export is valid.
+
+    """
+    problems: list[str] = []
+    if not _check_type(problems, sram_dict, dict, "organisation"):
+        return problems
+    if not _check_keys(problems, sram_dict, SRAM_ORGANISATION_KEYS, "organisation"):
+        return problems
+    validator = SramValidator()
+    validator.units(sram_dict["units"])
+    if not _check_type(validator.problems, sram_dict["collaborations"], list, "organisation collaborations"):
+        return validator.problems
+    for coll in sram_dict["collaborations"]:
+        validator.collaboration(coll)
+    return validator.finish()
+
+
+class SramValidator:
+    """Collect the problems of an SRAM export one collaboration at a time.
+
+    validate_sram_dict checks a decoded export with it, read_organisation the
+    collaborations of an export that is streamed from a file. References to units
+    by collaborations that come before the units of the organisation in the file are
+    checked in finish.
+    """
+
+    def __init__(self):
+        """Start without problems."""
+        self.problems: list[str] = []
+        self._units: set = None
+        self._unit_references: list = []
+        self._names: set = set()
+        self._count = 0
+
+    def units(self, units: list):
+        """Set the units of the organisation."""
+        if not _check_type(self.problems, units, list, "organisation units"):
+            units = []
+        self._units = set(units)
+
+    def collaboration(self, coll: dict) -> bool:
+        """Check the next collaboration, return False if it has problems."""
+        problems = self.problems
+        before = len(problems)
+        where = f"collaborations[{self._count}]"
+        self._count += 1
+        if not _check_type(problems, coll, dict, where):
+            return False
+        if "name" in coll:
+            where = f"{where} '{coll['name']}'"
+            if coll["name"] in self._names:
+                problems.append(f"{where}: duplicate collaboration name.")
+            self._names.add(coll["name"])
+        if not _check_keys(problems, coll, ["name", "created_by", "units", "services", "groups"], where):
+            return False
+        if _check_type(problems, coll["units"], list, f"{where} units"):
+            for unit in coll["units"]:
+                if self._units is None:
+                    self._unit_references.append((where, unit))
+                elif unit not in self._units:
+                    problems.append(f"{where}: unit '{unit}' is not in the units of the organisation.")
+        for key in ("services", "groups"):
+            if not _check_type(problems, coll[key], list, f"{where} {key}"):
+                continue
+            for j, item in enumerate(coll[key]):
+                if not isinstance(item, dict) or "name" not in item:
+                    problems.append(f"{where} {key}[{j}]: missing name.")
+        memberships = coll.get("collaboration_memberships", [])
+        if not _check_type(problems, memberships, list, f"{where} collaboration_memberships"):
+            return False
+        for j, membership in enumerate(memberships):
+            m_where = f"{where} collaboration_memberships[{j}]"
+            if not _check_type(problems, membership, dict, m_where) or not _check_keys(
+                problems, membership, ["user", "role", "created_by"], m_where
+            ):
+                continue
+            if _check_type(problems, membership["user"], dict, f"{m_where} user"):
+                _check_keys(problems, membership["user"], ["uid", "username"], f"{m_where} user")
+        return len(problems) == before
+
+    def finish(self, keys: list = None) -> list:
+        """Return all problems.
+
+        keys are the keys of the organisation if they were not checked before, e.g.
+        for a streamed export.
+        """
+        if keys is not None:
+            _check_keys(self.problems, dict.fromkeys(keys), SRAM_ORGANISATION_KEYS, "organisation")
+        units = self._units or set()
+        for where, unit in self._unit_references:
+            if unit not in units:
+                self.problems.append(f"{where}: unit '{unit}' is not in the units of the organisation.")
+        self._unit_references = []
+        return self.problems
+
+
+def validate_config(graph_config: dict, node_types: list = None, edge_types: list = None) -> list:
+    """Check a graph configuration.
+
+    Every node type needs a name and an integer level, node colour groups should have
+    a colour. Optionally checks that the given node_types and edge_types, e.g.
+    SRAM_NODE_TYPES and SRAM_EDGE_TYPES, are configured.
+
+    Returns
+    -------
+    List of problems, empty if the configuration is valid.
+
+    """
+    problems: list[str] = []
+    if not _check_keys(problems, graph_config, ["node_types", "node_colors", "edge_colors"], "config"):
+        return problems
+    node_colors = graph_config["node_colors"]
+    for ntype, entry in graph_config["node_types"].items():
+        where = f"config node_types.{ntype}"
+        if not _check_type(problems, entry, dict, where):
+            continue
+        if not _check_keys(problems, entry, ["name", "level"], where):
+            continue
+        _check_type(problems, entry["level"], int, f"{where}.level")
+        if entry["name"] not in node_colors:
+            problems.append(f"{where}: name '{entry['name']}' has no colour in node_colors.")
+    for ntype in node_types or []:
+        if ntype not in graph_config["node_types"]:
+            problems.append(f"config node_types: node type {ntype} is not configured.")
+    for etype in edge_types or []:
+        if etype not in graph_config["edge_colors"]:
+            problems.append(f"config edge_colors: edge type {etype} has no colour.")
+    return problems
+
+
+def validate_example_graph(example_graphs: dict, section: str, graph_config: dict) -> list:
+    """Check a graph section of an example file against the configuration.
+
+    Returns
+    -------
+    List of problems, empty if the section can be rendered with graph_config.
+
+    """
+    problems: list[str] = []
+    if section not in example_graphs:
+        return [f"examples: graph {section} is not defined."]
+    edge_colors = graph_config.get("edge_colors", {})
+    for key, edge_set in example_graphs[section].items():
+        if key == "explanation":
+            continue
+        where = f"examples {section}.{key}"
+        if not _check_type(problems, edge_set, dict, where) or not _check_keys(
+            problems, edge_set, ["type", "edges"], where
+        ):
+            continue
+        if edge_set["type"] not in edge_colors:
+            problems.append(f"{where}: edge type {edge_set['type']} has no colour in edge_colors.")
+        for edge in edge_set["edges"]:
+            if len(edge) not in (2, 3):
+                problems.append(f"{where}: edge {edge} should be [u, v] or [u, v, label].")
+    return problems
@@ -0,0 +1,211 @@
+"""Watch mode: render a graph again when its input or configuration file changes.
+
+The rendering is split into stages, the graph of each stage is kept in memory:
+
+    build   parse the input and build the graph with node types, levels and colours
+    levels  set the levels of the nodes from the configuration
+    layout  set the positions and sizes of the nodes, see utils.layout_network
+    colors  set the node and edge colours from the configuration
+    export  write the html file or image
+
+A change only redoes the stages it invalidates:
+
+- input file: build and all later stages, if the parsed input changed;
+- node types added, removed or reordered, or other sections than node_types,
+  node_colors and edge_colors: build and all later stages;
+- levels of node types: levels, the layout only for the bipartite plot, export;
+- names of node types, node_colors and edge_colors: colors and export.
+
+Files are polled for changes of their modification time and size, no file system
+notification library is needed.
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import networkx as nx
+
+from surfiamviz.html_writer import export_html_streaming
+from surfiamviz.static_writer import STATIC_FORMATS, export_static
+from surfiamviz.utils import VIS_OPTIONS, color_edges, color_nodes, layout_network, read_graph_config
+
+# sections of the configuration whose changes do not require a new graph
+_STYLE_SECTIONS = ("node_types", "node_colors", "edge_colors")
+
+
+def config_changes(old: dict, new: dict) -> set:
+    """Return the stages invalidated by changing the configuration old into new.
+
+    The layout stage is not included, it depends on the plot type, see WatchSession.
+    """
+    if old == new:
+        return set()
+    old_types, new_types = old.get("node_types", {}), new.get("node_types", {})
+    other_sections = {key: value for key, value in old.items() if key not in _STYLE_SECTIONS}
+    if list(old_types) != list(new_types) or other_sections != {
+        key: value for key, value in new.items() if key not in _STYLE_SECTIONS
+    }:
+        return {"build", "levels", "colors", "export"}
+    stages = {"export"}
+    if any(old_types[ntype].get("level") != new_types[ntype].get("level") for ntype in old_types):
+        stages.add("levels")
+    if (
+        any(old_types[ntype].get("name") != new_types[ntype].get("name") for ntype in old_types)
+        or old.get("node_colors") != new.get("node_colors")
+        or old.get("edge_colors") != new.get("edge_colors")
+    ):
+        stages.add("colors")
+    return stages
+
+
+def set_levels(graph: nx.MultiDiGraph, graph_config: dict):
+    """Set the level and subset of all nodes with a configured node_type, existing levels are replaced."""
+    node_types = graph_config["node_types"]
+    for _, attrs in graph.nodes(data=True):
+        if attrs.get("node_type") in node_types:
+            attrs["level"] = attrs["subset"] = node_types[attrs["node_type"]]["level"]
+
+
+def _file_state(path: Path) -> Optional[tuple]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WatchSession:
+    """Graph of one input and configuration file, rendered again when the files change."""
+
+    def __init__(
+        self,
+        load: Callable[[], Any],
+        build: Callable[[Any, dict], nx.MultiDiGraph],
+        config_path: Path,
+        output: Path,
+        input_path: Path = None,
+        plot_type: str = "bipartite",
+        workers: int = 1,
+        size_metric: str = "degree",
+        merge_edges: bool = False,
+        image_options: dict = None,
+    ):
+        """Create the session, nothing is read before render.
+
+        Parameters
+        ----------
+        load: callable
+            Parse the input file, called again when input_path changes. The graph is only
+            built again if the result differs from the previous one.
+        build: callable
+            Build the graph with node types, levels and colours from the result of load
+            and the configuration.
+        config_path: Path
+            Configuration file.
+        output: Path
+            Html file, or svg or png image.
+        input_path: Path
+            Input file, None if the input is not a file, e.g. fetched from a server.
+        plot_type, workers, size_metric, merge_edges:
+            Options of utils.layout_network.
+        image_options: dict
+            Options of static_writer.export_static.
+
+        """
+        self.load = load
+        self.build = build
+        self.config_path = Path(config_path)
+        self.output = Path(output)
+        self.input_path = None if input_path is None else Path(input_path)
+        self.layout_options = {
+            "plot_type": plot_type,
+            "workers": workers,
+            "size_metric": size_metric,
+            "merge_edges": merge_edges,
+        }
+        self.image_options = image_options or {}
+        self.source: Any = None
+        self.graph_config: dict = None
+        # the laid out graph, colours and levels are updated in place
+        self.graph: nx.MultiDiGraph = None
+        self._states: dict = {}
+
+    def _watched(self) -> list:
+        return [path for path in (self.input_path, self.config_path) if path is not None]
+
+    def render(self, source: Any = None):
+        """Run all stages, source is the result of load if it was called before."""
+        self._states = {path: _file_state(path) for path in self._watched()}
+        self.source = self.load() if source is None else source
+        self.graph_config = read_graph_config(self.config_path)
+        self._run({"build", "levels", "colors", "export"}, self.source, self.graph_config)
+
+    def poll(self) -> set:
+        """Check the files once and redo the invalidated stages, returns the stages that ran.
+
+        Errors in the changed files are printed, the output is then not updated and
+        the next change is compared with the last input and configuration that worked.
+        """
+        changed = []
+        for path in self._watched():
+            state = _file_state(path)
+            if state != self._states.get(path):
+                self._states[path] = state
+                changed.append(path)
+        stages: set = set()
+        source, graph_config = self.source, self.graph_config
+        try:
+            if self.input_path in changed:
+                source = self.load()
+                if source != self.source:
+                    stages.update({"build", "levels", "colors", "export"})
+            if self.config_path in changed:
+                graph_config = read_graph_config(self.config_path)
+                stages.update(config_changes(self.graph_config, graph_config))
+            self._run(stages, source, graph_config)
+        except Exception as error:
+            print(f"ERROR {error!r}, {self.output} was not updated.")
+            return set()
+        self.source, self.graph_config = source, graph_config
+        return stages
+
+    def _run(self, stages: set, source: Any, graph_config: dict):
+        if not stages:
+            return
+        start = time.perf_counter()
+        layout_options = dict(self.layout_options)
+        if "build" in stages:
+            graph = self.build(source, graph_config)
+            stages.add("layout")
+        else:
+            # the kept graph was merged by the first layout already
+            graph = self.graph
+            layout_options["merge_edges"] = False
+        if "levels" in stages:
+            set_levels(graph, graph_config)
+            if layout_options["plot_type"] == "bipartite":
+                stages.add("layout")
+        if "colors" in stages:
+            color_nodes(graph, graph_config)
+            color_edges(graph, graph_config)
+        if "layout" in stages:
+            graph = layout_network(graph, **layout_options)
+        self.graph = graph
+        if self.output.suffix.lower().lstrip(".") in STATIC_FORMATS:
+            export_static(graph, self.output, overwrite=True, **self.image_options)
+        else:
+            export_html_streaming(graph, self.output, overwrite=True, **VIS_OPTIONS)
+        order = [stage for stage in ("build", "levels", "layout", "colors", "export") if stage in stages]
+        print(f"{', '.join(order)}: {self.output} in {time.perf_counter() - start:.2f} s.")
+
+    def run(self, interval: float = 1.0, source: Any = None):
+        """Render and poll the files every interval seconds until interrupted, see render for source."""
+        self.render(source)
+        print(f"Watching {', '.join(str(path) for path in self._watched())}, stop with Ctrl-C.")
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            print("Stopped watching.")
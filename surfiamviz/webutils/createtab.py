@@ -1,9 +1,89 @@
 """Create."""
 
+import os
+import time
+from pathlib import Path
+
 import streamlit as st
+import streamlit.components.v1 as components
+
+from surfiamviz.builder import GraphBuilder
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.utils import read_graph_config
+
+repo_root = Path(os.path.realpath(__file__)).parent.parent.parent
+
+
+def _start(graph_config):
+    form = st.form(key="create_start")
+    example_graphs = import_example_graph(repo_root / "example_graphs/sram_examples.toml")
+    option = form.selectbox("Start from an example or an empty graph:", ["empty", *example_graphs.keys()])
+    if form.form_submit_button("Start"):
+        if option == "empty":
+            st.session_state["builder"] = GraphBuilder(graph_config)
+        else:
+            st.session_state["builder"] = GraphBuilder.from_example(example_graphs, option, graph_config)
+
+
+def _add_node(builder):
+    form = st.form(key="create_node", clear_on_submit=True)
+    col1, col2 = form.columns([2, 2])
+    name = col1.text_input("Node name")
+    node_type = col2.selectbox("Node type", builder.graph_config["node_types"].keys())
+    if form.form_submit_button("Add node") and name:
+        return lambda: builder.add_node(name, node_type)
+    return None
+
+
+def _add_edge(builder):
+    form = st.form(key="create_edge", clear_on_submit=True)
+    col1, col2 = form.columns([2, 2])
+    # new nodes are added with the edge, their type is taken from the name
+    source = col1.text_input("From node")
+    target = col2.text_input("To node")
+    col1, col2 = form.columns([2, 2])
+    edge_type = col1.selectbox("Edge type", builder.graph_config["edge_colors"].keys())
+    label = col2.text_input("Label, e.g. approves, denies, create, invite")
+    if form.form_submit_button("Add edge") and source and target:
+        return lambda: builder.add_edge(source, target, edge_type, label or None)
+    return None
+
+
+def _remove(builder):
+    form = st.form(key="create_remove")
+    col1, col2 = form.columns([2, 2])
+    node = col1.selectbox("Remove node", list(builder.graph), index=None)
+    edges = list(dict.fromkeys((u, v) for u, v, _ in builder.user_edges()))
+    edge = col2.selectbox("Remove edge", edges, index=None, format_func=lambda e: f"{e[0]} -> {e[1]}")
+    if form.form_submit_button("Remove"):
+        if node:
+            return lambda: builder.remove_node(node)
+        if edge:
+            return lambda: builder.remove_edge(*edge)
+    return None
 
 
 def create():
     """Create own graphs tab."""
     st.title("Create your own SRAM organisation graph.")
-    st.warning("Not implemented.", icon="⚠️")
+    graph_config = read_graph_config(repo_root / "configs/sram_config.toml")
+    _start(graph_config)
+    builder = st.session_state.get("builder")
+    if builder is None:
+        st.write("Start from an example or an empty graph.")
+        return
+
+    # an edit only updates the affected nodes, edges and inferred collaboration-application edges
+    for edit in (_add_node(builder), _add_edge(builder), _remove(builder)):
+        if edit is not None:
+            start = time.perf_counter()
+            try:
+                edit()
+                st.caption(f"Updated in {(time.perf_counter() - start) * 1000:.1f} ms.")
+            except (KeyError, ValueError) as error:
+                st.write(error.args[0])
+
+    if builder.graph.number_of_nodes() > 0:
+        components.html(builder.html(), height=435)
+    with st.expander("Graph section for the example file"):
+        st.code(builder.to_example_section("my_graph"), language="toml")
@@ -1,5 +1,6 @@
 """Explore tab."""
 
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -7,17 +8,23 @@ from pathlib import Path
 import streamlit as st
 import streamlit.components.v1 as components
 
+from surfiamviz.centrality import CENTRALITY_METRICS
 from surfiamviz.graph_from_sram_json import (
     get_nodes_from_dict,
     get_sram_org,
+    get_sram_org_partial,
+    get_sram_org_skeleton,
     get_sram_url,
     stats_dict,
 )
+from surfiamviz.incidence import Incidence
+from surfiamviz.metrics import stage
+from surfiamviz.render_server import sram_request
 from surfiamviz.utils import (
     read_graph_config,
     subgraph,
 )
-from surfiamviz.webutils.utils import _load_graph, _set_attributes, _write_graph_to_file
+from surfiamviz.webutils.utils import _positioned_graph, _render_to_file, _write_graph_to_file
 
 repo_root = Path(os.path.realpath(__file__)).parent.parent.parent
 
@@ -40,15 +47,63 @@ def _input():
     sram_form.markdown("#### 2b) Or provide an exported SRAM file (json):")
     upload_sram_org = sram_form.file_uploader("SRAM organisation json", type=["json"])
     sram_form.markdown("#### 3) Choose the layout of the network:")
-    plotting_option = sram_form.selectbox("Choose the plotting type:", ["bipartite", "greedy", "louvain"])
+    plotting_option = sram_form.selectbox("Choose the plotting type:", ["bipartite", "greedy", "louvain", "fast"])
+    size_option = sram_form.selectbox("Size the nodes by:", CENTRALITY_METRICS)
+    merge_option = sram_form.checkbox("Merge parallel edges.", value=False)
+    col1, col2 = sram_form.columns([3, 1])
+    focus = col1.text_input("Only show the neighbourhood of (user, collaboration or service):")
+    hops = col2.number_input("Hops", min_value=0, max_value=10, value=2)
     sram_form.form_submit_button("**Render**", icon=":material/thumb_up:")
-    return config_option, api_key, sram_instance, upload_sram_org, plotting_option, download
+    plot_options = {
+        "plot_type": plotting_option,
+        "size_metric": size_option,
+        "merge_edges": merge_option,
+        "focus": focus.strip() or None,
+        "hops": int(hops),
+    }
+    return config_option, api_key, sram_instance, upload_sram_org, plot_options, download
+
+
+def _selection(skeleton):
+    st.markdown("#### Optionally restrict the graph to units or collaborations:")
+    col1, col2 = st.columns([2, 2])
+    sel_units = col1.multiselect("Units", skeleton["units"])
+    sel_colls = col2.multiselect("Collaborations", [coll["name"] for coll in skeleton["collaborations"]])
+    return sel_units, sel_colls
 
 
 def _stats(sram_dict):
     st.header("Statistics of the Organisation")
-    org_stats = stats_dict(get_nodes_from_dict(sram_dict))
+    with stage("stats"):
+        nodes = get_nodes_from_dict(sram_dict)
+        org_stats = stats_dict(nodes)
     st.write(json.loads(org_stats))
+    _co_membership(nodes)
+
+
+def _co_membership(nodes):
+    st.header("Co-membership")
+    try:
+        with stage("incidence"):
+            incidence = Incidence.from_nodes(nodes)
+    except ImportError as error:
+        st.write(error.args[0])
+        return
+    col1, col2 = st.columns([2, 2])
+    top = col1.number_input("Number of similar collaborations", min_value=1, max_value=100, value=10)
+    similar_to = col2.selectbox("Similar to collaboration", incidence.collaborations, index=None)
+    with stage("co_membership"):
+        pairs = incidence.similar_collaborations(int(top), similar_to)
+        outliers = incidence.outlier_users()
+    st.markdown("Collaborations that share most members (Jaccard index of their members):")
+    st.dataframe(
+        [{"collaboration": a, "similar collaboration": b, "shared users": shared, "jaccard": jaccard}
+         for a, b, shared, jaccard in pairs]
+    )
+    st.markdown("Users in unusually many collaborations:")
+    st.dataframe(
+        [{"uid": uid, "collaborations": count, "score": score} for uid, count, score in outliers]
+    )
 
 
 def _subgraph(graph_config):
@@ -61,32 +116,57 @@ def _subgraph(graph_config):
     return submit_subgraph, sel_edges, sel_nodes
 
 
+def _read_upload(upload):
+    """Return the decoded upload and a hash of its content.
+
+    Both are kept in the session, so the export is decoded and hashed once per upload
+    and not again for every focus or option the user changes.
+    """
+    cached = st.session_state.get("upload")
+    if cached is None or cached[0] != upload.file_id:
+        data = upload.getvalue()
+        cached = (upload.file_id, json.loads(data.decode("utf-8")), hashlib.blake2b(data, digest_size=16).hexdigest())
+        st.session_state["upload"] = cached
+    return cached[1], cached[2]
+
+
 def explore():
     """Load sram graphs and explore tab."""
     sram_dict = None
+    sram_hash = None
     st.title("Explore your own SRAM organisation.")
-    config_option, api_key, sram_instance, upload_sram_org, plot, download = _input()
+    config_option, api_key, sram_instance, upload_sram_org, plot_options, download = _input()
     if config_option:
         graph_config = read_graph_config(Path(config_option))
     else:
         st.write(f"Please create a config file in {repo_root / 'configs'}.")
     if api_key and sram_instance:
         server_url = get_sram_url(sram_instance)
-        sram_dict = get_sram_org(api_key, server=server_url)
         if download:
+            sram_dict = get_sram_org(api_key, server=server_url)
             download_path = Path("~").expanduser() / "Downloads" / "sram_org.json"
             with open(download_path, "w", encoding="utf-8") as fp:
                 json.dump(sram_dict, fp, indent=4)
+        else:
+            # load the collaborations and memberships only for the selected part of the organisation
+            skeleton = get_sram_org_skeleton(api_key, server=server_url)
+            sel_units, sel_colls = _selection(skeleton)
+            sram_dict = get_sram_org_partial(
+                api_key, server=server_url, units=sel_units, collaborations=sel_colls, skeleton=skeleton
+            )
     elif upload_sram_org:
-        stringio = upload_sram_org.getvalue().decode("utf-8")
-        sram_dict = json.loads(stringio)
+        sram_dict, sram_hash = _read_upload(upload_sram_org)
     else:
         st.write("Please provide information.")
 
     if sram_dict:
-        sram_graph = _load_graph(sram_dict)
-        _set_attributes(sram_graph, graph_config)
-        _write_graph_to_file(sram_graph, filename=repo_root / "gravis_html/streamlit_graph.html", plot_type=plot)
+        # parse, layout and export run on the render server if one is configured
+        try:
+            request = sram_request(sram_dict, graph_config, sram_hash=sram_hash, **plot_options)
+            _render_to_file(request, repo_root / "gravis_html/streamlit_graph.html")
+        except KeyError as error:
+            st.write(error.args[0])
+            return
         with open(repo_root / "gravis_html/streamlit_graph.html", "r", encoding="utf-8") as htmlfile:
             components.html(htmlfile.read(), height=435)
 
@@ -94,7 +174,10 @@ def explore():
 
         if submit_subgraph:
             try:
-                sg = subgraph(sram_graph, sel_edges, sel_nodes)
+                # cut from the graph as it was rendered above, so the nodes keep their positions
+                sram_graph = _positioned_graph(request)
+                with stage("subgraph") as timed:
+                    sg = timed.graph(subgraph(sram_graph, sel_edges, sel_nodes))
                 _write_graph_to_file(sg, repo_root / "gravis_html/subgraph.html")
                 with open(repo_root / "gravis_html/subgraph.html", "r", encoding="utf-8") as htmlfile:
                     components.html(htmlfile.read(), height=435)
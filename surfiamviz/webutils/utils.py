@@ -1,36 +1,51 @@
 """Utils for the web app."""
 
+import os
 from pathlib import Path
 
-from surfiamviz.graph_from_config import (
-    set_node_levels_from_config,
-    set_node_type,
-)
-from surfiamviz.graph_from_sram_json import (
-    get_nodes_from_dict,
-    nodes_to_graph,
-)
+from surfiamviz.metrics import stage
+from surfiamviz.render_server import RENDER_SERVER_ENV, build_graph, render_graph, render_remote
 from surfiamviz.utils import (
-    color_edges,
-    color_nodes,
+    layout_network,
     render_editable_network,
 )
 
 
-def _load_graph(s_dict):
-    nodes = get_nodes_from_dict(s_dict)
-    g = nodes_to_graph(nodes)
-    return g
-
-
-def _set_attributes(g, g_config):
-    set_node_type(g, g_config)
-    set_node_levels_from_config(g, g_config)
-    color_nodes(g, g_config)
-    color_edges(g, g_config)
-
-
-def _write_graph_to_file(g, filename="gravis_html/streamlit_graph.html", plot_type=None):
+def _write_graph_to_file(g, filename="gravis_html/streamlit_graph.html", plot_type=None, size_metric="degree"):
     if Path(filename).exists():
         Path(filename).unlink()
-    render_editable_network(g, filename, plot_type)
+    with stage("write_html", plot=str(plot_type)) as timed:
+        render_editable_network(timed.graph(g), filename, plot_type, size_metric=size_metric)
+
+
+def _positioned_graph(request):
+    """Return the graph of a render request with the positions it is rendered with, to cut subgraphs from."""
+    with stage("build_graph", kind=request["kind"]) as timed:
+        graph = timed.graph(build_graph(request))
+    with stage("layout", kind=request["kind"], plot=request.get("plot", "bipartite")):
+        laid_out = layout_network(
+            graph,
+            request.get("plot", "bipartite"),
+            size_metric=request.get("size", "degree"),
+            merge_edges=request.get("merge", False),
+        )
+    if laid_out is not graph:
+        # merged edges were laid out on a copy, the subgraphs keep all edges
+        for node, attrs in laid_out.nodes(data=True):
+            graph.nodes[node].update((key, attrs[key]) for key in ("x", "y", "size") if key in attrs)
+    return graph
+
+
+def _render_to_file(request, filename):
+    """Render a request of render_server, on the render server if SURFIAMVIZ_RENDER_SERVER is set."""
+    server_url = os.environ.get(RENDER_SERVER_ENV)
+    plot = request.get("plot", "bipartite")
+    if server_url:
+        with stage("render", kind=request["kind"], plot=plot, location="server"):
+            html = render_remote(server_url, request)
+    else:
+        with stage("build_graph", kind=request["kind"]) as timed:
+            graph = timed.graph(build_graph(request))
+        with stage("render", kind=request["kind"], plot=plot, location="local") as timed:
+            html = render_graph(timed.graph(graph), request)
+    Path(filename).write_text(html, encoding="utf-8")
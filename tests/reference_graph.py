@@ -0,0 +1,45 @@
+"""Per element graph construction, the reference for nodes_to_graph in the tests and benchmarks."""
+
+import networkx as nx
+
+
+def nodes_to_graph_per_element(nodes_sets: list) -> nx.MultiDiGraph:
+    """Build the graph with one add_node/add_edge call per element."""
+    graph = nx.MultiDiGraph()
+    org = nodes_sets[0]["node_name"]
+    graph.add_node(org, label=nodes_sets[0]["label"], node_type="ORGANISATION")
+    for unit in nodes_sets[1]:
+        graph.add_node(unit, node_type="UNIT", label=unit)
+        graph.add_edge(org, unit, edge_type="BACKBONE")
+    for coll in nodes_sets[2]:
+        graph.add_node(coll["node_name"], label=coll["label"], node_type="COLLABORATION")
+        edges_from = coll.get("edges_from", [])
+        if len(edges_from) > 0:
+            for from_node in edges_from:
+                graph.add_edge(from_node, coll["node_name"], edge_type="BACKBONE")
+        else:
+            graph.add_edge(org, coll["node_name"])
+        for service in coll["services"]:
+            graph.add_node(service, color_group="service", label=service, node_type="APPLICATION")
+            graph.add_edge(coll["node_name"], service, edge_type="BACKBONE")
+        for group in coll["groups"]:
+            graph.add_node(f'{coll["node_name"]}_{group}', label=group, color_group="group", node_type="CO_GROUP")
+            graph.add_edge(coll["node_name"], f'{coll["node_name"]}_{group}', edge_type="BACKBONE")
+        for user in coll["users"]:
+            graph.add_edge(user, coll["node_name"], label="member_of", edge_type="MEMBERS")
+    users = nodes_sets[3]
+    for user, u_dict in users.items():
+        graph.add_node(
+            user,
+            color_group="admin" if len(u_dict["admin_of"]) > 0 else "user",
+            label=u_dict.get("label", user),
+            node_type="COLL_ADMIN" if len(u_dict["admin_of"]) > 0 else "CO_MEMBER",
+        )
+    for user, u_dict in users.items():
+        if "created_by" in u_dict and u_dict["created_by"] in graph:
+            graph.add_edge(u_dict["created_by"], user, label="invite", edge_type="ACTIONS")
+        for item in u_dict["admin_of"]:
+            graph.add_edge(user, item, edge_type="BACKBONE")
+        for item in u_dict["create"]:
+            graph.add_edge(user, item, label="create", edge_type="ACTIONS")
+    return graph
@@ -0,0 +1,122 @@
+import tomllib
+
+import networkx as nx
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from surfiamviz.builder import GraphBuilder
+from surfiamviz.graph_from_config import add_graph_edges_from_config, import_example_graph, set_node_type
+from surfiamviz.utils import infer_coll_app_edges, read_graph_config
+
+CONFIG = read_graph_config("configs/sram_config.toml")
+
+
+def _edge_set(graph):
+    return sorted((u, v, d["edge_type"], d.get("label"), d.get("color")) for u, v, d in graph.edges(data=True))
+
+
+def _full_inference(builder):
+    graph = builder.user_graph()
+    infer_coll_app_edges(graph, False)
+    for u, v, d in graph.edges(data=True):
+        d.setdefault("color", CONFIG["edge_colors"][d["edge_type"]])
+    return graph
+
+
+@pytest.mark.parametrize("section", ["all_nodes_graph", "app_graph_org_accepts", "app_graph_org_denies"])
+def test_from_example(section):
+    example_graphs = import_example_graph("example_graphs/sram_examples.toml")
+    builder = GraphBuilder.from_example(example_graphs, section, CONFIG)
+    graph = nx.MultiDiGraph()
+    add_graph_edges_from_config(graph, example_graphs, section)
+    set_node_type(graph, CONFIG)
+    infer_coll_app_edges(graph, False)
+    assert sorted((u, v, d) for u, v, d in graph.edges(data="edge_type")) == sorted(
+        (u, v, d) for u, v, d in builder.graph.edges(data="edge_type")
+    )
+    assert builder.html().startswith("<!DOCTYPE html>")
+
+    # the example section round trips
+    section_toml = builder.to_example_section("copy", explanation='A "copy".')
+    copy = GraphBuilder.from_example(tomllib.loads(section_toml), "copy", CONFIG)
+    assert _edge_set(copy.graph) == _edge_set(builder.graph)
+
+
+def test_edits():
+    builder = GraphBuilder(CONFIG)
+    builder.add_edge("ORGANISATION", "ORG_ADMIN", "BACKBONE")
+    builder.add_edge("ORGANISATION", "COLLABORATION_1", "BACKBONE")
+    builder.add_edge("APPLICATION_1", "APP_ADMIN", "BACKBONE")
+    builder.add_edge("ORG_ADMIN", "APPLICATION_1", "ACTIONS", "approves")
+    assert _edge_set(builder.graph) == _edge_set(_full_inference(builder))
+    assert builder.graph.get_edge_data("COLLABORATION_1", "APPLICATION_1")[0]["label"] == "reject by app"
+
+    positions = dict(builder.positions)
+    builder.add_edge("APP_ADMIN", "COLLABORATION_1", "ACTIONS", "approves")
+    builder.add_edge("RESEARCHER_1", "COLLABORATION_1", "MEMBERS", "member_of")
+    assert builder.graph.get_edge_data("COLLABORATION_1", "APPLICATION_1")[0]["edge_type"] == "BACKBONE"
+    assert builder.graph.number_of_edges("COLLABORATION_1", "APPLICATION_1") == 1
+    # existing nodes keep their position, the new node is placed at its neighbour
+    assert all(builder.positions[node] == pos for node, pos in positions.items())
+    assert builder.positions["RESEARCHER_1"][0] == positions["COLLABORATION_1"][0]
+    # further members of the collaboration are placed next to each other
+    builder.add_edge("RESEARCHER_2", "COLLABORATION_1", "MEMBERS", "member_of")
+    builder.add_edge("RESEARCHER_3", "COLLABORATION_1", "MEMBERS", "member_of")
+    members = [builder.positions[f"RESEARCHER_{i}"] for i in (1, 2, 3)]
+    assert len(set(members)) == 3 and len({y for _, y in members}) == 1
+
+    builder.remove_edge("ORGANISATION", "COLLABORATION_1")
+    assert not builder.graph.has_edge("COLLABORATION_1", "APPLICATION_1")
+    builder.remove_node("APP_ADMIN")
+    assert "APP_ADMIN" not in builder.positions
+    assert _edge_set(builder.graph) == _edge_set(_full_inference(builder))
+
+    with pytest.raises(ValueError):
+        builder.add_node("ORGANISATION")
+    with pytest.raises(ValueError):
+        builder.add_edge("ORGANISATION", "SOMETHING", "BACKBONE")
+    assert "SOMETHING" not in builder.graph
+    with pytest.raises(KeyError):
+        builder.remove_edge("ORGANISATION", "ORG_ADMIN_2")
+
+
+NODES = ["ORGANISATION", "UNIT_1", "UNIT_2", "COLLABORATION_1", "COLLABORATION_2", "COLLABORATION_3",
+         "APPLICATION_1", "APPLICATION_2", "ORG_ADMIN_1", "ORG_ADMIN_2", "APP_ADMIN_1", "APP_ADMIN_2", "CO_MEMBER"]
+EDGES = (
+    [("ORGANISATION", n, "BACKBONE", None) for n in NODES if n.startswith(("UNIT", "COLL", "ORG_ADMIN"))]
+    + [(u, c, "BACKBONE", None) for u in ("UNIT_1", "UNIT_2") for c in NODES if c.startswith(("COLL", "ORG_ADMIN"))]
+    + [(a, adm, "BACKBONE", None) for a in ("APPLICATION_1", "APPLICATION_2") for adm in ("APP_ADMIN_1", "APP_ADMIN_2")]
+    + [(adm, c, "ACTIONS", label) for adm in ("APP_ADMIN_1", "APP_ADMIN_2") for c in NODES if c.startswith("COLL")
+       for label in ("approves", "denies")]
+    + [("CO_MEMBER", c, "MEMBERS", None) for c in NODES if c.startswith("COLL")]
+)
+EDITS = st.one_of(
+    st.tuples(st.just("add"), st.sampled_from(EDGES)),
+    st.tuples(st.just("remove"), st.sampled_from(EDGES)),
+    st.tuples(
+        st.just("remove_node"), st.sampled_from([n for n in NODES if not n.startswith(("ORG_ADMIN", "APPLICATION"))])
+    ),
+)
+
+
+@given(st.lists(st.sampled_from(["approves", "denies"]), min_size=4, max_size=4), st.lists(EDITS, max_size=25))
+@settings(max_examples=150, deadline=None)
+def test_incremental_equals_full_inference(org_decisions, edits):
+    builder = GraphBuilder(CONFIG)
+    decisions = zip([("ORG_ADMIN_1", "APPLICATION_1"), ("ORG_ADMIN_1", "APPLICATION_2"),
+                     ("ORG_ADMIN_2", "APPLICATION_1"), ("ORG_ADMIN_2", "APPLICATION_2")], org_decisions)
+    for (org_adm, app), label in decisions:
+        builder.add_edge(org_adm, app, "ACTIONS", label)
+    for action, item in edits:
+        if action == "add":
+            u, v, edge_type, label = item
+            builder.add_edge(u, v, edge_type, label)
+        elif action == "remove" and builder.graph.has_edge(item[0], item[1]):
+            try:
+                builder.remove_edge(item[0], item[1])
+            except KeyError:
+                pass
+        elif action == "remove_node" and item in builder.graph:
+            builder.remove_node(item)
+        assert _edge_set(builder.graph) == _edge_set(_full_inference(builder))
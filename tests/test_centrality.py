@@ -0,0 +1,75 @@
+import networkx as nx
+import pytest
+
+from surfiamviz.centrality import (
+    _CENTRALITY_CACHE,
+    approximate_betweenness,
+    compute_centrality,
+    reachable_users,
+    set_node_sizes,
+)
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+
+
+def test_reachable_users(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    counts = reachable_users(graph)
+    users = [n for n, t in graph.nodes(data="node_type") if t in ("CO_MEMBER", "COLL_ADMIN")]
+    org = [n for n, t in graph.nodes(data="node_type") if t == "ORGANISATION"][0]
+
+    def member_of(user, coll):
+        return any(d["edge_type"] != "ACTIONS" for d in graph.get_edge_data(user, coll, default={}).values())
+
+    # the organisation contains all users that are members of a collaboration
+    members = {u for u in users if any(member_of(u, c) for c in graph.succ[u])}
+    assert counts[org] == len(members)
+    for node, ntype in graph.nodes(data="node_type"):
+        if ntype == "COLLABORATION":
+            expected = {u for u in graph.pred[node] if u in users and member_of(u, node)}
+            assert counts[node] == len(expected)
+        elif ntype in ("CO_MEMBER", "COLL_ADMIN"):
+            assert counts[node] == 1
+
+
+def test_reachable_users_ignores_creators():
+    # u1 created collaboration B but is not a member of it
+    export = {
+        "name": "org",
+        "short_name": "o",
+        "units": [],
+        "collaborations": [
+            {"name": "A", "created_by": "u1", "units": [], "services": [], "groups": [],
+             "collaboration_memberships": [
+                 {"role": "member", "created_by": "u1", "user": {"uid": "u1", "username": "U1"}}]},
+            {"name": "B", "created_by": "u1", "units": [], "services": [], "groups": [{"name": "G"}],
+             "collaboration_memberships": []},
+        ],
+    }
+    counts = reachable_users(nodes_to_graph(get_nodes_from_dict(export)))
+    assert (counts["A"], counts["B"], counts["B_G"]) == (1, 0, 0)
+
+
+def test_approximate_betweenness_exact_for_small_graphs():
+    graph = nx.MultiDiGraph([(0, 1), (1, 2), (1, 2), (2, 3)])
+    expected = nx.betweenness_centrality(nx.path_graph(4))
+    assert approximate_betweenness(graph, k=10) == pytest.approx(expected)
+
+
+def test_compute_centrality_cache(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    _CENTRALITY_CACHE.clear()
+    values = compute_centrality(graph, "betweenness", k=5)
+    assert len(_CENTRALITY_CACHE) == 1
+    assert compute_centrality(graph, "betweenness", k=5) is values
+    with pytest.raises(ValueError):
+        compute_centrality(graph, "pagerank")
+
+
+def test_set_node_sizes(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    set_node_sizes(graph, "degree")
+    assert all(attrs["size"] == 25 + attrs["degree"] for _, attrs in graph.nodes(data=True))
+    set_node_sizes(graph, "reachable_users")
+    sizes = [attrs["size"] for _, attrs in graph.nodes(data=True)]
+    assert min(sizes) >= 25
+    assert max(sizes) == 100
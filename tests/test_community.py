@@ -0,0 +1,79 @@
+import networkx as nx
+
+from surfiamviz.community import (
+    _PARTITION_CACHE,
+    collapse_multiedges,
+    detect_communities,
+    louvain_sparse,
+    to_sparse_adjacency,
+)
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.utils import community_layout
+
+
+def _modularity(graph, communities):
+    return nx.community.modularity(collapse_multiedges(graph), communities, weight="weight")
+
+
+def test_collapse_multiedges():
+    graph = nx.MultiDiGraph()
+    graph.add_edge("a", "b", edge_type="BACKBONE")
+    graph.add_edge("a", "b", edge_type="ACTIONS")
+    graph.add_edge("b", "a", edge_type="MEMBERS")
+    graph.add_edge("b", "c")
+    simple = collapse_multiedges(graph)
+    assert not simple.is_directed() and not simple.is_multigraph()
+    assert simple["a"]["b"]["weight"] == 3
+    assert simple["b"]["c"]["weight"] == 1
+
+
+def test_louvain_sparse_two_cliques():
+    graph = nx.barbell_graph(6, 0)
+    nodes, adj = to_sparse_adjacency(collapse_multiedges(graph))
+    labels = louvain_sparse(adj)
+    assert len(set(labels.tolist())) == 2
+    assert len({labels[nodes.index(n)] for n in range(6)}) == 1
+
+
+def test_fast_modularity_parity(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    fast = detect_communities(graph, "fast")
+    assert set().union(*fast) == set(graph.nodes)
+    for alg in ["greedy", "louvain"]:
+        reference = detect_communities(graph, alg)
+        assert _modularity(graph, fast) >= _modularity(graph, reference) - 0.02
+
+
+def test_fast_modularity_parity_generated():
+    graph = nx.MultiDiGraph(nx.planted_partition_graph(8, 25, 0.4, 0.01, seed=3, directed=True))
+    fast = detect_communities(graph, "fast")
+    reference = detect_communities(graph, "louvain")
+    assert _modularity(graph, fast) >= _modularity(graph, reference) - 0.02
+
+
+def test_greedy_original_graph(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    expected = nx.community.greedy_modularity_communities(graph)
+    assert detect_communities(graph, "greedy") == [frozenset(comm) for comm in expected]
+
+
+def test_partition_cache(sram):
+    _PARTITION_CACHE.clear()
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    first = detect_communities(graph, "fast")
+    assert len(_PARTITION_CACHE) == 1
+    assert detect_communities(nodes_to_graph(get_nodes_from_dict(sram)), "fast") is first
+
+
+def test_parallel_community_layout(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    communities = detect_communities(graph, "greedy")
+    centers = list(nx.spring_layout(nx.cycle_graph(len(communities)), scale=250, seed=429).values())
+    expected = {}
+    for center, comm in zip(centers, communities):
+        expected.update(nx.spring_layout(nx.subgraph(graph, comm), center=center, scale=250, seed=1430))
+
+    for workers in [1, 2]:
+        community_layout(graph, 500, "greedy", workers=workers)
+        for node in graph:
+            assert (graph.nodes[node]["x"], graph.nodes[node]["y"]) == tuple(expected[node])
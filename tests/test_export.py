@@ -0,0 +1,40 @@
+import csv
+
+import pytest
+
+from surfiamviz.export import TABLE_SCHEMAS, export_tables, iter_chunks
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict
+
+
+def _read_csv(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_iter_chunks():
+    assert [len(c) for c in iter_chunks(iter(range(7)), 3)] == [3, 3, 1]
+
+
+def test_export_csv(sram, tmp_path):
+    nodes = get_nodes_from_dict(sram)
+    written = export_tables(nodes, tmp_path, export_format="csv", chunk_size=2)
+    assert set(written) == set(TABLE_SCHEMAS)
+
+    memberships = _read_csv(written["memberships"])
+    assert memberships[0] == ["user", "collaboration", "role"]
+    assert len(memberships) - 1 == sum(len(coll["users"]) for coll in nodes[2])
+    admins = {(row[0], row[1]) for row in memberships[1:] if row[2] == "admin"}
+    assert admins == {tuple(row) for row in _read_csv(written["admin_roles"])[1:]}
+
+    units = _read_csv(written["units"])
+    assert [row[1] for row in units[1:]] == nodes[1]
+    assert len(_read_csv(written["users"])) - 1 == len(nodes[3])
+
+
+def test_export_parquet(sram, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    nodes = get_nodes_from_dict(sram)
+    written = export_tables(nodes, tmp_path, export_format="parquet", chunk_size=3)
+    services = pq.read_table(written["services"]).to_pylist()
+    assert services == [{"collaboration": coll["node_name"], "service": service}
+                        for coll in nodes[2] for service in coll["services"]]
@@ -0,0 +1,105 @@
+import copy
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from surfiamviz import caching, graph_from_sram_json
+from surfiamviz.caching import ResultCache
+from surfiamviz.graph_from_sram_json import (
+    get_nodes_from_dict,
+    get_sram_org_partial,
+    get_sram_org_skeleton,
+    select_collaborations,
+)
+
+DELAY = 0.2
+
+
+@pytest.fixture()
+def sram_server(sram):
+    """Local mock of the SRAM API, as the real API it returns the organisation with memberships."""
+    org = copy.deepcopy(sram)
+    details = {coll["identifier"]: coll for coll in sram["collaborations"]}
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            if self.path == "/api/organisations/v1":
+                body = org
+            else:
+                time.sleep(DELAY)
+                body = details[self.path.rsplit("/", 1)[-1]]
+            content = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    graph_from_sram_json._MEMBERSHIP_CACHE.clear()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requested
+    server.shutdown()
+    graph_from_sram_json._MEMBERSHIP_CACHE.clear()
+
+
+def test_select_collaborations(sram):
+    selected = select_collaborations(sram, units=["Network Insights"])
+    assert selected["units"] == ["Network Insights"]
+    assert all("Network Insights" in coll["units"] for coll in selected["collaborations"])
+    # a collaboration selected by name keeps its units
+    other = next(coll for coll in sram["collaborations"] if "Network Insights" not in coll["units"])
+    selected = select_collaborations(sram, units=["Network Insights"], collaborations=[other["name"]])
+    assert set(selected["units"]) == {"Network Insights", *other["units"]}
+    # without a selection a copy is returned, changing it leaves the organisation as it is
+    copied = select_collaborations(sram)
+    assert copied == sram and copied is not sram
+    copied["collaborations"].pop()
+    assert len(sram["collaborations"]) == len(copied["collaborations"]) + 1
+
+
+def test_partial_fetch(sram, sram_server):
+    server, requested = sram_server
+    skeleton = get_sram_org_skeleton("token", server)
+    assert requested == ["/api/organisations/v1"]
+    assert all("collaboration_memberships" not in coll for coll in skeleton["collaborations"])
+
+    # the memberships of the skeleton download are cached for the token
+    name = sram["collaborations"][0]["name"]
+    partial = get_sram_org_partial("token", server, collaborations=[name], skeleton=skeleton)
+    assert [coll["name"] for coll in partial["collaborations"]] == [name]
+    assert len(requested) == 1
+    nodes = get_nodes_from_dict(partial)
+    assert nodes[2][0]["users"] == [m["user"]["uid"] for m in sram["collaborations"][0]["collaboration_memberships"]]
+    full = get_sram_org_partial("token", server, skeleton=skeleton)
+    assert get_nodes_from_dict(full)[3] == get_nodes_from_dict(sram)[3]
+    assert all("collaboration_memberships" not in coll for coll in skeleton["collaborations"])
+
+    # another token does not see the cached memberships, missing ones are requested concurrently
+    start = time.perf_counter()
+    other = get_sram_org_partial("other token", server, units=sram["units"], skeleton=skeleton)
+    elapsed = time.perf_counter() - start
+    new_requests = len(sram["collaborations"])
+    assert len(requested) == 1 + new_requests
+    assert elapsed < DELAY * new_requests
+    assert get_nodes_from_dict(other)[3] == get_nodes_from_dict(sram)[3]
+
+
+def test_membership_cache_expires(monkeypatch):
+    cache = ResultCache(maxsize=2, ttl=10)
+    now = [0.0]
+    monkeypatch.setattr(caching.time, "monotonic", lambda: now[0])
+    cache.put("a", 1)
+    now[0] = 9.0
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None and "a" not in cache and len(cache) == 0
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph, stats_dict
+from surfiamviz.graph_store import GraphStore
+from surfiamviz.utils import ego_network
+
+
+def _edge_set(graph):
+    return sorted((u, v, d.get("edge_type", ""), d.get("label", "")) for u, v, d in graph.edges(data=True))
+
+
+def _ingest(tmp_path, export):
+    path = tmp_path / "org.json"
+    path.write_text(json.dumps(export), encoding="utf-8")
+    store = GraphStore(tmp_path / "org.sqlite")
+    store.ingest(path)
+    return store
+
+
+def test_graph_store(sram, tmp_path):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    with _ingest(tmp_path, sram) as store:
+        assert store.counts() == {
+            "nodes": graph.number_of_nodes(),
+            "edges": graph.number_of_edges(),
+            "memberships": sum(len(c["collaboration_memberships"]) for c in sram["collaborations"]),
+        }
+        assert dict(store.subgraph([], []).nodes(data=True)) == dict(graph.nodes(data=True))
+        assert json.loads(store.stats()) == json.loads(stats_dict(get_nodes_from_dict(sram)))
+        for node in graph:
+            for hops in (0, 1, 2):
+                ego = store.ego_network(node, hops)
+                expected = ego_network(graph, node, hops)
+                assert sorted(ego) == sorted(expected)
+                assert _edge_set(ego) == _edge_set(expected)
+        with pytest.raises(KeyError):
+            store.ego_network("nobody")
+        with pytest.raises(ValueError):
+            store.ingest(tmp_path / "org.json")
+
+    # the store is kept on disk
+    with GraphStore(tmp_path / "org.sqlite") as store:
+        assert _edge_set(store.subgraph([], [])) == _edge_set(graph)
+
+
+def test_graph_store_name_collisions(tmp_path):
+    # a unit called like the organisation, a unit that is not in the organisation and a
+    # collaboration name that appears twice
+    export = {
+        "name": "org",
+        "short_name": "o",
+        "units": ["u1"],
+        "collaborations": [
+            {"name": "c", "created_by": "admin", "units": ["org", "u2"], "services": [{"name": "s"}], "groups": [],
+             "collaboration_memberships": [
+                 {"role": "admin", "created_by": "admin", "user": {"uid": "admin", "username": "Admin"}}]},
+            {"name": "c", "created_by": "other", "units": [], "services": [{"name": "s"}], "groups": [],
+             "collaboration_memberships": [
+                 {"role": "member", "created_by": "admin", "user": {"uid": "u", "username": "U"}}]},
+        ],
+    }
+    nodes = get_nodes_from_dict(export)
+    graph = nodes_to_graph(nodes)
+    with _ingest(tmp_path, export) as store:
+        materialised = store.subgraph([], [])
+        assert dict(materialised.nodes(data=True)) == dict(graph.nodes(data=True))
+        assert _edge_set(materialised) == _edge_set(graph)
+        assert store.stats() == stats_dict(nodes)
@@ -0,0 +1,55 @@
+import copy
+
+import pytest
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.history import HistoryStore, facts_to_nodes, nodes_to_facts
+
+
+def _series(sram):
+    """Three exports: a member leaves on day 2 and comes back as admin on day 3."""
+    day2 = copy.deepcopy(sram)
+    membership = day2["collaborations"][0]["collaboration_memberships"].pop()
+    day3 = copy.deepcopy(day2)
+    membership = dict(membership, role="admin")
+    day3["collaborations"][0]["collaboration_memberships"].append(membership)
+    day3["collaborations"].pop()
+    return [("2024-01-01", sram), ("2024-01-02", day2), ("2024-01-03", day3)], membership
+
+
+def test_facts_roundtrip(sram):
+    nodes = get_nodes_from_dict(sram)
+    assert facts_to_nodes(nodes_to_facts(nodes)) == nodes
+
+
+def test_history_store(sram, tmp_path):
+    series, membership = _series(sram)
+    store = HistoryStore(tmp_path / "store")
+    for date, export in series:
+        store.ingest(date, export)
+    with pytest.raises(ValueError):
+        store.ingest("2024-01-02", sram)
+
+    # reopened store answers from the files only
+    store = HistoryStore(tmp_path / "store")
+    assert store.dates == ["2024-01-01", "2024-01-02", "2024-01-03"]
+    for date, export in series:
+        expected = nodes_to_graph(get_nodes_from_dict(export))
+        graph = store.graph_at(date)
+        assert sorted(graph.nodes(data=True)) == sorted(expected.nodes(data=True))
+        assert sorted(graph.edges(data=True), key=str) == sorted(expected.edges(data=True), key=str)
+    assert store.graph_at("2024-02-01").number_of_nodes() == expected.number_of_nodes()
+    with pytest.raises(KeyError):
+        store.graph_at("2023-12-31")
+
+    growth = store.growth()
+    assert [stats["collaborations"] for stats in growth.values()] == [3, 3, 2]
+    assert growth["2024-01-02"]["memberships"] == growth["2024-01-01"]["memberships"] - 1
+
+    user = membership["user"]["uid"]
+    coll = sram["collaborations"][0]["name"]
+    assert store.access_history(user, coll) == [
+        ["2024-01-01", "2024-01-02", "member"],
+        ["2024-01-03", None, "admin"],
+    ]
+    assert store.access_history("nobody", coll) == []
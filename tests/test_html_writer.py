@@ -0,0 +1,35 @@
+import io
+import re
+
+import gravis as gv
+import pytest
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.html_writer import export_html_streaming, write_html_stream
+from surfiamviz.utils import VIS_OPTIONS, color_edges, color_nodes
+
+
+def _normalize(html_text):
+    random_id = re.search(r'id="(\w+)-main-div"', html_text).group(1)
+    return html_text.replace(random_id, "RANDOM_ID")
+
+
+def test_streaming_html_equals_gravis(sram, config):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    color_nodes(graph, config)
+    color_edges(graph, config)
+    graph.graph["label"] = "organisation"
+    expected = gv.vis(graph, **VIS_OPTIONS).to_html_standalone()
+
+    out = io.StringIO()
+    write_html_stream(graph, out, buffer_size=64, **VIS_OPTIONS)
+    assert _normalize(out.getvalue()) == _normalize(expected)
+
+
+def test_export_html_streaming(sram, tmp_path):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    html_path = tmp_path / "graph.html"
+    export_html_streaming(graph, html_path, **VIS_OPTIONS)
+    assert html_path.read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+    with pytest.raises(FileExistsError):
+        export_html_streaming(graph, html_path, **VIS_OPTIONS)
@@ -0,0 +1,64 @@
+import itertools
+
+import pytest
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict
+from surfiamviz.incidence import Incidence
+
+pytest.importorskip("scipy")
+
+
+def _nodes(colls: dict, services: dict = None) -> list:
+    services = services or {}
+    return [
+        {"node_name": "org", "label": "org"},
+        [],
+        [
+            {"node_name": name, "label": name, "edges_from": [], "services": services.get(name, []),
+             "groups": [], "users": users}
+            for name, users in colls.items()
+        ],
+        {},
+    ]
+
+
+def test_incidence(sram):
+    nodes = get_nodes_from_dict(sram)
+    incidence = Incidence.from_nodes(nodes)
+    members = {coll["node_name"]: set(coll["users"]) for coll in nodes[2]}
+    assert incidence.memberships.shape == (len(set().union(*members.values())), len(members))
+
+    # the sparse products equal the set operations
+    overlap = incidence.overlap().toarray()
+    for (i, a), (j, b) in itertools.product(enumerate(incidence.collaborations), repeat=2):
+        assert overlap[i, j] == len(members[a] & members[b])
+    for a, b, shared, jaccard in incidence.similar_collaborations(k=10):
+        assert shared == len(members[a] & members[b])
+        assert jaccard == pytest.approx(shared / len(members[a] | members[b]))
+    summary = incidence.summary()
+    assert summary["memberships"] == sum(len(users) for users in members.values())
+    assert summary["users_per_service"] == {service: len(set().union(*members.values())) for service in
+                                            incidence.services}
+
+
+def test_similar_collaborations():
+    incidence = Incidence.from_nodes(
+        _nodes({"A": ["u1", "u2", "u3"], "B": ["u1", "u2", "u3", "u4"], "C": ["u1"], "D": ["u5"], "A2": ["u1", "u1"]})
+    )
+    # the repeated membership in A2 counts once
+    assert incidence.similar_collaborations(k=2) == [("C", "A2", 1, 1.0), ("A", "B", 3, 0.75)]
+    # D shares no members and is never listed
+    assert all("D" not in pair[:2] for pair in incidence.similar_collaborations(k=100))
+    assert [pair[1] for pair in incidence.similar_collaborations(k=2, collaboration="C")] == ["A2", "A"]
+    with pytest.raises(KeyError):
+        incidence.similar_collaborations(collaboration="E")
+
+
+def test_outlier_users_and_services():
+    colls = {f"coll{i}": [f"user{i}", f"user{i + 1}"] for i in range(20)}
+    for i in range(12):
+        colls[f"coll{i}"].append("busy")
+    incidence = Incidence.from_nodes(_nodes(colls, {"coll0": ["wiki"], "coll1": ["wiki", "chat"]}))
+    assert [uid for uid, _, _ in incidence.outlier_users()] == ["busy"]
+    assert incidence.outlier_users()[0][1] == 12
+    assert dict(zip(incidence.services, incidence.users_per_service().tolist())) == {"wiki": 4, "chat": 3}
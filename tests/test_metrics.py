@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from surfiamviz import metrics
+from surfiamviz.caching import ResultCache
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
+from surfiamviz.metrics import Metrics
+from surfiamviz.render_server import sram_request
+from surfiamviz.webutils.utils import _render_to_file
+
+
+def _samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_metrics_disabled(sram):
+    disabled = Metrics()
+    assert not disabled.enabled
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    # the same object that does nothing for every stage
+    with disabled.stage("load_graph") as timed:
+        assert timed.graph(graph) is graph
+    assert disabled.stage("other") is timed
+    disabled.count("surfiamviz_cache_requests_total", cache="x", result="hit")
+    assert _samples(disabled.render_prometheus()).keys() == {"surfiamviz_peak_memory_bytes"}
+
+
+def test_metrics_prometheus_and_log(sram, tmp_path):
+    prometheus_path = tmp_path / "metrics.prom"
+    log_path = tmp_path / "metrics.jsonl"
+    enabled = Metrics(prometheus_path=prometheus_path, log_path=log_path)
+    cache = ResultCache()
+    enabled.register_cache("graphs", cache)
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("b")
+    cache.get("a")
+
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    for _ in range(3):
+        with enabled.stage("load_graph", plot='a "b"') as timed:
+            timed.graph(graph)
+    with pytest.raises(ValueError):
+        with enabled.stage("render"):
+            raise ValueError
+
+    samples = _samples(prometheus_path.read_text(encoding="utf-8"))
+    labels = 'plot="a \\"b\\"",stage="load_graph"'
+    assert samples[f'surfiamviz_stage_seconds_count{{{labels},status="ok"}}'] == "3"
+    assert samples[f'surfiamviz_stage_seconds_bucket{{{labels},status="ok",le="+Inf"}}'] == "3"
+    assert samples['surfiamviz_stage_seconds_count{stage="render",status="error"}'] == "1"
+    # a graph of the test organisation falls into the buckets above its size
+    nodes = graph.number_of_nodes()
+    for bound in metrics.SIZE_BUCKETS:
+        expected = "3" if nodes <= bound else "0"
+        assert samples[f'surfiamviz_graph_nodes_bucket{{{labels},le="{bound}"}}'] == expected
+    assert float(samples[f"surfiamviz_graph_edges_sum{{{labels}}}"]) == 3 * graph.number_of_edges()
+    assert samples['surfiamviz_cache_requests_total{cache="graphs",result="hit"}'] == "2"
+    assert samples['surfiamviz_cache_requests_total{cache="graphs",result="miss"}'] == "1"
+    assert int(samples["surfiamviz_peak_memory_bytes"]) > 0
+
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    assert [(r["stage"], r["status"]) for r in records] == [("load_graph", "ok")] * 3 + [("render", "error")]
+    assert records[0]["nodes"] == nodes and records[0]["plot"] == 'a "b"'
+    assert "nodes" not in records[-1]
+
+
+def test_render_to_file_metrics(sram, config, tmp_path, monkeypatch):
+    enabled = Metrics(enabled=True)
+    monkeypatch.setattr(metrics, "METRICS", enabled)
+    monkeypatch.delenv("SURFIAMVIZ_RENDER_SERVER", raising=False)
+    _render_to_file(sram_request(sram, config), tmp_path / "graph.html")
+    assert (tmp_path / "graph.html").read_text(encoding="utf-8").startswith("<!DOCTYPE html>")
+    samples = _samples(enabled.render_prometheus())
+    assert samples['surfiamviz_stage_seconds_count{kind="organisation",stage="build_graph",status="ok"}'] == "1"
+    assert samples[
+        'surfiamviz_graph_nodes_count{kind="organisation",location="local",plot="bipartite",stage="render"}'
+    ] == "1"
@@ -0,0 +1,49 @@
+import shutil
+
+import networkx as nx
+
+from surfiamviz import precompile
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.precompile import ExampleCache, build_example_graph, examples_key
+from surfiamviz.utils import read_graph_config
+
+EXAMPLES = "example_graphs/sram_examples.toml"
+CONFIG = "configs/sram_config.toml"
+
+
+def test_precompile_renders_once(tmp_path):
+    cache = ExampleCache(EXAMPLES, CONFIG, tmp_path)
+    assert cache.precompile(sections=["plain_graph"], plot_types=["bipartite", "greedy"]) == 2
+    assert cache.precompile(sections=["plain_graph"], plot_types=["bipartite", "greedy"]) == 0
+    assert len(list(cache.directory.glob("*/*.html"))) == 2
+
+    html = cache.html("plain_graph", "bipartite")
+    assert html.startswith("<!DOCTYPE html>")
+    # a new cache object for the same files finds the rendered html
+    assert ExampleCache(EXAMPLES, CONFIG, tmp_path).html("plain_graph", "bipartite") == html
+
+
+def test_precompiled_graph_roundtrip(tmp_path):
+    expected = build_example_graph(import_example_graph(EXAMPLES), "plain_graph", read_graph_config(CONFIG))
+    cache = ExampleCache(EXAMPLES, CONFIG, tmp_path)
+    cache.graph("plain_graph")
+    graph = ExampleCache(EXAMPLES, CONFIG, tmp_path).graph("plain_graph")
+    assert isinstance(graph, nx.MultiDiGraph)
+    assert dict(graph.nodes(data=True)) == dict(expected.nodes(data=True))
+    assert list(graph.edges(keys=True, data=True)) == list(expected.edges(keys=True, data=True))
+
+
+def test_examples_key_changes_with_config(tmp_path):
+    config = tmp_path / "config.toml"
+    shutil.copy(CONFIG, config)
+    key = examples_key(EXAMPLES, config)
+    assert key == examples_key(EXAMPLES, CONFIG)
+    with open(config, "a", encoding="utf-8") as f:
+        f.write("\n# changed\n")
+    assert examples_key(EXAMPLES, config) != key
+
+
+def test_examples_key_changes_with_version(monkeypatch):
+    key = examples_key(EXAMPLES, CONFIG)
+    monkeypatch.setattr(precompile, "__version__", "0.0.0")
+    assert examples_key(EXAMPLES, CONFIG) != key
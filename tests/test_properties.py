@@ -0,0 +1,239 @@
+"""Property-based equivalence of the optimised functions with straightforward reference implementations."""
+
+import itertools
+import json
+
+import networkx as nx
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from surfiamviz.centrality import USER_NODE_TYPES, reachable_users
+from surfiamviz.graph_store import GraphStore
+from surfiamviz.graph_from_sram_json import (
+    compress_users,
+    get_nodes_from_dict,
+    get_nodes_from_records,
+    nodes_to_graph,
+    read_organisation,
+    stats_dict,
+)
+from surfiamviz.stats import stats_from_dict
+from surfiamviz.utils import infer_coll_app_edges, subgraph
+
+
+def _reference_stats_dict(nodes):
+    stats = {"units": {"names": nodes[1]}, "collaborations": {}}
+    stats["collaborations"]["names"] = [coll["node_name"] for coll in nodes[2]]
+    stats["users"] = len(set(u for coll in nodes[2] for u in coll["users"]))
+    for unit in nodes[1]:
+        colls = [coll for coll in nodes[2] if unit in coll["edges_from"]]
+        stats["units"][unit] = {
+            "collaborations": len(colls),
+            "users": len(set(u for coll in colls for u in coll["users"])),
+        }
+    for coll in stats["collaborations"]["names"]:
+        coll_dict = [c for c in nodes[2] if c["node_name"] == coll][0]
+        stats["collaborations"][coll] = {
+            "users": len(coll_dict["users"]),
+            "groups": len(coll_dict["groups"]),
+            "admins": len([u for u in nodes[3] if coll in nodes[3][u]["admin_of"]]),
+        }
+    return json.dumps(stats, indent=4)
+
+
+def _reference_get_nodes_from_dict(sram_org_dict):
+    users = {}
+    colls = []
+    for entry in sram_org_dict["collaborations"]:
+        users.setdefault(entry["created_by"], {"admin_of": [], "create": []})["create"].append(entry["name"])
+        coll = {
+            "node_name": entry["name"],
+            "label": entry["name"],
+            "edges_from": entry["units"],
+            "services": [service["name"] for service in entry["services"]],
+            "groups": [group["name"] for group in entry["groups"]],
+            "users": [],
+        }
+        for u_entry in entry.get("collaboration_memberships", []):
+            uid = u_entry["user"]["uid"]
+            coll["users"].append(uid)
+            user = users.setdefault(uid, {"admin_of": [], "create": []})
+            user.setdefault("label", u_entry["user"]["username"])
+            user.setdefault("created_by", u_entry["created_by"])
+            if u_entry["role"] == "admin":
+                user["admin_of"].append(entry["name"])
+        colls.append(coll)
+    org = {"node_name": sram_org_dict["name"], "label": sram_org_dict["short_name"]}
+    return [org, sram_org_dict["units"], colls, users]
+
+
+def _reference_infer(graph):
+    node_type = dict(graph.nodes(data="node_type"))
+    org_adms, app_adms, apps, colls = (
+        [n for n in graph if node_type[n] == ntype]
+        for ntype in ("ORG_ADMIN", "APP_ADMIN", "APPLICATION", "COLLABORATION")
+    )
+
+    def approves(source, target):
+        return (
+            graph.has_edge(source, target)
+            and graph[source][target][0]["edge_type"] == "ACTIONS"
+            and graph[source][target][0]["label"] == "approves"
+        )
+
+    paths = [
+        sorted(["COLLABORATION", "ORGANISATION", "ORG_ADMIN"]),
+        sorted(["COLLABORATION", "ORGANISATION", "ORG_ADMIN", "UNIT"]),
+    ]
+    undirected = graph.to_undirected(as_view=True)
+    for coll, org_adm, app, app_adm in itertools.product(colls, org_adms, apps, app_adms):
+        if graph[org_adm][app][0]["label"] == "denies":
+            graph.add_edge(coll, app, edge_type="REJECT", label="reject by org")
+            continue
+        owned = any(
+            sorted(node_type[n] for n in path) in paths
+            for path in nx.all_simple_paths(undirected, coll, org_adm, cutoff=3)
+        )
+        if not owned:
+            continue
+        if not (graph.has_edge(app, app_adm) and approves(app_adm, coll)):
+            graph.add_edge(coll, app, edge_type="REJECT", label="reject by app")
+        elif approves(org_adm, app):
+            graph.add_edge(coll, app, edge_type="BACKBONE")
+        else:
+            graph.add_edge(coll, app, edge_type="REJECT", label="reject by org")
+
+
+@st.composite
+def sram_exports(draw):
+    units = draw(st.lists(st.sampled_from(["u0", "u1", "u2", "u3"]), max_size=4, unique=True))
+    uids = st.sampled_from([f"user{i}" for i in range(8)])
+    colls = []
+    for i in range(draw(st.integers(0, 6))):
+        memberships = [
+            {"role": role, "created_by": "user0", "user": {"uid": uid, "username": uid}}
+            for uid, role in draw(st.lists(st.tuples(uids, st.sampled_from(["admin", "member"])), max_size=5))
+        ]
+        colls.append(
+            {
+                "name": f"coll{i}",
+                "created_by": draw(uids),
+                "units": draw(st.lists(st.sampled_from(units), unique=True)) if units else [],
+                "services": [],
+                "groups": [{"name": f"g{j}"} for j in range(draw(st.integers(0, 2)))],
+                "collaboration_memberships": memberships,
+            }
+        )
+    return {"name": "org", "short_name": "org", "units": units, "collaborations": colls}
+
+
+@given(export=sram_exports())
+@settings(max_examples=200, deadline=None)
+def test_get_nodes_from_dict_equivalence(export, tmp_path_factory):
+    path = tmp_path_factory.mktemp("export") / "org.json"
+    path.write_text(json.dumps(export), encoding="utf-8")
+    expected = _reference_get_nodes_from_dict(export)
+    assert get_nodes_from_dict(export) == expected
+    assert get_nodes_from_records(read_organisation(path)) == expected
+    assert get_nodes_from_records(read_organisation(path, stream=True)) == expected
+
+
+@given(sram_exports())
+@settings(max_examples=200, deadline=None)
+def test_stats_dict_equivalence(export):
+    nodes = get_nodes_from_dict(export)
+    assert stats_dict(nodes) == _reference_stats_dict(nodes)
+    assert json.loads(stats_dict(nodes)) == stats_from_dict(export)
+
+
+def _node_and_edge_sets(graph):
+    nodes = sorted((node, sorted(attrs.items())) for node, attrs in graph.nodes(data=True))
+    edges = sorted((u, v, sorted(attrs.items())) for u, v, attrs in graph.edges(data=True))
+    return nodes, edges
+
+
+@given(export=sram_exports())
+@settings(max_examples=100, deadline=None)
+def test_graph_store_equivalence(export, tmp_path_factory):
+    path = tmp_path_factory.mktemp("export") / "org.json"
+    path.write_text(json.dumps(export), encoding="utf-8")
+    nodes = get_nodes_from_dict(export)
+    graph = nodes_to_graph(nodes)
+    with GraphStore(":memory:") as store:
+        store.ingest(path, batch_size=7)
+        assert _node_and_edge_sets(store.subgraph([], [])) == _node_and_edge_sets(graph)
+        assert _node_and_edge_sets(store.subgraph(["MEMBERS"], ["CO_MEMBER", "COLLABORATION"])) == (
+            _node_and_edge_sets(subgraph(graph, ["MEMBERS"], ["CO_MEMBER", "COLLABORATION"]))
+        )
+        assert store.stats() == stats_dict(nodes)
+
+
+@given(sram_exports())
+@settings(max_examples=200, deadline=None)
+def test_compress_users_properties(export):
+    graph = nodes_to_graph(get_nodes_from_dict(export))
+    compressed = compress_users(graph)
+    # every user is in exactly one node, the other nodes are unchanged
+    members = [m for _, ms in compressed.nodes(data="members", default=None) if ms for m in ms]
+    users = [n for n, ntype in graph.nodes(data="node_type") if ntype in USER_NODE_TYPES]
+    kept = [n for n, ntype in compressed.nodes(data="node_type") if ntype in USER_NODE_TYPES and n in graph]
+    assert sorted(members + kept) == sorted(users)
+    assert sum(c for _, c in compressed.nodes(data="count", default=1)) == graph.number_of_nodes()
+    # an edge is only dropped if it is an invite inside a class
+    weights = sum(w for _, _, w in compressed.edges(data="weight", default=1))
+    assert weights <= graph.number_of_edges()
+    if compressed.number_of_nodes() == graph.number_of_nodes():
+        assert list(compressed.edges(keys=True, data=True)) == list(graph.edges(keys=True, data=True))
+    reachable = reachable_users(graph)
+    for node, count in reachable_users(compressed).items():
+        if node in graph and node not in users:
+            assert count == reachable[node]
+
+
+@st.composite
+def approval_graphs(draw):
+    graph = nx.MultiDiGraph()
+    colls = [f"COLL{i}" for i in range(draw(st.integers(1, 4)))]
+    units = [f"UNIT{i}" for i in range(draw(st.integers(0, 2)))]
+    apps = [f"APP{i}" for i in range(draw(st.integers(1, 2)))]
+    app_adms = [f"APP_ADMIN{i}" for i in range(draw(st.integers(1, 2)))]
+    org_adms = [f"ORG_ADMIN{i}" for i in range(draw(st.integers(1, 2)))]
+    for nodes, ntype in (
+        (["ORGANISATION"], "ORGANISATION"), (colls, "COLLABORATION"), (units, "UNIT"),
+        (apps, "APPLICATION"), (app_adms, "APP_ADMIN"), (org_adms, "ORG_ADMIN"), (["USER"], "CO_MEMBER"),
+    ):
+        graph.add_nodes_from(nodes, node_type=ntype)
+    structure = list(itertools.product(["ORGANISATION"], units + org_adms + colls))
+    structure += list(itertools.product(units, colls + org_adms)) + [("USER", c) for c in colls]
+    for u, v in draw(st.lists(st.sampled_from(structure), unique=True)):
+        graph.add_edge(u, v, edge_type="BACKBONE")
+    labels = st.sampled_from(["approves", "denies"])
+    for org_adm, app in itertools.product(org_adms, apps):
+        graph.add_edge(org_adm, app, edge_type="ACTIONS", label=draw(labels))
+    for app, app_adm in draw(st.lists(st.sampled_from(list(itertools.product(apps, app_adms))), unique=True)):
+        graph.add_edge(app, app_adm, edge_type="BACKBONE")
+    for app_adm, coll in draw(st.lists(st.sampled_from(list(itertools.product(app_adms, colls))), unique=True)):
+        graph.add_edge(app_adm, coll, edge_type="ACTIONS", label=draw(labels))
+    return graph
+
+
+@given(approval_graphs())
+@settings(max_examples=200, deadline=None)
+def test_infer_coll_app_edges_equivalence(graph):
+    reference = graph.copy()
+    _reference_infer(reference)
+    infer_coll_app_edges(graph, False)
+    assert list(graph.edges(keys=True, data=True)) == list(reference.edges(keys=True, data=True))
+
+
+@given(approval_graphs(), st.lists(st.sampled_from(["BACKBONE", "ACTIONS"])),
+       st.lists(st.sampled_from(["COLLABORATION", "UNIT", "APPLICATION"])))
+@settings(max_examples=100, deadline=None)
+def test_subgraph_properties(graph, edge_types, node_types):
+    sub = subgraph(graph, edge_types, node_types)
+    for node, ntype in sub.nodes(data="node_type"):
+        assert not node_types or ntype in node_types
+    for u, v, etype in sub.edges(data="edge_type"):
+        assert not edge_types or etype in edge_types
+        assert graph.has_edge(u, v)
+    assert graph.number_of_nodes() >= sub.number_of_nodes()
@@ -0,0 +1,85 @@
+import copy
+import json
+
+import pytest
+
+from surfiamviz.graph_from_sram_json import (
+    get_nodes_from_dict,
+    get_nodes_from_records,
+    read_organisation,
+    select_collaborations,
+)
+from surfiamviz.records import Collaboration, Organisation, json_loads
+from surfiamviz.validate import validate_sram_dict
+
+
+def test_organisation_records(sram):
+    org = Organisation.from_dict(sram)
+    assert org.name == sram["name"] and org.short_name == sram["short_name"]
+    assert [coll.name for coll in org.collaborations] == [coll["name"] for coll in sram["collaborations"]]
+    # unused fields are not kept, the records have no instance dictionary
+    with pytest.raises(AttributeError):
+        org.accepted_user_policy = ""
+    # one record per user, shared by its memberships
+    users = {}
+    for coll in org.collaborations:
+        for membership in coll.memberships:
+            assert users.setdefault(membership.user.uid, membership.user) is membership.user
+    assert get_nodes_from_records(org) == get_nodes_from_dict(sram)
+
+
+def test_read_organisation(sram, tmp_path):
+    path = tmp_path / "org.json"
+    path.write_text(json.dumps(sram), encoding="utf-8")
+    assert json_loads(path.read_bytes()) == sram
+    expected = get_nodes_from_dict(sram)
+    assert get_nodes_from_records(read_organisation(path)) == expected
+    assert get_nodes_from_records(read_organisation(path, stream=True)) == expected
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_read_organisation_selected_and_validated(sram, tmp_path, stream):
+    path = tmp_path / "org.json"
+    # the units come after the collaborations, references to them are checked at the end
+    path.write_text(json.dumps(dict(reversed(list(sram.items())))), encoding="utf-8")
+    selections = [
+        {"units": [sram["units"][0]]},
+        {"collaborations": [sram["collaborations"][-1]["name"]]},
+        {"units": [sram["units"][0]], "collaborations": [sram["collaborations"][0]["name"]]},
+    ]
+    for selection in selections:
+        problems = []
+        org = read_organisation(path, stream=stream, problems=problems, **selection)
+        assert problems == []
+        assert get_nodes_from_records(org) == get_nodes_from_dict(select_collaborations(sram, **selection))
+
+    broken = copy.deepcopy(sram)
+    broken["collaborations"][0]["units"] = ["not a unit"]
+    del broken["collaborations"][1]["services"]
+    path.write_text(json.dumps(dict(reversed(list(broken.items())))), encoding="utf-8")
+    problems = []
+    assert read_organisation(path, stream=stream, problems=problems) is None
+    assert sorted(problems) == sorted(validate_sram_dict(broken))
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_read_organisation_collaboration_not_dict(sram, tmp_path, stream):
+    path = tmp_path / "org.json"
+    path.write_text(json.dumps(dict(sram, collaborations=["not a collaboration"])), encoding="utf-8")
+    problems = []
+    assert read_organisation(path, stream=stream, problems=problems) is None
+    assert problems == ["collaborations[0]: expected dict, found str."]
+    if stream:
+        with pytest.raises(ValueError, match=r"collaborations\[0\]: expected dict, found str"):
+            read_organisation(path, stream=True, units=sram["units"])
+
+
+def test_collaboration_without_memberships(sram, capsys):
+    entry = dict(sram["collaborations"][0])
+    del entry["collaboration_memberships"]
+    coll = Collaboration.from_dict(entry)
+    assert coll.memberships is None
+    org = Organisation("org", "org", [], [coll])
+    nodes = get_nodes_from_records(org)
+    assert nodes[2][0]["users"] == []
+    assert "No user info" in capsys.readouterr().out
@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.render_server import (
+    QueueFullError,
+    RenderService,
+    build_graph,
+    example_request,
+    export_key,
+    make_server,
+    render_remote,
+    request_hash,
+    sram_request,
+)
+from surfiamviz.utils import layout_network, subgraph
+from surfiamviz.webutils.utils import _positioned_graph
+
+
+@pytest.fixture()
+def render_server():
+    service = RenderService(workers=2, cache_size=4, max_jobs=4)
+    server = make_server("127.0.0.1", 0, service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", service
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+def test_request_hash(sram, config):
+    request = sram_request(sram, config, plot_type="bipartite")
+    assert request_hash(request) == request_hash(dict(reversed(list(request.items()))))
+    assert request_hash(request) != request_hash(sram_request(sram, config, plot_type="greedy"))
+
+
+def test_render_server_deduplicates(render_server, sram, config):
+    url, service = render_server
+    request = sram_request(sram, config)
+
+    def post(_):
+        return requests.post(url + "/render", json=request, timeout=60)
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        responses = list(pool.map(post, range(3)))
+    assert all(r.status_code == 200 for r in responses)
+    assert all("text/html" in r.headers["Content-Type"] for r in responses)
+    # one job renders the graph, the other requests wait for it or hit the cache
+    assert sorted(r.headers["X-Render-Cache"] for r in responses).count("new") == 1
+    assert len({r.text for r in responses}) == 1
+
+    assert post(None).headers["X-Render-Cache"] == "hit"
+    assert requests.get(url + "/health", timeout=10).json() == {"workers": 2, "in_flight": 0, "cached": 1}
+    metrics = requests.get(url + "/metrics", timeout=10).text
+    assert 'surfiamviz_render_requests_total{cache="new"} 1' in metrics
+    assert 'surfiamviz_cache_requests_total{cache="render_html",result="hit"} 1' in metrics
+    assert 'surfiamviz_stage_seconds_count{kind="organisation",plot="bipartite",stage="render",status="ok"} 4' in metrics
+
+
+def test_render_server_example_and_client(render_server, config):
+    url, _ = render_server
+    example_graphs = import_example_graph("example_graphs/sram_examples.toml")
+    html = render_remote(url, example_request(example_graphs, "plain_graph", config))
+    assert html.startswith("<!DOCTYPE html>")
+
+
+def test_render_server_rejects_invalid_requests(render_server, sram, config):
+    url, _ = render_server
+    broken = dict(sram, units="not a list")
+    response = requests.post(url + "/render", json=sram_request(broken, config), timeout=10)
+    assert response.status_code == 400
+    assert response.json()["problems"][0] == "organisation units: expected list, found str."
+    response = requests.post(url + "/render", data=b"{", timeout=10)
+    assert response.status_code == 400
+    with pytest.raises(requests.HTTPError):
+        render_remote(url, {"kind": "unknown"})
+
+
+def test_render_server_focus(render_server, sram, config):
+    url, _ = render_server
+    uid = sram["collaborations"][0]["collaboration_memberships"][0]["user"]["uid"]
+    full = render_remote(url, sram_request(sram, config))
+    ego = render_remote(url, sram_request(sram, config, focus=uid, hops=1))
+    assert uid in ego
+    assert len(ego) < len(full)
+    with pytest.raises(KeyError):
+        render_remote(url, sram_request(sram, config, focus="nobody"))
+    response = requests.post(url + "/render", json=sram_request(sram, config, focus=uid, hops=-1), timeout=10)
+    assert response.status_code == 400
+
+
+def test_build_graph_reuses_export(sram, config, monkeypatch):
+    uid = sram["collaborations"][0]["collaboration_memberships"][0]["user"]["uid"]
+    request = sram_request(sram, config, focus=uid, hops=1, sram_hash="upload")
+    assert request["export"] == export_key(sram, config, "upload")
+    assert sram_request(sram, config, focus=uid)["export"] == export_key(sram, config)
+    assert "export" not in sram_request(sram, config)
+    first = build_graph(request)
+
+    # later focus requests of the same export neither build nor hash the export again
+    def fail(*_):
+        raise AssertionError("export handled again")
+
+    monkeypatch.setattr("surfiamviz.render_server._organisation_graph", fail)
+    monkeypatch.setattr("surfiamviz.render_server.request_hash", fail)
+    other = sram["collaborations"][0]["collaboration_memberships"][-1]["user"]["username"]
+    assert set(build_graph(request)) == set(first)
+    assert other in {name for _, name in build_graph(dict(request, focus=other)).nodes(data="label")}
+
+
+def test_render_service_queues_requests(config):
+    example_graphs = import_example_graph("example_graphs/sram_examples.toml")
+    first = example_request(example_graphs, "plain_graph", config)
+    second = example_request(example_graphs, "plain_graph", config, merge_edges=True)
+    service = RenderService(workers=1, max_jobs=1, queue_timeout=0)
+    try:
+        service.submit(first)
+        with pytest.raises(QueueFullError):
+            service.submit(second)
+        # with a timeout the request waits until the running job is done
+        service.queue_timeout = 60
+        future, cache = service.submit(second)
+        assert cache == "new"
+        assert future.result(timeout=60).startswith("<!DOCTYPE html>")
+        assert service.submit(first)[1] == "hit"
+    finally:
+        service.close()
+
+
+@pytest.mark.parametrize("merge_edges", [False, True])
+def test_positioned_graph(sram, config, merge_edges):
+    request = sram_request(sram, config, plot_type="greedy", merge_edges=merge_edges)
+    graph = _positioned_graph(request)
+    assert all("x" in attrs and "y" in attrs for _, attrs in graph.nodes(data=True))
+    # the subgraphs keep the positions of the rendered graph and all edges
+    expected = layout_network(build_graph(request), "greedy", merge_edges=merge_edges)
+    assert dict(graph.nodes(data="x")) == dict(expected.nodes(data="x"))
+    assert graph.number_of_edges() == build_graph(request).number_of_edges()
+    sg = subgraph(graph, ["MEMBERS"], [])
+    assert all(sg.nodes[node]["x"] == graph.nodes[node]["x"] for node in sg)
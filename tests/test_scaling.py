@@ -0,0 +1,202 @@
+"""Scaling tests: the empirical growth exponent of core functions must stay below a bound.
+
+Each function runs on generated inputs of growing size; the exponent is the slope of
+log(time) against log(size), fitted over the best of a few runs per size. Bounds are
+declared per function with some slack for timer noise, a quadratic regression gives
+an exponent near 2.
+
+The timings depend on the machine, so these tests are marked scaling and only run
+with pytest -m scaling.
+"""
+
+import gc
+import time
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from surfiamviz.builder import GraphBuilder
+from surfiamviz.graph_from_config import set_node_type
+from surfiamviz.graph_from_sram_json import compress_users, get_nodes_from_dict, nodes_to_graph, stats_dict
+from surfiamviz.incidence import Incidence
+from surfiamviz.simulate import Simulator, parse_scenario
+from surfiamviz.utils import ego_network, infer_coll_app_edges, label_index, read_graph_config, subgraph
+
+pytestmark = pytest.mark.scaling
+
+SIZES = [250, 500, 1000, 2000, 4000]
+
+
+def sram_export(n_colls: int, users_per_coll: int = 5) -> dict:
+    """SRAM organisation with n_colls collaborations, a unit per 10 collaborations and shared users."""
+    units = [f"unit{i}" for i in range(max(1, n_colls // 10))]
+    colls = []
+    for i in range(n_colls):
+        memberships = [
+            {
+                "role": "admin" if j == 0 else "member",
+                "created_by": "user0",
+                "user": {"uid": f"user{(i * 3 + j) % (n_colls * 2)}", "username": f"user{j}"},
+            }
+            for j in range(users_per_coll)
+        ]
+        colls.append(
+            {
+                "name": f"coll{i}",
+                "created_by": "user0",
+                "units": [units[i % len(units)]],
+                "services": [{"name": f"service{i % 7}"}],
+                "groups": [{"name": "group"}],
+                "collaboration_memberships": memberships,
+            }
+        )
+    return {"name": "org", "short_name": "org", "units": units, "collaborations": colls}
+
+
+def approval_graph(n_colls: int) -> nx.MultiDiGraph:
+    """Organisation with n_colls collaborations in units, two applications and their admins."""
+    graph = nx.MultiDiGraph()
+    graph.add_node("ORGANISATION", node_type="ORGANISATION")
+    graph.add_node("ORG_ADMIN", node_type="ORG_ADMIN")
+    graph.add_edge("ORGANISATION", "ORG_ADMIN", edge_type="BACKBONE")
+    for i in range(max(1, n_colls // 10)):
+        graph.add_node(f"UNIT{i}", node_type="UNIT")
+        graph.add_edge("ORGANISATION", f"UNIT{i}", edge_type="BACKBONE")
+    for app, label in (("APP0", "approves"), ("APP1", "denies")):
+        graph.add_node(app, node_type="APPLICATION")
+        graph.add_node(f"{app}_ADMIN", node_type="APP_ADMIN")
+        graph.add_edge(app, f"{app}_ADMIN", edge_type="BACKBONE")
+        graph.add_edge("ORG_ADMIN", app, edge_type="ACTIONS", label=label)
+    for i in range(n_colls):
+        coll = f"COLL{i}"
+        graph.add_node(coll, node_type="COLLABORATION")
+        graph.add_edge(f"UNIT{i % max(1, n_colls // 10)}", coll, edge_type="BACKBONE")
+        graph.add_edge("APP0_ADMIN", coll, edge_type="ACTIONS", label="approves" if i % 2 else "denies")
+        # members connect the collaborations, paths through them must not be searched
+        graph.add_edge(f"USER{i}", coll, edge_type="MEMBERS")
+        graph.add_edge(f"USER{(i + 1) % n_colls}", coll, edge_type="MEMBERS")
+        graph.nodes[f"USER{i}"]["node_type"] = "CO_MEMBER"
+    return graph
+
+
+def config_graph(n_nodes: int, graph_config: dict) -> nx.MultiDiGraph:
+    """Graph with node names prefixed by the configured node types, without node attributes."""
+    types = list(graph_config["node_types"])
+    graph = nx.MultiDiGraph()
+    for i in range(n_nodes):
+        graph.add_edge(f"{types[i % len(types)]}_{i}", f"{types[(i + 1) % len(types)]}_{i + 1}",
+                       edge_type="BACKBONE" if i % 2 else "MEMBERS")
+    return graph
+
+
+def growth_exponent(func, make_input, sizes=SIZES, repeat=3) -> float:
+    """Fit the exponent b of time = a * size**b, using the fastest of repeat runs per size."""
+    times = []
+    for size in sizes:
+        best = float("inf")
+        for _ in range(repeat):
+            data = make_input(size)
+            # like timeit, collections triggered by earlier allocations would dominate small runs
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                func(data)
+                best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+        times.append(best)
+    slope, _ = np.polyfit(np.log(sizes), np.log(times), 1)
+    return slope
+
+
+def test_growth_exponent_detects_quadratic():
+    def quadratic(items):
+        return sum(1 for a in items for b in items if a < b)
+
+    assert growth_exponent(quadratic, range, sizes=[100, 200, 400, 800]) > 1.6
+
+
+@pytest.mark.parametrize(
+    "name, func, make_input, bound",
+    [
+        ("stats_dict", stats_dict, lambda n: get_nodes_from_dict(sram_export(n)), 1.3),
+        ("get_nodes_from_dict", get_nodes_from_dict, sram_export, 1.3),
+        ("infer_coll_app_edges", lambda g: infer_coll_app_edges(g, False), approval_graph, 1.3),
+        ("compress_users", compress_users, lambda n: nodes_to_graph(get_nodes_from_dict(sram_export(n))), 1.3),
+        ("incidence", lambda nodes: Incidence.from_nodes(nodes).summary(), lambda n: get_nodes_from_dict(sram_export(n)),
+         1.3),
+    ],
+)
+def test_near_linear(name, func, make_input, bound):
+    exponent = growth_exponent(func, make_input)
+    assert exponent < bound, f"{name} grows with size**{exponent:.2f}"
+
+
+def test_subgraph_near_linear(config):
+    def select(graph):
+        subgraph(graph, ["BACKBONE"], ["COLLABORATION", "APPLICATION"])
+
+    exponent = growth_exponent(select, lambda n: config_graph(n * 4, config))
+    assert exponent < 1.3, f"subgraph grows with size**{exponent:.2f}"
+
+
+def test_set_node_type_near_linear(config, capsys):
+    exponent = growth_exponent(lambda g: set_node_type(g, config), lambda n: config_graph(n * 4, config))
+    capsys.readouterr()
+    assert exponent < 1.3, f"set_node_type grows with size**{exponent:.2f}"
+
+
+def _with_labels(graph):
+    return graph, label_index(graph)
+
+
+def test_ego_network_independent_of_graph_size():
+    # the direct neighbourhood of a user has the same size in all generated organisations,
+    # it includes user0 who created all collaborations and invited all users
+    exponent = growth_exponent(
+        lambda g: ego_network(g[0], "user7", hops=1, labels=g[1]),
+        lambda n: _with_labels(nodes_to_graph(get_nodes_from_dict(sram_export(n * 4)))),
+        repeat=5,
+    )
+    assert exponent < 0.4, f"ego_network grows with size**{exponent:.2f}"
+
+
+def test_builder_edit_independent_of_graph_size():
+    config = read_graph_config("configs/sram_config.toml")
+
+    def make_builder(n):
+        builder = GraphBuilder(config)
+        builder.add_edge("ORG_ADMIN", "APPLICATION", "ACTIONS", "approves")
+        builder.add_edge("APPLICATION", "APP_ADMIN", "BACKBONE")
+        for i in range(n):
+            builder.add_edge(f"UNIT_{i // 10}", f"COLLABORATION_{i}", "BACKBONE")
+        return builder
+
+    def edit(builder):
+        # approve one collaboration and take the approval back
+        builder.add_edge("APP_ADMIN", "COLLABORATION_7", "ACTIONS", "approves")
+        builder.remove_edge("APP_ADMIN", "COLLABORATION_7")
+
+    exponent = growth_exponent(edit, make_builder, repeat=5)
+    assert exponent < 0.4, f"a builder edit grows with size**{exponent:.2f}"
+
+
+def test_simulation_independent_of_graph_size():
+    config = read_graph_config("configs/sram_config.toml")
+
+    def make_simulator(n):
+        builder = GraphBuilder(config)
+        builder.add_edge("ORG_ADMIN", "APPLICATION", "ACTIONS", "approves")
+        builder.add_edge("APPLICATION", "APP_ADMIN", "BACKBONE")
+        for i in range(n):
+            builder.add_edge(f"UNIT_{i // 10}", f"COLLABORATION_{i}", "BACKBONE")
+            builder.add_edge(f"CO_MEMBER_{i}", f"COLLABORATION_{i}", "MEMBERS")
+        return Simulator(builder)
+
+    def simulate(simulator):
+        simulator.simulate(parse_scenario("approve APP_ADMIN COLLABORATION_7; add CO_MEMBER_1 COLLABORATION_7 MEMBERS"))
+
+    exponent = growth_exponent(simulate, make_simulator, repeat=5)
+    assert exponent < 0.4, f"a simulation grows with size**{exponent:.2f}"
@@ -0,0 +1,119 @@
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from surfiamviz.builder import GraphBuilder
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.simulate import Simulator, parse_change, parse_scenario
+from surfiamviz.utils import infer_coll_app_edges, read_graph_config
+
+CONFIG = read_graph_config("configs/sram_config.toml")
+EXAMPLES = import_example_graph("example_graphs/sram_examples.toml")
+
+
+def _edge_set(graph):
+    return sorted((u, v, d["edge_type"], d.get("label")) for u, v, d in graph.edges(data=True))
+
+
+def _verdicts(graph):
+    """Inferred edges per collaboration-application pair after a full inference."""
+    graph = graph.copy()
+    infer_coll_app_edges(graph, False)
+    verdicts = {}
+    for u, v, d in graph.edges(data=True):
+        if graph.nodes[u]["node_type"] == "COLLABORATION" and graph.nodes[v]["node_type"] == "APPLICATION":
+            verdicts.setdefault((u, v), []).append((d["edge_type"], d.get("label")))
+    return {pair: sorted(edges) for pair, edges in verdicts.items()}
+
+
+def test_parse_scenario():
+    assert parse_scenario("approve APP_ADMIN COLLABORATION_1; add R 'COLL 2' MEMBERS") == [
+        ("approve", "APP_ADMIN", "COLLABORATION_1", None, None),
+        ("add", "R", "COLL 2", "MEMBERS", None),
+    ]
+    with pytest.raises(ValueError):
+        parse_change("grant APP_ADMIN COLLABORATION_1")
+    with pytest.raises(ValueError):
+        parse_change("approve APP_ADMIN")
+
+
+def test_simulate():
+    simulator = Simulator.from_example(EXAMPLES, "app_graph_org_accepts", CONFIG)
+    edges = _edge_set(simulator.builder.graph)
+    results = simulator.simulate_batch(
+        [
+            parse_scenario("approve APP_ADMIN COLLABORATION_1"),
+            parse_scenario("deny ORG_ADMIN APPLICATION"),
+            parse_scenario("add RESEARCHER_1 COLLABORATION_2 MEMBERS member_of; remove APP_ADMIN COLLABORATION_2"),
+            parse_scenario("deny APP_ADMIN COLLABORATION_2; approve APP_ADMIN COLLABORATION_2"),
+        ]
+    )
+    assert results[0]["verdicts"] == [
+        ("COLLABORATION_1", "APPLICATION", [("REJECT", "reject by app")], [("BACKBONE", None)])
+    ]
+    assert {(coll, new[0][1]) for coll, _, _, new in results[1]["verdicts"]} == {
+        ("COLLABORATION_1", "reject by org"),
+        ("COLLABORATION_2", "reject by org"),
+    }
+    # the collaboration admin hangs off its collaboration and loses access with it
+    assert results[1]["access"] == [("COLL_ADMIN_2", "APPLICATION", "lost")]
+    # the new member never had access, the verdict changes before it is looked at
+    assert results[2]["verdicts"] == [
+        ("COLLABORATION_2", "APPLICATION", [("BACKBONE", None)], [("REJECT", "reject by app")])
+    ]
+    assert results[2]["access"] == [("COLL_ADMIN_2", "APPLICATION", "lost")]
+    assert results[3] == {"verdicts": [], "access": []}
+    # every scenario starts from and leaves the unchanged graph
+    assert _edge_set(simulator.builder.graph) == edges
+    assert "RESEARCHER_1" not in simulator.builder.positions
+
+    result = simulator.simulate(parse_scenario("add RESEARCHER_1 COLLABORATION_2 MEMBERS member_of"))
+    assert result == {"verdicts": [], "access": [("RESEARCHER_1", "APPLICATION", "gained")]}
+
+
+def test_simulate_restores_after_error():
+    simulator = Simulator.from_example(EXAMPLES, "app_graph_org_accepts", CONFIG)
+    edges = _edge_set(simulator.builder.graph)
+    with pytest.raises(ValueError):
+        simulator.simulate(parse_scenario("deny ORG_ADMIN APPLICATION; add ORG_ADMIN APPLICATION NO_SUCH_TYPE"))
+    assert _edge_set(simulator.builder.graph) == edges
+    assert simulator.builder.verdict_log is None
+
+
+CHANGES = st.one_of(
+    st.tuples(
+        st.sampled_from(["approve", "deny"]),
+        st.sampled_from([("ORG_ADMIN", "APPLICATION"), ("APP_ADMIN", "COLLABORATION_1"),
+                         ("APP_ADMIN", "COLLABORATION_2")]),
+    ),
+    st.tuples(
+        st.just("remove"),
+        st.sampled_from([("ORGANISATION", "COLLABORATION_1"), ("UNIT", "COLLABORATION_2"),
+                         ("ORGANISATION", "UNIT"), ("APPLICATION", "APP_ADMIN")]),
+    ),
+)
+
+
+@pytest.mark.parametrize("section", ["app_graph_org_accepts", "app_graph_org_denies"])
+@given(scenario=st.lists(CHANGES, min_size=1, max_size=6))
+@settings(max_examples=60, deadline=None)
+def test_simulate_equals_full_inference(section, scenario):
+    simulator = Simulator.from_example(EXAMPLES, section, CONFIG)
+    changes = [(action, u, v, None, None) for action, (u, v) in scenario]
+    result = simulator.simulate(changes)
+
+    # apply the changes without the simulator and infer all edges of the changed graph
+    changed = GraphBuilder.from_example(EXAMPLES, section, CONFIG)
+    for action, u, v, _, _ in changes:
+        edges = [edge for edge in changed.edges_between(u, v) if edge[0] != "ACTIONS" and action != "remove"]
+        if action != "remove":
+            edges.append(("ACTIONS", "approves" if action == "approve" else "denies"))
+        changed.set_edges(u, v, edges)
+    before = _verdicts(simulator.builder.user_graph())
+    after = _verdicts(changed.user_graph())
+    expected = {pair for pair in set(before) | set(after) if before.get(pair) != after.get(pair)}
+    assert {(coll, app) for coll, app, _, _ in result["verdicts"]} == expected
+    assert all(after.get((coll, app), []) == sorted(new) for coll, app, _, new in result["verdicts"])
+    assert _edge_set(simulator.builder.graph) == _edge_set(
+        GraphBuilder.from_example(EXAMPLES, section, CONFIG).graph
+    )
@@ -1,5 +1,21 @@
-from surfiamviz.graph_from_sram_json import get_nodes_from_dict, nodes_to_graph
-from surfiamviz.utils import color_edges, color_nodes
+import copy
+
+import networkx as nx
+import pytest
+from reference_graph import nodes_to_graph_per_element
+
+from surfiamviz.centrality import reachable_users
+from surfiamviz.graph_from_sram_json import compress_users, get_nodes_from_dict, nodes_to_graph
+from surfiamviz.utils import (
+    color_edges,
+    color_nodes,
+    ego_network,
+    find_node,
+    label_index,
+    merge_parallel_edges,
+    undirected_degree,
+    undirected_neighbors,
+)
 
 
 def test_sram(sram):
@@ -74,3 +90,105 @@ def test_color_edges(config, sram):
             assert graph.get_edge_data(edge[0], edge[1], edge[2])["color"] == "lightgray"
         elif graph.get_edge_data(edge[0], edge[1], edge[2])["edge_type"] == "TRUST":
             assert graph.get_edge_data(edge[0], edge[1], edge[2])["color"] == "purple"
+
+
+def test_undirected_degree(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    graph.add_edge("FederFlow", "FederFlow")
+    undirected = graph.to_undirected()
+    assert undirected_degree(graph) == dict(undirected.degree)
+    for node in graph:
+        assert set(undirected_neighbors(graph, node)) == set(undirected[node])
+
+
+def test_nodes_to_graph_bulk_identical(sram):
+    nodes = get_nodes_from_dict(sram)
+    graph = nodes_to_graph(nodes)
+    reference = nodes_to_graph_per_element(nodes)
+    assert list(graph.nodes(data=True)) == list(reference.nodes(data=True))
+    assert list(graph.edges(keys=True, data=True)) == list(reference.edges(keys=True, data=True))
+    for node in graph:
+        assert list(graph.pred[node]) == list(reference.pred[node])
+
+
+def test_merge_parallel_edges(sram, config):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    color_edges(graph, config)
+    merged = merge_parallel_edges(graph)
+
+    assert merged.number_of_nodes() == graph.number_of_nodes()
+    assert merged.number_of_edges() < graph.number_of_edges()
+    assert sum(w for _, _, w in merged.edges(data="weight", default=1)) == graph.number_of_edges()
+    for u, v, attrs in merged.edges(data=True):
+        assert merged.number_of_edges(u, v) == 1
+        parallel = list(graph[u][v].values())
+        if len(parallel) > 1:
+            assert attrs["edge_types"] == [e.get("edge_type", "NO_TYPE") for e in parallel]
+            assert attrs["color"] == parallel[0]["color"]
+            for edge in parallel:
+                if "label" in edge:
+                    assert edge["label"] in attrs["label"]
+        else:
+            assert attrs == parallel[0]
+
+
+def test_ego_network(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(sram))
+    user = sram["collaborations"][0]["collaboration_memberships"][0]["user"]
+    assert find_node(graph, user["username"]) == user["uid"]
+    labels = label_index(graph)
+    assert find_node(graph, user["username"], labels) == user["uid"]
+    assert find_node(graph, user["uid"], labels) == user["uid"]
+    with pytest.raises(KeyError):
+        ego_network(graph, "nobody", labels=labels)
+
+    undirected = graph.to_undirected()
+    for hops in range(4):
+        ego = ego_network(graph, user["username"], hops)
+        reference = nx.ego_graph(undirected, user["uid"], radius=hops)
+        assert set(ego) == set(reference)
+        assert sorted(ego.edges(keys=True, data=True), key=str) == sorted(
+            graph.subgraph(ego).edges(keys=True, data=True), key=str
+        )
+        for node in ego:
+            assert ego.nodes[node] == graph.nodes[node]
+    ego.nodes[user["uid"]]["color"] = "red"
+    assert "color" not in graph.nodes[user["uid"]]
+
+
+def _course(sram, n_students):
+    """Add a course collaboration with n_students members invited by its admin."""
+    sram = copy.deepcopy(sram)
+    admin = sram["collaborations"][0]["collaboration_memberships"][0]["user"]
+    memberships = [{"role": "admin", "created_by": admin["uid"], "user": admin}]
+    memberships += [
+        {"role": "member", "created_by": admin["uid"], "user": {"uid": f"student{i}", "username": f"s{i}"}}
+        for i in range(n_students)
+    ]
+    sram["collaborations"].append(
+        dict(sram["collaborations"][0], name="course", collaboration_memberships=memberships)
+    )
+    return sram
+
+
+def test_compress_users(sram):
+    graph = nodes_to_graph(get_nodes_from_dict(_course(sram, 50)))
+    compressed = compress_users(graph)
+
+    students = [f"student{i}" for i in range(50)]
+    assert sum(c for _, c in compressed.nodes(data="count", default=1)) == graph.number_of_nodes()
+    assert compressed.nodes["student0 +49"]["members"] == students
+    assert compressed.nodes["student0 +49"]["count"] == 50
+    assert compressed.nodes["student0 +49"]["label"] == "50 users"
+    assert compressed["student0 +49"]["course"][0]["weight"] == 50
+    # every edge is represented, the invites of the admin are merged as well
+    assert sum(w for _, _, w in compressed.edges(data="weight", default=1)) == graph.number_of_edges()
+    for node in students:
+        assert node not in compressed
+        assert "student0 +49" not in graph
+    # the node sizes by reachable users stay exact
+    reachable = reachable_users(graph)
+    for node, count in reachable_users(compressed).items():
+        if node in graph:
+            assert count == reachable[node]
+    assert compress_users(compressed).number_of_nodes() == compressed.number_of_nodes()
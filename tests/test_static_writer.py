@@ -0,0 +1,87 @@
+import io
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from surfiamviz.static_writer import color_rgb, export_static, write_png, write_svg_stream
+
+
+def _layout_graph():
+    graph = nx.MultiDiGraph()
+    graph.add_node("a", x=0, y=0, color="red", size=10)
+    graph.add_node("b", x=100, y=0, color="red", size=10)
+    graph.add_node("c", x=100, y=50, color="#00ff00", size=10)
+    graph.add_node("d", x=101, y=50)
+    graph.add_edge("a", "b", color="blue")
+    graph.add_edge("a", "b", color="blue")
+    graph.add_edge("b", "c", color="gray")
+    graph.add_edge("c", "d", color="gray")
+    return graph
+
+
+def _svg_paths(graph, **kwargs):
+    out = io.StringIO()
+    write_svg_stream(graph, out, width=220, margin=10, **kwargs)
+    root = ET.fromstring(out.getvalue())
+    return [path.attrib for path in root.iter("{http://www.w3.org/2000/svg}path")]
+
+
+def _png_pixels(data: bytes) -> np.ndarray:
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    idat_length = struct.unpack(">I", data[33:37])[0]
+    assert data[37:41] == b"IDAT"
+    rows = np.frombuffer(zlib.decompress(data[41 : 41 + idat_length]), dtype=np.uint8)
+    return rows.reshape(height, width * 3 + 1)[:, 1:].reshape(height, width, 3)
+
+
+def test_color_rgb():
+    assert color_rgb("red") == (255, 0, 0)
+    assert color_rgb("#0a0B0c") == (10, 11, 12)
+    assert color_rgb("#fff") == (255, 255, 255)
+    with pytest.raises(ValueError):
+        color_rgb("no colour")
+
+
+def test_svg():
+    paths = _svg_paths(_layout_graph())
+    edges = {p["stroke"]: p["d"] for p in paths if "stroke" in p}
+    nodes = {p["fill"]: p["d"] for p in paths if "fill" in p}
+    # one path per colour, parallel edges are drawn once
+    assert set(edges) == {"blue", "gray"} and edges["blue"].count("M") == 1
+    assert set(nodes) == {"red", "#00ff00", "lightblue"} and nodes["red"].count("M") == 2
+    # the edge from c to d is 2 pixels long
+    edges = {p["stroke"]: p["d"] for p in _svg_paths(_layout_graph(), min_edge_length=5) if "stroke" in p}
+    assert edges["gray"].count("M") == 1
+
+
+def test_png():
+    out = io.BytesIO()
+    write_png(_layout_graph(), out, width=220, margin=10, min_radius=1)
+    pixels = _png_pixels(out.getvalue())
+    # the nodes span -5 to 113.5 horizontally and -5 to 62.5 vertically, scaled to 200 pixels
+    scale = 200 / 118.5
+    assert pixels.shape == (10 + round(67.5 * scale) + 10, 220, 3)
+    assert tuple(pixels[0, 0]) == (255, 255, 255)
+    a_x, a_y = round(10 + 5 * scale), round(10 + 5 * scale)
+    assert tuple(pixels[a_y, a_x]) == (255, 0, 0)
+    assert tuple(pixels[a_y, round(10 + 55 * scale)]) == (0, 0, 255)
+
+
+def test_export_static(tmp_path):
+    graph = _layout_graph()
+    export_static(graph, tmp_path / "graph.svg")
+    export_static(graph, tmp_path / "graph.png", width=100)
+    assert (tmp_path / "graph.png").read_bytes()[:4] == b"\x89PNG"
+    with pytest.raises(FileExistsError):
+        export_static(graph, tmp_path / "graph.svg")
+    export_static(graph, tmp_path / "graph.svg", overwrite=True)
+    with pytest.raises(ValueError):
+        export_static(graph, tmp_path / "graph.pdf")
+    del graph.nodes["d"]["x"]
+    with pytest.raises(ValueError):
+        export_static(graph, tmp_path / "other.svg")
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from surfiamviz.graph_from_sram_json import get_nodes_from_dict, iter_organisation_json, stats_dict
+from surfiamviz.stats import HyperLogLog, UserCounter, stats_from_dict, stats_from_json
+
+SRAM_JSON = "tests/testdata/sram.json"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 16, 1 << 20])
+def test_iter_organisation_json(sram, chunk_size):
+    org = {"collaborations": []}
+    for key, value in iter_organisation_json(SRAM_JSON, chunk_size=chunk_size):
+        if key == "collaborations":
+            org[key].append(value)
+        else:
+            org[key] = value
+    assert org == sram
+
+
+def test_iter_organisation_json_large_collaboration(sram, tmp_path, monkeypatch):
+    large = dict(sram["collaborations"][0], description="x" * 200_000)
+    path = tmp_path / "org.json"
+    path.write_text(json.dumps(dict(sram, collaborations=[large])), encoding="utf-8")
+    calls = []
+    raw_decode = json.JSONDecoder.raw_decode
+
+    def counting(self, *args):
+        calls.append(args)
+        return raw_decode(self, *args)
+
+    monkeypatch.setattr(json.JSONDecoder, "raw_decode", counting)
+    values = dict(iter_organisation_json(path, chunk_size=1024))
+    assert values["collaborations"] == large
+    # a key and a value per field; the buffer grows geometrically, so the large
+    # collaboration takes a few decode attempts and not one per chunk of 1 KiB
+    assert len(calls) < 2 * len(sram) + 20
+
+
+def test_streaming_stats_equal_stats_dict(sram):
+    expected = json.loads(stats_dict(get_nodes_from_dict(sram)))
+    assert stats_from_json(SRAM_JSON) == expected
+    assert stats_from_dict(sram) == expected
+
+
+def test_approximate_stats_report_error(sram):
+    stats = stats_from_dict(sram, approximate=True, threshold=2)
+    assert stats["users"] == 4
+    assert stats["users_error"] == pytest.approx(1.04 / 128)
+    assert all(stats["units"][unit]["users_error"] > 0 for unit in stats["units"]["names"])
+    assert stats_from_dict(sram, approximate=True)["users_error"] == 0
+
+
+def test_hyperloglog_error_bound():
+    sketch = HyperLogLog(precision=12)
+    for i in range(50000):
+        sketch.add(f"user{i}")
+        sketch.add(f"user{i}")
+    assert abs(sketch.count() - 50000) / 50000 < 4 * sketch.relative_error
+
+
+def test_user_counter_switches_to_sketch():
+    counter = UserCounter(threshold=100)
+    counter.update(range(100))
+    assert counter.exact and counter.count() == 100
+    counter.update(range(50, 200))
+    assert not counter.exact
+    assert abs(counter.count() - 200) <= 5
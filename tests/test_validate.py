@@ -0,0 +1,77 @@
+import copy
+
+from surfiamviz.validate import (
+    SRAM_EDGE_TYPES,
+    SRAM_NODE_TYPES,
+    validate_config,
+    validate_example_graph,
+    validate_sram_dict,
+)
+
+
+def test_validate_valid_input(sram, config):
+    assert validate_sram_dict(sram) == []
+    assert validate_config(config, SRAM_NODE_TYPES, SRAM_EDGE_TYPES) == []
+
+
+def test_validate_sram_reports_all_problems(sram):
+    broken = copy.deepcopy(sram)
+    broken["collaborations"][0]["units"] = ["not a unit"]
+    del broken["collaborations"][0]["collaboration_memberships"][0]["user"]["username"]
+    del broken["collaborations"][1]["services"]
+    broken["collaborations"].append(copy.deepcopy(broken["collaborations"][2]))
+
+    problems = validate_sram_dict(broken)
+    assert len(problems) == 4
+    assert "unit 'not a unit'" in problems[0]
+    assert problems[1].endswith("user: missing username.")
+    assert problems[2].endswith("missing services.")
+    assert problems[3].endswith("duplicate collaboration name.")
+
+
+def test_validate_sram_wrong_types(sram):
+    broken = copy.deepcopy(sram)
+    broken["collaborations"][0]["units"] = None
+    broken["collaborations"][1]["groups"] = "group"
+    broken["collaborations"][2]["collaboration_memberships"][0]["user"] = None
+    where = [f"collaborations[{i}] '{coll['name']}'" for i, coll in enumerate(sram["collaborations"])]
+    assert validate_sram_dict(broken) == [
+        f"{where[0]} units: expected list, found NoneType.",
+        f"{where[1]} groups: expected list, found str.",
+        f"{where[2]} collaboration_memberships[0] user: expected dict, found NoneType.",
+    ]
+
+
+def test_validate_sram_missing_keys():
+    assert validate_sram_dict({"name": "org"}) == ["organisation: missing short_name, units, collaborations."]
+    assert validate_sram_dict([]) == ["organisation: expected dict, found list."]
+
+
+def test_validate_config_problems(config):
+    broken = copy.deepcopy(config)
+    del broken["edge_colors"]["NO_TYPE"]
+    del broken["node_types"]["UNIT"]["level"]
+    broken["node_types"]["CO_GROUP"]["level"] = "1"
+
+    problems = validate_config(broken, SRAM_NODE_TYPES, SRAM_EDGE_TYPES)
+    assert problems == [
+        "config node_types.UNIT: missing level.",
+        "config node_types.CO_GROUP.level: expected int, found str.",
+        "config edge_colors: edge type NO_TYPE has no colour.",
+    ]
+
+
+def test_validate_example_graph(config):
+    examples = {
+        "example": {
+            "explanation": "text",
+            "members": {"type": "MEMBERS", "edges": [["a", "b"], ["a", "c", "label"]]},
+            "unknown": {"type": "NOT_CONFIGURED", "edges": [["a"]]},
+        }
+    }
+    problems = validate_example_graph(examples, "example", config)
+    assert problems == [
+        "examples example.unknown: edge type NOT_CONFIGURED has no colour in edge_colors.",
+        "examples example.unknown: edge ['a'] should be [u, v] or [u, v, label].",
+    ]
+    assert validate_example_graph(examples, "other", config) == ["examples: graph other is not defined."]
@@ -0,0 +1,93 @@
+import os
+import shutil
+
+from surfiamviz.graph_from_config import import_example_graph
+from surfiamviz.precompile import build_example_graph
+from surfiamviz.utils import read_graph_config
+from surfiamviz.watch import WatchSession, config_changes
+
+EXAMPLES = "example_graphs/sram_examples.toml"
+CONFIG = "configs/sram_config.toml"
+
+
+def _replace(path, old, new):
+    text = path.read_text(encoding="utf-8")
+    assert old in text
+    path.write_text(text.replace(old, new, 1), encoding="utf-8")
+    # the file must look changed even within the resolution of the modification time
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_config_changes():
+    config = read_graph_config(CONFIG)
+    assert not config_changes(config, read_graph_config(CONFIG))
+    levels = read_graph_config(CONFIG)
+    levels["node_types"]["UNIT"]["level"] = 4
+    assert config_changes(config, levels) == {"levels", "export"}
+    colors = read_graph_config(CONFIG)
+    colors["edge_colors"]["ACTIONS"] = "red"
+    assert config_changes(config, colors) == {"colors", "export"}
+    types = read_graph_config(CONFIG)
+    del types["node_types"]["UNIT"]
+    assert "build" in config_changes(config, types)
+
+
+def _session(tmp_path, plot_type):
+    examples, config = tmp_path / "examples.toml", tmp_path / "config.toml"
+    shutil.copy(EXAMPLES, examples)
+    shutil.copy(CONFIG, config)
+    builds = []
+
+    def build(section, graph_config):
+        builds.append(section)
+        return build_example_graph({"plain_graph": section}, "plain_graph", graph_config)
+
+    session = WatchSession(
+        lambda: import_example_graph(examples)["plain_graph"],
+        build,
+        config,
+        tmp_path / "graph.html",
+        input_path=examples,
+        plot_type=plot_type,
+    )
+    session.render()
+    return session, examples, config, builds
+
+
+def test_watch_session(tmp_path, capsys):
+    session, examples, config, builds = _session(tmp_path, "bipartite")
+    assert len(builds) == 1 and (tmp_path / "graph.html").is_file()
+    assert session.poll() == set()
+
+    positions = dict(session.graph.nodes(data="x"))
+    _replace(config, 'ACTIONS = "orange"', 'ACTIONS = "red"')
+    assert session.poll() == {"colors", "export"}
+    assert dict(session.graph.nodes(data="x")) == positions
+    assert "red" in {color for _, _, color in session.graph.edges(data="color")}
+    assert "red" in (tmp_path / "graph.html").read_text(encoding="utf-8")
+
+    _replace(config, "COLLABORATION.level = 5", "COLLABORATION.level = 12")
+    assert session.poll() == {"levels", "layout", "export"}
+    assert dict(session.graph.nodes(data="x")) != positions
+
+    # only the watched section is compared
+    _replace(examples, "[app_graph_org_denies]", "[app_graph_org_denies_renamed]")
+    assert session.poll() == set()
+    assert len(builds) == 1
+
+    _replace(config, "[edge_colors]", "[edge_colours]")
+    assert session.poll() == set()
+    assert "was not updated" in capsys.readouterr().out
+    _replace(config, "[edge_colours]", "[edge_colors]")
+    assert session.poll() == set()
+
+
+def test_watch_session_community_layout(tmp_path):
+    session, _, config, builds = _session(tmp_path, "greedy")
+    positions = dict(session.graph.nodes(data="x"))
+    _replace(config, "COLLABORATION.level = 5", "COLLABORATION.level = 12")
+    assert session.poll() == {"levels", "export"}
+    assert dict(session.graph.nodes(data="x")) == positions
+    assert {level for node, level in session.graph.nodes(data="level") if node == "COLLABORATION"} == {12}
+    assert len(builds) == 1